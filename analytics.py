@@ -0,0 +1,382 @@
+"""
+Analytics
+
+Vectorized versions of the statistics in the analysis notebooks
+(analysis/analyse.ipynb and analysis/followup.ipynb). The notebooks loop over
+every group, country or committee, filter all rows with `str.contains` for
+each one and compute ages row by row with `apply`. Here every statistic is a
+single groupby: list columns (memberships, educated_at, occupation) are first
+split into one row per entry, and ages are computed for all MEPs at once from
+the birth date columns.
+
+Entries are matched exactly, so a code is no longer counted for every longer
+code that contains it (D-ME in D-MED), nor a university for every name that
+contains it. Committees are all membership codes except delegations; the
+notebooks' `code[0] != "D"` also dropped the DEVE and DROI committees.
+
+generate() writes every table CSV in analysis/ in one call, from the
+current output and the former term's output (output_former):
+
+    python analytics.py
+
+degree_count_df.csv, an export of degree_count.csv under the notebook's
+variable name, is written with the same table. Two groups of tables need
+data the output may not have, and are skipped with a notice if it is
+missing: non_native.csv needs the born_region column (geocoding.py), and the
+followup_*.csv tables need output_former. The Eurostat and reference
+inputs (*.tsv, ages.csv, gender_time.csv, employment_by_sector_reference.csv)
+are read, not written.
+"""
+
+from datetime import date
+from os import path
+
+import numpy as np
+import pandas as pd
+
+import storage
+from memberships import MembershipMatrix
+from paths import ANALYSIS_DIR
+from terms import CURRENT_TERM, TERMS
+
+
+# Ages are computed on these dates (analyse.ipynb and followup.ipynb)
+REFERENCE_DATE = date(2024, 5, 6)
+FOLLOWUP_REFERENCE_DATE = date(2024, 7, 16)
+
+# Years between two elections, for the net change of median ages
+TERM_YEARS = 5
+
+# Political groups of the follow-up tables, in their column order
+FOLLOWUP_GROUPS = ["The Left", "S&D", "Verts/ALE", "Renew", "PPE", "ECR", "PfE", "ESN"]
+
+LIST_COLUMNS = ["memberships", "educated_at", "occupation"]
+
+DEGREES = ["secondary", "university", "phd"]
+UNIVERSITY_DEGREES = ["university", "phd"]
+
+AGE_BINS = [0, 31, 51, 71, 100]
+AGE_LABELS = ["0-30", "31-50", "51-70", "71-100"]
+DECADES = [20, 30, 40, 50, 60, 70]
+
+# Committees whose codes start with a D, like those of delegations (D-US, DMED)
+D_COMMITTEES = {"DEVE", "DROI"}
+
+# Entries of educated_at that are not universities
+EXCLUDED_UNIVERSITIES = ["Faculty of Law and Administration"]
+EXCLUDED_OCCUPATIONS = ["politician"]
+TOP_ENTRIES = 10
+EXTREMES = 4
+
+COUNTRY_SLUGS = {
+    "AT": "austria", "BE": "belgium", "BG": "bulgaria", "CY": "cyprus", "CZ": "czechia", "DE": "germany",
+    "DK": "denmark", "EE": "estonia", "ES": "spain", "FI": "finland", "FR": "france", "GR": "greece",
+    "HR": "croatia", "HU": "hungary", "IE": "ireland", "IT": "italy", "LT": "lithuania", "LU": "luxembourg",
+    "LV": "latvia", "MT": "malta", "NL": "netherlands", "PL": "poland", "PT": "portugal", "RO": "romania",
+    "SE": "sweden", "SI": "slovenia", "SK": "slovakia",
+}
+
+# Files the notebooks write with ";" as separator (the others use ",")
+SEMICOLON_FILES = {
+    "age_bucket_comparison.csv", "degree_count.csv", "degree_count_df.csv", "educated_at.csv",
+    "median_age_difference.csv", "non_native.csv", "occupation_count.csv", "scrolly_age_population.csv",
+    "scrolly_degree_meps.csv", "scrolly_degree_population.csv",
+}
+
+def is_committee(code):
+    """False for delegation codes (D-US, DMED, ...)"""
+    return not code.startswith("D") or code in D_COMMITTEES
+
+def ages(df, on=REFERENCE_DATE):
+    """Age of every MEP on a date (missing if the birth year is unknown)"""
+    year = df["born_year"].astype("Float64")
+    year = year.where(year > 0)   # older outputs stored unknown years as 0
+    month = df["born_month"].astype("Float64")
+    day = df["born_day"].astype("Float64")
+    # Without a birth month (or day, in the month of the date) the birthday counts as not yet reached
+    had_birthday = ((month < on.month) | ((month == on.month) & (day <= on.day))).fillna(False)
+    return (on.year - year - 1 + had_birthday.astype(int)).rename("age")
+
+def split_entries(df, column):
+    """
+    One row per entry of a comma-joined column, the entry in "entry"; rows
+    without entries are dropped and an entry repeated within a row counts once
+    """
+    matrix = MembershipMatrix.from_codes(np.arange(len(df)), df[column])
+    entries = pd.Categorical.from_codes(matrix.columns, categories=matrix.vocabulary)
+    return df.iloc[matrix.rows].assign(entry=entries)
+
+def by_entry(df, column, values=()):
+    """Rows with a value in column, keyed by it (or by each entry of a list column) in "entry" """
+    df = df[[column, *[value for value in values if value != column]]]
+    if column in LIST_COLUMNS:
+        return split_entries(df, column)
+    df = df.loc[df[column].notna()]
+    return df.assign(entry=df[column])
+
+def _per_entry(result):
+    """Give a per-entry result a plain (text) index"""
+    result.index = result.index.astype(str)
+    return result
+
+def entries(df, column):
+    """Sorted distinct values (or list entries) of a column"""
+    return sorted(by_entry(df, column)["entry"].astype(str).unique())
+
+def committees(df):
+    """Sorted committee codes of the memberships column"""
+    return [code for code in entries(df, "memberships") if is_committee(code)]
+
+def gender_share(df, column, gender="FEMALE"):
+    """Percentage of MEPs of a gender per value of column (filter_women_perc_df, filter_men_perc)"""
+    rows = by_entry(df, column, ["gender"])
+    counts = (rows["gender"] == gender).groupby(rows["entry"], observed=True).agg(["sum", "size"])
+    return _per_entry(counts["sum"] / counts["size"] * 100)
+
+def median_age(df, column, on=REFERENCE_DATE):
+    """Median age per value of column (get_median_age)"""
+    rows = by_entry(df.assign(age=ages(df, on)), column, ["age"])
+    return _per_entry(rows.groupby("entry", observed=True)["age"].median().astype(float))
+
+def returned(current_df, former_df, column):
+    """
+    Per value of column: current MEPs who also sat in the former term, as a
+    percentage of its current and of its former MEPs (filter_returned)
+    """
+    current = by_entry(current_df, column, ["identifier"])
+    returning = current["identifier"].isin(former_df["identifier"])
+    counts = _per_entry(returning.groupby(current["entry"], observed=True).agg(["sum", "size"]))
+    former_counts = _per_entry(by_entry(former_df, column).groupby("entry", observed=True).size())
+    result = pd.DataFrame({"returned_meps": counts["sum"], "current_meps": counts["size"]})
+    result["current_return_ratio"] = result["returned_meps"] / result["current_meps"] * 100
+    result["former_return_ratio"] = result["returned_meps"] / former_counts.reindex(result.index) * 100
+    return result
+
+def top_university(df, column):
+    """Most frequent university per value of column, with its share of the MEPs with data (get_top_uni_pc)"""
+    rows = by_entry(df, "educated_at", [column])
+    counts = rows.groupby([column, "entry"], observed=True).size().reset_index(name="meps")
+    counts = counts.sort_values([column, "meps", "entry"], ascending=[True, False, True])
+    top = _per_entry(counts.drop_duplicates(column).set_index(column))
+    with_data = _per_entry(df["educated_at"].notna().groupby(df[column], observed=True).agg(["sum", "size"]))
+    result = pd.DataFrame({
+        "university": top["entry"].astype(str),
+        "percentage": (top["meps"] / with_data["sum"] * 100).round(2),
+        "meps": top["meps"],
+        "meps_with_data": with_data["sum"],
+        "total_meps": with_data["size"],
+    })
+    return result.sort_values("percentage", ascending=False, kind="stable")
+
+def education_na(df, column, by):
+    """MEPs with and without a value in column per value of by, sorted by the missing share (check_education_na)"""
+    known = df[column].notna().groupby(df[by], observed=True).agg(["sum", "size"])
+    result = pd.DataFrame({"notna": known["sum"], "na": known["size"] - known["sum"]})
+    result["na_ratio"] = result["na"] / known["size"]
+    return _per_entry(result).sort_values("na_ratio", kind="stable").rename_axis(by).reset_index()
+
+def _sorted(series, ascending=True):
+    """Sort by value; ties in entry order"""
+    return series.sort_index().sort_values(ascending=ascending, kind="stable")
+
+def _extremes(series, name, count=EXTREMES):
+    """The lowest and highest values of a per-entry result"""
+    series = _sorted(series)
+    return pd.concat([series.head(count), series.tail(count)]).rename_axis(name).reset_index()
+
+def compare_terms(current, former, name, column):
+    """
+    A per-entry result of both terms side by side, current order first, with
+    the change (compare_current_former)
+    """
+    current = _sorted(current)
+    index = current.index.append(_sorted(former).index.difference(current.index, sort=False))
+    result = pd.DataFrame({f"{name}_current": current.reindex(index), f"{name}_former": former.reindex(index)})
+    result["change"] = result[f"{name}_current"] - result[f"{name}_former"]
+    return result.rename_axis(column).reset_index()
+
+def _eurostat_value(file_path):
+    """The 2023 value of a one-row Eurostat TSV extract (without its flags)"""
+    table = pd.read_csv(file_path, sep="\t")
+    return table["2023 "].astype(str).str.split(" ").str[0].iloc[0]
+
+def _age_buckets(ages):
+    return pd.cut(ages, bins=AGE_BINS, labels=AGE_LABELS)
+
+def population_age_buckets(file_path):
+    """EU population per age bucket from Eurostat's population by age extract"""
+    population = pd.read_csv(file_path, sep="\t")
+    population = population.rename(columns={"freq,unit,age,sex,geo\\TIME_PERIOD": "age", "2023 ": "count"})
+    population = population.loc[~population["age"].str.contains("TOTAL|Y_OPEN")]
+    population["count"] = population["count"].str.slice(stop=-4).astype(int)
+    age = population["age"].str.split(",").str.get(2).str.slice(1)
+    population["age"] = age.replace({"_LT1": "0"}).astype(int)
+    counts = population.groupby(_age_buckets(population["age"]), observed=False)["count"].sum()
+    table = counts.rename_axis("age_buckets").reset_index()
+    table["pc_population"] = table["count"] / table["count"].sum()
+    return table
+
+def analyse_tables(meps_df, analysis_dir=ANALYSIS_DIR):
+    """The tables analyse.ipynb writes, by file name"""
+    tables = {}
+    age = ages(meps_df, REFERENCE_DATE)
+    committee_codes = committees(meps_df)
+
+    # Gender
+    gender_counts = meps_df["gender"].value_counts()
+    gender_counts = gender_counts.loc[gender_counts > 0].rename_axis("gender").reset_index()
+    gender_counts["percentage"] = gender_counts["count"] / gender_counts["count"].sum()
+    tables["scrolly_gender_meps.csv"] = gender_counts
+    population = pd.Series({
+        "FEMALE": int(_eurostat_value(path.join(analysis_dir, "gender_female.tsv"))),
+        "MALE": int(_eurostat_value(path.join(analysis_dir, "gender_male.tsv"))),
+    })
+    population["TOTAL"] = population.sum()
+    tables["scrolly_gender_population.csv"] = pd.DataFrame({
+        "count": population, "percentage": population / population["TOTAL"]})
+    women = gender_share(meps_df, "country")
+    tables["gender_country.csv"] = _sorted(women).rename("women_percentage").rename_axis("country").reset_index()
+    women = gender_share(meps_df, "memberships").reindex(committee_codes)
+    gender_committees = _extremes(women.rename("women_percentage"), "committee")
+    gender_committees["men_percentage"] = 100 - gender_committees["women_percentage"]
+    tables["gender_committees.csv"] = gender_committees
+
+    # Origin (needs born_region from geocoding.py)
+    if "born_region" not in meps_df.columns or meps_df["born_region"].isna().all():
+        print("  Skipped non_native.csv: the output has no born_region (run geocoding.py first)")
+    else:
+        regions = pd.crosstab(meps_df["country"], meps_df["born_region"]).reindex(
+            columns=["native", "eu", "other"], fill_value=0)
+        total = regions.sum(axis=1)
+        non_native = ((regions["eu"] / total).round(2) + (regions["other"] / total).round(2)) * 100
+        tables["non_native.csv"] = _sorted(non_native, ascending=False).rename(
+            "non_native_pc").rename_axis("country").reset_index()
+
+    # Education
+    degrees = meps_df["highest_degree"].value_counts().reindex(DEGREES)
+    tables["degree_count.csv"] = degrees.rename_axis("highest_degree").reset_index()
+    tables["degree_count_df.csv"] = tables["degree_count.csv"]
+    university = degrees.index.isin(UNIVERSITY_DEGREES)
+    degrees = pd.concat([degrees.loc[~university], pd.Series({"university": degrees.loc[university].sum()})])
+    tables["scrolly_degree_meps.csv"] = pd.DataFrame({"degree": degrees.index, "count": degrees.to_numpy()})
+    tertiary = float(_eurostat_value(path.join(analysis_dir, "education.tsv")))
+    tables["scrolly_degree_population.csv"] = pd.DataFrame({
+        "tertiary_education": ["yes", "no"], "percentage": [tertiary, 100 - tertiary]})
+    universities = by_entry(meps_df, "educated_at").groupby("entry", observed=True).size()
+    universities = _per_entry(universities).drop(EXCLUDED_UNIVERSITIES, errors="ignore")
+    tables["educated_at.csv"] = _sorted(universities, ascending=False).head(TOP_ENTRIES).rename(
+        "count").rename_axis("university").reset_index()
+
+    # Occupation
+    occupations = _per_entry(by_entry(meps_df, "occupation").groupby("entry", observed=True).size())
+    percentage = (occupations / meps_df["occupation"].notna().sum()).round(3) * 100
+    percentage = _sorted(percentage, ascending=False).drop(EXCLUDED_OCCUPATIONS, errors="ignore")
+    tables["occupation_count.csv"] = percentage.head(TOP_ENTRIES).rename(
+        "percentage").rename_axis("occupation").reset_index()
+
+    # Age
+    buckets = _age_buckets(age).value_counts(sort=False).rename_axis("age_buckets").reset_index()
+    buckets["pc_meps"] = buckets["count"] / buckets["count"].sum()
+    tables["scrolly_age_meps.csv"] = buckets
+    population_ages = population_age_buckets(path.join(analysis_dir, "age.tsv"))
+    tables["scrolly_age_population.csv"] = population_ages
+    comparison = population_ages[["age_buckets", "pc_population"]].merge(buckets[["age_buckets", "pc_meps"]])
+    comparison[["pc_population", "pc_meps"]] *= 100
+    tables["age_bucket_comparison.csv"] = comparison
+    committee_ages = median_age(meps_df, "memberships").reindex(committee_codes)
+    tables["age_committees.csv"] = _extremes(committee_ages.rename("median_age"), "committee")
+    country_ages = median_age(meps_df, "country").rename("mep_median").rename_axis("country").reset_index()
+    country_ages["country"] = country_ages["country"].map(COUNTRY_SLUGS)
+    reference = pd.read_csv(path.join(analysis_dir, "ages.csv")).rename(
+        columns={"slug": "country", " years": "country_median"})
+    difference = country_ages.merge(reference[["country", "country_median"]], on="country", how="left")
+    difference["country_median"] = difference["country_median"].round(0).astype(int)
+    difference["difference"] = difference["mep_median"] - difference["country_median"]
+    difference = difference[["mep_median", "country", "country_median", "difference"]]
+    tables["median_age_difference.csv"] = difference.sort_values("country_median", ascending=False, kind="stable")
+    return tables
+
+def followup_tables(current_df, former_df, analysis_dir=ANALYSIS_DIR):
+    """The tables followup.ipynb writes (current vs former term), by file name"""
+    tables = {}
+    countries = entries(current_df, "country")
+    committee_codes = committees(current_df)
+    selections = {"group": FOLLOWUP_GROUPS, "country": countries, "committee": committee_codes}
+    columns = {"group": "group", "country": "country", "committee": "memberships"}
+
+    # Returning MEPs
+    for name, column in columns.items():
+        result = returned(current_df, former_df, column).reindex(selections[name])
+        if name != "group":
+            result = result.sort_values("current_return_ratio", kind="stable")
+        tables[f"followup_{name}_returned.csv"] = result.rename_axis(column).reset_index()
+
+    # Gender
+    counts = {}
+    for term, df in [("current", current_df), ("former", former_df)]:
+        count = df["gender"].value_counts()
+        count = count.loc[count > 0]
+        counts[f"{term}_count"] = count
+        counts[f"{term}_pc"] = count / count.sum()
+    gender = pd.DataFrame(counts).reindex(counts["current_count"].index.union(
+        counts["former_count"].index, sort=False))
+    gender["change_count"] = gender["former_count"] - gender["current_count"]
+    gender["change_pc"] = gender["current_pc"] - gender["former_pc"]
+    tables["followup_gender.csv"] = gender.rename_axis("gender").reset_index()
+    shares = (gender["current_pc"] * 100).round(1)
+    gender_time = pd.read_csv(path.join(analysis_dir, "gender_time.csv"))
+    gender_time["Share_nonbinary"] = 0
+    opening = pd.DataFrame([{
+        "Opening_Session": int(TERMS[CURRENT_TERM]["years"][:4]),
+        "Share_men": shares.get("MALE", 0.0),
+        "Share_women": shares.get("FEMALE", 0.0),
+        "Share_nonbinary": shares.get("NKN", 0.0),
+    }])
+    tables["followup_gender_time.csv"] = pd.concat([gender_time, opening], ignore_index=True).astype(float)
+    for name, column in columns.items():
+        men = [gender_share(df, column, "MALE").reindex(selections[name]).dropna() for df in (current_df, former_df)]
+        tables[f"followup_{name}_men.csv"] = compare_terms(*men, "men_percentage", name)
+
+    # Age
+    for name, column in columns.items():
+        median_ages = [median_age(df, column, FOLLOWUP_REFERENCE_DATE).reindex(selections[name]).dropna()
+                       for df in (current_df, former_df)]
+        table = compare_terms(*median_ages, "median_age", name)
+        table["change_net"] = table["change"] + TERM_YEARS
+        tables[f"followup_{name}_age.csv"] = table
+    decade = ages(current_df, FOLLOWUP_REFERENCE_DATE) // 10 * 10
+    counts = pd.crosstab(decade, current_df["group"]).reindex(index=DECADES, columns=FOLLOWUP_GROUPS)
+    counts = counts.where(counts > 0).astype("Int64")
+    tables["followup_group_age_buckets.csv"] = counts.rename_axis(index="decade", columns=None).reset_index()
+    return tables
+
+def generate(current_df=None, former_df=None, analysis_dir=ANALYSIS_DIR):
+    """
+    Write every analysis CSV; by default from the stored output and
+    output_former (the follow-up tables are skipped without a former term).
+    Returns the paths written.
+    """
+    if current_df is None:
+        current_df = storage.load("output")
+    if former_df is None and storage.exists("output_former"):
+        former_df = storage.load("output_former")
+    tables = analyse_tables(current_df, analysis_dir)
+    if former_df is not None:
+        tables.update(followup_tables(current_df, former_df, analysis_dir))
+    else:
+        print("  Skipped followup_*.csv: there is no output_former to compare with")
+    paths = []
+    for name, table in tables.items():
+        file_path = path.join(analysis_dir, name)
+        table.to_csv(file_path, sep=";" if name in SEMICOLON_FILES else ",", index=False)
+        paths.append(file_path)
+    return paths
+
+def main():
+    """Regenerate the analysis CSVs from the stored outputs"""
+    print("Generating analysis tables...")
+    paths = generate()
+    print(f"✓ Wrote {len(paths)} tables to {path.normpath(ANALYSIS_DIR)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark: Notebook Filter Loops vs Vectorized Analytics
+
+Runs the six per-entry functions of the analysis notebooks
+(filter_women_perc_df, filter_men_perc, filter_returned, get_median_age,
+get_top_uni_pc and check_education_na) and their vectorized counterparts in
+analytics.py on a synthetic output dataset (see bench_storage.py, with an
+educated_at column added) and a former term sharing 60% of its MEPs. The
+notebook versions get the frame as the notebooks read it (read_csv with
+inferred dtypes), analytics.py the typed one. Checks that both give the same
+results.
+
+filter_returned looks identifiers up in a set instead of the notebook's list:
+with a list it would take hours at 100k rows.
+
+Usage:
+    python benchmarks/bench_analytics.py [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import io
+import sys
+import time
+from os import path
+from statistics import median
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import schema
+from bench_storage import best_time, synthetic_output
+
+UNIVERSITIES = ["Sciences Po", "Bocconi", "KU Leuven", "Sorbonne", "Charles University", "Jagiellonian",
+                "Complutense", "Sapienza", "ELTE", "Tartu", "Uppsala", "Aarhus", "Trinity College", "Coimbra",
+                "Vilnius", "Ljubljana", "Zagreb", "Bucharest", "Sofia", "Athens", "Helsinki", "Leiden",
+                "Heidelberg", "Vienna", "Cyprus", "Malta", "Luxembourg", "Riga", "Bratislava", "Ghent"]
+
+# --- The notebooks' functions (analyse.ipynb, followup.ipynb) ---
+
+def calculate_age(born_year, born_month, born_day):
+    today = analytics.REFERENCE_DATE
+    if born_month < today.month:
+        return today.year - born_year
+    elif born_month == today.month:
+        if born_day <= today.day:
+            return today.year - born_year
+        return today.year - born_year - 1
+    return today.year - born_year - 1
+
+def filter_women_perc_df(column, column_entries, meps_df):
+    gender_dict = {}
+    non_na_df = meps_df.loc[meps_df[column].notna()]
+    for column_entry in column_entries:
+        filter_df = non_na_df.loc[non_na_df[column].str.contains(column_entry)]
+        female_count = len(filter_df.loc[filter_df["gender"] == "FEMALE"].index)
+        if len(filter_df.index > 0):
+            female_percentage = female_count / len(filter_df.index) * 100
+            gender_dict[column_entry] = female_percentage
+    filter_percentage_df = pd.DataFrame.from_dict([gender_dict]).transpose()
+    filter_percentage_df = filter_percentage_df.rename(columns = {0: "women_percentage"})
+    return filter_percentage_df.sort_values("women_percentage")
+
+def filter_men_perc(column, column_entries, df):
+    gender_dict = {}
+    non_na_df = df.loc[df[column].notna()]
+    for column_entry in column_entries:
+        filter_df = non_na_df.loc[non_na_df[column].str.contains(column_entry)]
+        men_count = len(filter_df.loc[filter_df["gender"] == "MALE"].index)
+        if len(filter_df.index > 0):
+            men_percentage = men_count / len(filter_df.index) * 100
+            gender_dict[column_entry] = men_percentage
+    filter_percentage_df = pd.DataFrame.from_dict([gender_dict]).transpose()
+    filter_percentage_df = filter_percentage_df.reset_index()
+    filter_percentage_df = filter_percentage_df.rename(columns = {"index": column, 0: "men_percentage"})
+    return filter_percentage_df.sort_values("men_percentage")
+
+def filter_returned(column, column_entries, current_df, former_df):
+    return_dict = {}
+    for column_entry in column_entries:
+        return_counter = 0
+        filter_current_df = current_df.loc[current_df[column].notna()]
+        filter_current_df = filter_current_df.loc[filter_current_df[column].str.contains(column_entry)]
+        filter_former_df = former_df.loc[former_df[column].notna()]
+        filter_former_df = filter_former_df.loc[filter_former_df[column].str.contains(column_entry)]
+        current_identifiers = filter_current_df["identifier"].tolist()
+        former_identifiers = set(former_df["identifier"].tolist())
+        former_filter_identifiers = filter_former_df["identifier"].tolist()
+        for identifier in current_identifiers:
+            if identifier in former_identifiers:
+                return_counter += 1
+        returned_current_ratio = return_counter / len(current_identifiers) * 100
+        try:
+            returned_former_ratio = return_counter / len(former_filter_identifiers) * 100
+        except:
+            returned_former_ratio = "nan"
+        return_dict[column_entry] = [return_counter, len(current_identifiers),
+                                     returned_current_ratio, returned_former_ratio]
+    return_df = pd.DataFrame.from_dict(return_dict, orient = "index")
+    return_df = return_df.reset_index()
+    return_df = return_df.rename(columns = {"index": column, 0: "returned_meps", 1: "current_meps",
+                                            2: "current_return_ratio", 3: "former_return_ratio"})
+    return return_df.sort_values("current_return_ratio")
+
+def get_median_age(column, filter_list, meps_df):
+    df = meps_df.loc[meps_df[column].notna()]
+    df = df.loc[meps_df["born_year"] != 0]
+    df = df.loc[meps_df["born_year"].notna()]
+    median_age_dict = {}
+    for filter_entry in filter_list:
+        filter_df = df.loc[df[column].str.contains(filter_entry)]
+        ages = filter_df.apply(lambda x: calculate_age(x["born_year"], x["born_month"], x["born_day"]), axis = 1)
+        ages = sorted(ages)
+        median_age_dict[filter_entry] = median(ages)
+    median_age_df = pd.DataFrame.from_dict(median_age_dict, orient = "index")
+    median_age_df = median_age_df.reset_index().rename(columns = {"index": "org", 0: "median_age"})
+    median_age_df = median_age_df.sort_values("median_age")
+    return median_age_df
+
+def get_top_uni_pc(column, entry, meps_df, educated_at_list):
+    filter_df = meps_df.loc[meps_df[column] == entry]
+    educated_at_dict = {}
+    for educated_at in educated_at_list:
+        educated_at_dict[educated_at] = 0
+    notna_df = filter_df.loc[filter_df["educated_at"].notna()]["educated_at"]
+    for entry in notna_df.tolist():
+        for educated_at in educated_at_list:
+            if educated_at in entry:
+                educated_at_dict[educated_at] += 1
+    educated_at_df = pd.DataFrame.from_dict(educated_at_dict, orient = "index")
+    educated_at_df = educated_at_df.reset_index().rename(columns = {"index": "university", 0: "count"})
+    educated_at_df = educated_at_df.sort_values(by = "count", ascending = False)
+    mep_count = len(notna_df.index)
+    total_mep_count = len(filter_df.index)
+    top_uni = educated_at_df["university"].values[0]
+    top_uni_count = educated_at_df["count"].values[0]
+    top_uni_pc = round(top_uni_count / mep_count * 100, 2)
+    return top_uni, top_uni_pc, top_uni_count, mep_count, total_mep_count
+
+def check_education_na(meps_df, column, group):
+    check_notna_df = meps_df.loc[meps_df[column].notna()]
+    check_notna_df = pd.DataFrame(check_notna_df.groupby(group).size()).reset_index().rename(columns = {0: "notna"})
+    check_na_df = meps_df.loc[~meps_df[column].notna()]
+    check_na_df = pd.DataFrame(check_na_df.groupby(group).size()).reset_index().rename(columns = {0: "na"})
+    check_notna_df = check_notna_df.merge(check_na_df, on = group)
+    check_na_df["na_ratio"] = check_na_df["na"] / (check_notna_df["notna"] + check_notna_df["na"])
+    check_na_df = check_na_df.sort_values("na_ratio")
+    return check_na_df
+
+def top_universities(column, meps_df):
+    """The notebooks' per-country/per-group loop around get_top_uni_pc"""
+    educated_at_list = list(set(university for entry in meps_df["educated_at"].dropna()
+                                for university in entry.split(",")))
+    top = {entry: get_top_uni_pc(column, entry, meps_df, educated_at_list)
+           for entry in set(meps_df[column].tolist())}
+    top_df = pd.DataFrame.from_dict(top, orient = "index")
+    top_df = top_df.rename(columns = {0: "university", 1: "percentage", 2: "meps", 3: "meps_with_data",
+                                      4: "total_meps"})
+    return top_df.sort_values("percentage", ascending = False)
+
+# --- Benchmark ---
+
+def synthetic_terms(rows):
+    """Current and former term (60% of the current MEPs) with educated_at"""
+    rng = np.random.default_rng(2)
+    df = synthetic_output(rows)
+    first, second = rng.choice(UNIVERSITIES, rows), rng.choice(UNIVERSITIES, rows)
+    educated_at = np.where(rng.random(rows) < 0.5, first, np.char.add(np.char.add(first, ","), second))
+    df["educated_at"] = np.where(rng.random(rows) < 0.3, None, educated_at)
+    return df, df.sample(frac=0.6, random_state=1)
+
+def as_read(df):
+    """df as read_csv infers it from output.csv"""
+    text = io.StringIO()
+    df.to_csv(text, sep=";", index=False)
+    return pd.read_csv(io.StringIO(text.getvalue()), sep=";")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    current_df, former_df = synthetic_terms(args.rows)
+    notebook_current, notebook_former = as_read(current_df), as_read(former_df)
+    typed_current, typed_former = schema.enforce(current_df), schema.enforce(former_df)
+    countries = sorted(set(notebook_current["country"]))
+    groups = sorted(set(notebook_current["group"]))
+    codes = analytics.entries(typed_current, "memberships")
+
+    cases = {
+        "filter_women_perc_df": (
+            lambda: filter_women_perc_df("country", countries, notebook_current)["women_percentage"],
+            lambda: analytics.gender_share(typed_current, "country")),
+        "filter_men_perc": (
+            lambda: filter_men_perc("group", groups, notebook_current).set_index("group")["men_percentage"],
+            lambda: analytics.gender_share(typed_current, "group", "MALE")),
+        "filter_returned": (
+            lambda: filter_returned("memberships", codes, notebook_current, notebook_former).set_index(
+                "memberships").astype(float),
+            lambda: analytics.returned(typed_current, typed_former, "memberships")),
+        "get_median_age": (
+            lambda: get_median_age("memberships", codes, notebook_current).set_index("org")["median_age"],
+            lambda: analytics.median_age(typed_current, "memberships")),
+        "get_top_uni_pc": (
+            lambda: top_universities("country", notebook_current),
+            lambda: analytics.top_university(typed_current, "country")),
+        "check_education_na": (
+            lambda: check_education_na(notebook_current, "highest_degree", "group").set_index("group"),
+            lambda: analytics.education_na(typed_current, "highest_degree", "group").set_index("group")),
+    }
+
+    print(f"Benchmarking {args.rows} rows ({len(countries)} countries, {len(groups)} groups, "
+          f"{len(codes)} committee and delegation codes)")
+    total_loop = total_vectorized = 0
+    for name, (notebook, vectorized) in cases.items():
+        start = time.perf_counter()
+        expected = notebook()
+        loop_time = time.perf_counter() - start
+        vectorized_time = best_time(vectorized, args.repeat)
+        result = vectorized()
+        total_loop += loop_time
+        total_vectorized += vectorized_time
+        print(f"  {name:<21} notebook {loop_time * 1000:9.1f} ms   analytics {vectorized_time * 1000:7.1f} ms   "
+              f"({loop_time / vectorized_time:5.0f}x)")
+        if isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(expected.sort_index(), result.sort_index(), check_names=False,
+                                           check_dtype=False, check_index_type=False)
+        else:
+            # Among equally frequent universities the notebook picks an arbitrary one
+            columns = [column for column in expected.columns if column in result.columns and column != "university"]
+            pd.testing.assert_frame_equal(expected.sort_index()[columns], result.sort_index()[columns],
+                                          check_dtype=False, check_index_type=False, check_names=False)
+    print(f"  {'total':<21} notebook {total_loop * 1000:9.1f} ms   analytics {total_vectorized * 1000:7.1f} ms   "
+          f"({total_loop / total_vectorized:5.0f}x)")
+    print("✓ Identical results")
+
+if __name__ == "__main__":
+    main()
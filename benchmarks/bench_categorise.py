@@ -0,0 +1,95 @@
+"""
+Benchmark: Categorising Wikidata Degrees and Occupations
+
+Builds synthetic `degrees` and `occupation` columns shaped like the grouped
+Wikidata rows (comma-joined labels, many MEPs sharing the same entries,
+labels with and without a matching keyword, and empty entries) and compares
+the previous row-wise categorise(), applied to every row with the keyword
+loops, against getwiki.categorise_column. The results are checked to be
+identical.
+
+Usage:
+    python benchmarks/bench_categorise.py [--rows 87000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import getwiki
+
+UNMATCHED_LABELS = ["Magister", "licentiate", "Abitur", "civil servant", "historian", "trade unionist",
+                    "activist", "economist", "writer", "Staatsexamen"]
+
+# --- The previous categorisation (getwiki.py) ---
+
+def categorise(entry, category_dict):
+    """Categorize text entries based on keyword matching"""
+    if not entry:
+        return np.nan
+    new_entry = []
+    entry_list = entry.split(",")
+    for entry_part in entry_list:
+        entry_part = entry_part.lower().strip()
+        found = False
+        for category in category_dict.keys():
+            for keyword in category_dict[category]:
+                if keyword in entry_part:
+                    found = True
+                    if category not in new_entry:
+                        new_entry.append(category)
+        if not found:
+            new_entry.append(entry_part)
+    return ",".join(new_entry)
+
+# --- Benchmark ---
+
+def synthetic_labels(category_dict, seed=0):
+    """Label texts as on Wikidata: keywords inside longer labels, and labels without one"""
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in category_dict.values() for keyword in keywords]
+    labels = [f"{rng.choice(['', 'Bachelor of ', 'Senior ', 'State '])}{keyword.strip()}"
+              f"{rng.choice(['', ' of Science', ' (retired)', ' in Law'])}" for keyword in keywords]
+    return labels + UNMATCHED_LABELS + [label.upper() for label in UNMATCHED_LABELS[:3]]
+
+def synthetic_column(category_dict, rows, distinct=1500, seed=0):
+    """A column of comma-joined labels in which `distinct` entries repeat"""
+    rng = random.Random(seed)
+    labels = synthetic_labels(category_dict, seed)
+    entries = [""] + [",".join(rng.choices(labels, k=rng.randint(1, 5))) for _ in range(distinct)]
+    return pd.Series(rng.choices(entries, k=rows), dtype=object)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=87000)
+    args = parser.parse_args()
+
+    for name, category_dict, classifier in [
+        ("degrees", getwiki.degree_dict, getwiki.degree_classifier),
+        ("occupation", getwiki.occupation_dict, getwiki.occupation_classifier),
+    ]:
+        column = synthetic_column(category_dict, args.rows)
+
+        start = time.perf_counter()
+        expected = column.apply(lambda entry: categorise(entry, category_dict))
+        row_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = getwiki.categorise_column(column, classifier)
+        column_time = time.perf_counter() - start
+
+        pd.testing.assert_series_equal(result, expected.astype(object))
+        print(f"  {name:10s} {len(column)} rows   apply(categorise) {row_time * 1e3:7.1f} ms   "
+              f"categorise_column {column_time * 1e3:6.1f} ms   ({row_time / column_time:.0f}x)")
+    print("✓ Identical categories")
+
+if __name__ == "__main__":
+    main()
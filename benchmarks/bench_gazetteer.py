@@ -0,0 +1,137 @@
+"""
+Benchmark: GeoNames Table Scans vs the Gazetteer Index
+
+Builds a synthetic GeoNames cities export (made-up place names, each with
+a few alternate names, and some names shared by several places of
+different population) and looks birthplaces up with the previous
+geocoding.get_coordinates_from_geonames, which compares every Name and
+scans every Alternate Names entry with str.contains per birthplace, and
+with gazetteer.py, which builds an SQLite index once and then looks each
+name up in it. Reports the build, open and lookup times and checks that
+both find the same coordinates for the birthplaces found by name. (The
+previous function matched alternate names as substrings, so "Ro" could
+find "Roma"; the index only matches whole names.)
+
+Usage:
+    python benchmarks/bench_gazetteer.py [--places 200000] [--lookups 300]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import gazetteer
+
+SYLLABLES = ["ba", "ce", "dor", "fa", "gra", "hei", "jo", "ka", "li", "mo", "nu", "po", "ra", "sa", "to", "vi",
+             "zu", "berg", "burg", "stad", "ville", "ia", "ovo", "ec", "lund", "heim", "ona", "ese"]
+
+# --- The previous lookup (geocoding.py) ---
+
+def get_coordinates_from_geonames(place_raw, geonames_df, alt_geonames_df):
+    """Get coordinates from GeoNames database"""
+    place = str(place_raw).lower()
+    if place != "nan":
+        for sign in ["(", "/", "-", ","]:
+            place = place.split(sign)[0].strip()
+        filter_df = geonames_df.loc[geonames_df["Name"] == place]
+        if len(filter_df.index) > 0:
+            return filter_df["Coordinates"].tolist()[0]
+        elif geonames_df["Alternate Names"].str.contains(place, na=False).any():
+            alt_coordinates_df = alt_geonames_df.loc[alt_geonames_df["Alternate Names"].str.contains(place)]
+            if len(alt_coordinates_df.index) > 0:
+                return alt_coordinates_df["Coordinates"].tolist()[0]
+    return np.nan
+
+def load_geonames(geonames_path):
+    """The GeoNames table as geocoding.main prepared it"""
+    geonames_df = pd.read_csv(geonames_path, sep=";")
+    geonames_df["Name"] = geonames_df["Name"].str.lower()
+    geonames_df["Alternate Names"] = geonames_df["Alternate Names"].str.lower()
+    geonames_df = geonames_df.sort_values("Population", ascending=False)
+    return geonames_df, geonames_df.loc[geonames_df["Alternate Names"].notna()]
+
+# --- Benchmark ---
+
+def synthetic_geonames(places, seed=0):
+    """GeoNames export of `places` places, a third of the names used twice"""
+    rng = np.random.default_rng(seed)
+    names = ["".join(rng.choice(SYLLABLES, rng.integers(2, 5))).capitalize() for _ in range(places * 2 // 3)]
+    names = rng.choice(np.array(names, dtype=object), places)
+    alternates = [",".join(f"{name} {suffix}" for suffix in rng.choice(["am see", "nord", "vechi", "mare"],
+                                                                       rng.integers(0, 3), replace=False))
+                  for name in names]
+    latitudes, longitudes = rng.uniform(35, 70, places).round(5), rng.uniform(-10, 30, places).round(5)
+    return pd.DataFrame({
+        "Geoname ID": np.arange(places), "Name": names, "ASCII Name": names,
+        "Alternate Names": [value or None for value in alternates],
+        "Population": rng.integers(1000, 2000000, places),
+        "Coordinates": [f"{lat}, {lon}" for lat, lon in zip(latitudes, longitudes)],
+    })
+
+def birthplaces(geonames_df, count, seed=0):
+    """
+    Birthplaces written as in the Parliament's profiles: place names, some
+    with a region or country added, and a third that are alternate names
+    """
+    rng = np.random.default_rng(seed)
+    places = list(rng.choice(geonames_df["Name"].to_numpy(), count - count // 3))
+    extras = rng.choice(["", " (Region)", ", Country", "/Other"], len(places))
+    alternates = geonames_df["Alternate Names"].dropna().str.split(",").explode().to_numpy()
+    return ([place + extra for place, extra in zip(places, extras)]
+            + list(rng.choice(alternates, count // 3)) + ["Nowhereville"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--places", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        geonames_path, index_path = path.join(tmp, "geonames.csv"), path.join(tmp, "geonames.sqlite")
+        synthetic_df = synthetic_geonames(args.places)
+        synthetic_df.to_csv(geonames_path, sep=";", index=False)
+        places = birthplaces(synthetic_df, args.lookups)
+        print(f"Looking up {len(places)} birthplaces among {args.places} GeoNames places")
+
+        start = time.perf_counter()
+        geonames_df, alt_geonames_df = load_geonames(geonames_path)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = [get_coordinates_from_geonames(place, geonames_df, alt_geonames_df) for place in places]
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gazetteer.build_index(geonames_path, index_path)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index = gazetteer.open_index(geonames_path, index_path)
+        open_time = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [index.coordinates(place) for place in places]
+        lookup_time = time.perf_counter() - start
+        index.close()
+
+    print(f"  table scans   read {load_time * 1000:8.1f} ms   lookups {scan_time * 1000:9.1f} ms "
+          f"({scan_time / len(places) * 1e6:8.0f} µs each)")
+    print(f"  gazetteer     open {open_time * 1000:8.1f} ms   lookups {lookup_time * 1000:9.1f} ms "
+          f"({lookup_time / len(places) * 1e6:8.0f} µs each, {scan_time / lookup_time:.0f}x)")
+    print(f"  (index built once in {build_time * 1000:.0f} ms)")
+
+    as_pair = lambda value: None if pd.isna(value) else tuple(float(part) for part in value.split(", "))
+    expected = [as_pair(value) for value in expected]
+    by_name = len(places) - args.lookups // 3 - 1
+    assert expected[:by_name] == found[:by_name] and expected[-1] is found[-1] is None
+    same = sum(old == new for old, new in zip(expected[by_name:-1], found[by_name:-1]))
+    print(f"✓ Same coordinates for all {by_name} names, and {same} of {args.lookups // 3} alternate names "
+          f"(the previous lookup found the others as part of a longer alternate name)")
+
+if __name__ == "__main__":
+    main()
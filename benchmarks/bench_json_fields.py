@@ -0,0 +1,81 @@
+"""
+Benchmark: Per-Response JSON Parsing
+
+Compares the per-call cost of reading one or two fields from a JSON response
+via pd.json_normalize (the old code path) against json_fields, for the
+documents handled by querying.query_gender and
+geocoding.get_classification_from_coordinates.
+
+Usage:
+    python benchmarks/bench_json_fields.py [--calls 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import pandas as pd
+
+from json_fields import first_value, get_path, has_path
+
+PERSON_DOCUMENT = json.dumps({"@graph": [
+    {"@id": "person/99945", "@type": "Person", "label": "Lena Düpont",
+     "hasGender": "http://publications.europa.eu/resource/authority/human-sex/FEMALE",
+     "bday": "1986-04-30", "citizenship": "http://publications.europa.eu/resource/authority/country/DEU"},
+    {"@id": "person/99945/membership/1", "@type": "Membership", "role": "MEMBER",
+     "organization": "org/LIBE", "memberDuring": {"startDate": "2019-07-02"}},
+    {"@id": "person/99945/membership/2", "@type": "Membership", "role": "SUBSTITUTE",
+     "organization": "org/AGRI", "memberDuring": {"startDate": "2019-07-02"}},
+]}).encode("utf-8")
+
+GEOCODE_DOCUMENT = json.dumps({"results": [
+    {"confidence": 9, "formatted": "Dortmund, Germany",
+     "components": {"ISO_3166-1_alpha-2": "DE", "city": "Dortmund", "country": "Germany"},
+     "annotations": {"DMS": {"lat": "51° 30' 49.99\" N", "lng": "7° 27' 57.00\" E"}},
+     "geometry": {"lat": 51.5136, "lng": 7.4653}},
+    {"confidence": 7, "formatted": "Dortmund, North Rhine-Westphalia, Germany",
+     "components": {"ISO_3166-1_alpha-2": "DE", "state": "North Rhine-Westphalia"},
+     "annotations": {"DMS": {"lat": "51° 30' 0.00\" N", "lng": "7° 28' 0.00\" E"}},
+     "geometry": {"lat": 51.5, "lng": 7.4667}},
+]}).encode("utf-8")
+
+def gender_normalize():
+    mep_df = pd.json_normalize(json.loads(PERSON_DOCUMENT)["@graph"])
+    return str(mep_df["hasGender"].dropna().values[0]).split("/")[-1]
+
+def gender_fields():
+    return str(first_value(json.loads(PERSON_DOCUMENT)["@graph"], "hasGender")).split("/")[-1]
+
+def country_normalize():
+    response_df = pd.json_normalize(json.loads(GEOCODE_DOCUMENT)["results"])
+    if "components.ISO_3166-1_alpha-2" in response_df.columns:
+        return response_df["components.ISO_3166-1_alpha-2"].values[0]
+
+def country_fields():
+    results = json.loads(GEOCODE_DOCUMENT)["results"]
+    if has_path(results, ("components", "ISO_3166-1_alpha-2")):
+        return get_path(results[0], ("components", "ISO_3166-1_alpha-2"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Per-call parse cost over {args.calls} calls")
+    for name, before, after in [
+        ("query_gender", gender_normalize, gender_fields),
+        ("get_classification", country_normalize, country_fields),
+    ]:
+        assert before() == after(), f"{name}: results differ"
+        before_time = timeit.timeit(before, number=args.calls) / args.calls
+        after_time = timeit.timeit(after, number=args.calls) / args.calls
+        print(f"  {name:20s} json_normalize {before_time * 1e6:8.1f} µs   "
+              f"json_fields {after_time * 1e6:6.1f} µs   ({before_time / after_time:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Parity Check and Benchmark: Keyword Classification
+
+Compares the nested keyword loops previously used by scraper.parse_cv and
+getwiki.categorise against keywords.KeywordClassifier on synthetic texts
+built from the dictionaries' own keywords, checking that both give the same
+categories. Small dictionaries (the degree and career dictionaries) are
+matched by substring search, which is faster than the loops because it
+stops at a category's first match; larger ones (the Wikidata occupations)
+by the regex scan. Both paths are checked against the loops on every
+dictionary, and synthetic dictionaries of growing size show where the regex
+takes over (keywords.MAX_SUBSTRING_KEYWORDS).
+
+Usage:
+    python benchmarks/bench_keywords.py [--texts 20000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import getwiki
+import scraper
+from keywords import KeywordClassifier
+
+SYLLABLES = ["ba", "ce", "dor", "fa", "gra", "hei", "jo", "ka", "li", "mo", "nu", "po", "ra", "sa", "to", "vi", "zu"]
+FILLER = ["studied at the", "University of", "worked as", "Member of the", "Regional Council",
+          "since 2004", "until 2019", "BA", "Law", "DOCTOR", "chairman", "board", "-", "(", ")"]
+
+def loop_classify(text, category_dict):
+    """The original per-keyword substring search"""
+    text = text.lower()
+    found = []
+    for category in category_dict.keys():
+        add = False
+        for keyword in category_dict[category]:
+            if keyword in text:
+                add = True
+        if add:
+            found.append(category)
+    return found
+
+def synthetic_texts(category_dict, count, seed=0):
+    """Random texts mixing (partial) keywords with filler words"""
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in category_dict.values() for keyword in keywords]
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(keywords)[rng.randint(0, 2):] if rng.random() < 0.15 else rng.choice(FILLER)
+                 for _ in range(rng.randint(0, 40))]
+        texts.append(rng.choice([" ", ", "]).join(words))
+    return texts
+
+def synthetic_dict(keyword_count, categories=10, seed=0):
+    """A {category: [keywords]} dictionary of made-up keywords"""
+    rng = random.Random(seed)
+    keywords = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(keyword_count)})
+    return {f"category {position}": keywords[position::categories] for position in range(categories)}
+
+def time_per_text(classify, texts, repeat=3):
+    """Categories of every text and the mean time per text (best of repeat runs)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [classify(text) for text in texts]
+        times.append(time.perf_counter() - start)
+    return result, min(times) / len(texts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    dictionaries = [
+        ("scraper degrees", scraper.degree_dict),
+        ("scraper careers", scraper.career_dict),
+        ("wikidata degrees", getwiki.degree_dict),
+        ("wikidata occupations", getwiki.occupation_dict),
+    ] + [(f"synthetic {count}", synthetic_dict(count)) for count in [50, 100, 200, 400, 800]]
+
+    for name, category_dict in dictionaries:
+        texts = synthetic_texts(category_dict, args.texts)
+        classifier = KeywordClassifier(category_dict)
+        regex_classifier = KeywordClassifier(category_dict, max_substring_keywords=0)
+
+        expected, loop_time = time_per_text(lambda text: loop_classify(text, category_dict), texts)
+        result, classifier_time = time_per_text(classifier.classify, texts)
+        regex_result, regex_time = time_per_text(regex_classifier.classify, texts)
+
+        assert result == expected, f"{name}: categories differ"
+        assert regex_result == expected, f"{name}: regex categories differ"
+        keyword_count = len({keyword for keywords in category_dict.values() for keyword in keywords})
+        print(f"  {name:22s} {keyword_count:4d} keywords   loops {loop_time * 1e6:6.1f} µs   "
+              f"classifier {classifier_time * 1e6:6.1f} µs ({loop_time / classifier_time:.1f}x, "
+              f"{'regex' if classifier.pattern is not None else 'substrings'})   "
+              f"regex scan {regex_time * 1e6:6.1f} µs")
+    print("✓ classifier output identical to keyword loops")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: Membership Matrix vs str.contains Loops
+
+Computes the per-committee aggregates of the analysis notebooks (women's
+share, median birth year, members returning from the former term) on a
+synthetic output dataset (see bench_storage.py), once as the notebooks do,
+with one `memberships.str.contains(code)` scan per code, and once with the
+sparse membership matrix (memberships.py), timing building it and the
+aggregates separately (the pipeline builds it once and stores it). Some
+"D-ME" memberships are renamed to "D-MED" to show the substring collision:
+the loop counts D-MED members as D-ME members, the matrix does not. Checks
+that both agree on every other code.
+
+Usage:
+    python benchmarks/bench_memberships.py [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import sys
+from os import path
+from statistics import median
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import schema
+from bench_storage import best_time, synthetic_output
+from memberships import MembershipMatrix, returned
+
+COLLIDING = "D-ME"
+
+def loop_aggregates(codes, current_df, former_df):
+    """The notebooks' filter loops: one str.contains scan per code"""
+    current = current_df.loc[current_df["memberships"].notna()]
+    former = former_df.loc[former_df["memberships"].notna()]
+    former_identifiers = set(former_df["identifier"])
+    rows = {}
+    for code in codes:
+        members = current.loc[current["memberships"].str.contains(code, regex=False)]
+        former_members = former.loc[former["memberships"].str.contains(code, regex=False)]
+        returned_meps = members["identifier"].isin(former_identifiers).sum()
+        rows[code] = {
+            "women": (members["gender"] == "FEMALE").sum() / len(members),
+            "median_born_year": median(members["born_year"].dropna()),
+            "current_return_ratio": returned_meps / len(members),
+            "former_return_ratio": returned_meps / len(former_members),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+def build_matrices(current_df, former_df):
+    """Membership matrices of both terms"""
+    return MembershipMatrix.from_output(current_df), MembershipMatrix.from_output(former_df)
+
+def matrix_aggregates(current_df, matrix, former):
+    """The same aggregates as operations on the membership matrices"""
+    returns = returned(matrix, former)
+    return pd.DataFrame({
+        "women": matrix.share(current_df["gender"] == "FEMALE"),
+        "median_born_year": matrix.median(current_df["born_year"]),
+        "current_return_ratio": returns["current_return_ratio"],
+        "former_return_ratio": returns["former_return_ratio"],
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_output(args.rows)
+    rng = np.random.default_rng(1)
+    renamed = rng.random(args.rows) < 0.5
+    df.loc[renamed, "memberships"] = df.loc[renamed, "memberships"].str.replace(
+        COLLIDING, COLLIDING + "D", regex=False)
+    current_df = schema.enforce(df)
+    former_df = current_df.sample(frac=0.6, random_state=1)
+    codes = MembershipMatrix.from_output(current_df).vocabulary
+
+    print(f"Benchmarking {args.rows} rows, {len(codes)} committee and delegation codes")
+    matrices = build_matrices(current_df, former_df)
+    loop_time = best_time(lambda: loop_aggregates(codes, current_df, former_df), args.repeat)
+    build_time = best_time(lambda: build_matrices(current_df, former_df), args.repeat)
+    matrix_time = best_time(lambda: matrix_aggregates(current_df, *matrices), args.repeat)
+    print(f"  str.contains loops  {loop_time * 1000:8.1f} ms")
+    print(f"  membership matrix   {(build_time + matrix_time) * 1000:8.1f} ms   "
+          f"({loop_time / (build_time + matrix_time):.0f}x; building {build_time * 1000:.1f} ms, "
+          f"aggregates {matrix_time * 1000:.1f} ms)")
+
+    looped = loop_aggregates(codes, current_df, former_df)
+    matrix = matrix_aggregates(current_df, *matrices).loc[codes]
+    others = [code for code in codes if code != COLLIDING]
+    pd.testing.assert_frame_equal(looped.loc[others], matrix.loc[others], check_dtype=False)
+    print(f"✓ Identical aggregates for {len(others)} codes")
+    members = matrices[0].counts()
+    contains = current_df["memberships"].astype(object).str.contains(COLLIDING, regex=False).sum()
+    print(f"✓ {COLLIDING}: {members[COLLIDING]} members in the matrix, "
+          f"{contains} rows matched by str.contains (including {COLLIDING}D)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark: Chained pd.merge Calls vs the Coalescing Merge
+
+Builds synthetic stage outputs (start, details, scraped and Wikidata rows,
+with birth data missing from some profiles and a few MEPs with two Wikidata
+rows) and merges them with the previous merger.merge, five chained pd.merge
+calls around concat/isin fill frames and row-wise unions of degrees and
+occupations, and with the current one, which indexes every source once and
+combines the fields by source priority (merger.FIELDS). Checks that both
+give the same dataset (occupations compared as sets, as the previous merge
+joined them in set order).
+
+Usage:
+    python benchmarks/bench_merger.py [--rows 50000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import merger
+import schema
+from bench_storage import best_time, synthetic_output
+
+# --- The previous merge (joining Wikidata on lowercase names) ---
+
+def keep_highest_degree(degree_string):
+    """Keep only the highest educational degree"""
+    degree_string = str(degree_string)
+    if degree_string != "nan":
+        degree_hierarchy = ["phd", "university", "secondary", "vocational"]
+        degree_list = degree_string.split(",")
+        for degree in degree_hierarchy:
+            if degree in degree_list:
+                return degree
+    return np.nan
+
+def chained_merge(start_df, details_df, scraped_df, wikidata_df, disability_df=None):
+    wikidata_df = wikidata_df.copy()
+    first_merge_df = pd.merge(start_df, details_df, on="identifier", how="left")
+    second_merge_df = pd.merge(first_merge_df, scraped_df, on="identifier", how="left")
+    second_merge_df["name"] = second_merge_df["name"].str.lower().str.strip()
+    wikidata_df["name"] = wikidata_df["name"].str.lower().str.strip()
+
+    wikidata_place_df = wikidata_df[["name", "born_place"]]
+    place_missing = second_merge_df.loc[second_merge_df["born_place"].isna()]["name"].tolist()
+    place_in_df = second_merge_df.loc[second_merge_df["born_place"].notna()][["name", "born_place"]]
+    wikidata_place_df = wikidata_place_df.loc[wikidata_place_df["name"].isin(place_missing)]
+    place_filled_df = pd.concat([place_in_df, wikidata_place_df], ignore_index=True)
+
+    wikidata_date_df = wikidata_df[["name", "born_day", "born_month", "born_year"]]
+    date_missing = second_merge_df.loc[second_merge_df["born_year"].isna()]["name"].tolist()
+    date_in_df = second_merge_df.loc[second_merge_df["born_year"].notna()][["name", "born_day", "born_month", "born_year"]]
+    wikidata_date_df = wikidata_date_df.loc[wikidata_date_df["name"].isin(date_missing)]
+    date_filled_df = pd.concat([date_in_df, wikidata_date_df], ignore_index=True)
+
+    wikidata_rest_df = wikidata_df[["name", "relatives", "degrees", "educated_at", "occupation"]]
+    second_merge_df = second_merge_df.drop(columns=["born_day", "born_month", "born_year", "born_place"])
+
+    third_merge_df = pd.merge(second_merge_df, place_filled_df, on="name", how="left")
+    fourth_merge_df = pd.merge(third_merge_df, date_filled_df, on="name", how="left")
+    if disability_df is not None:
+        fifth_merge_df = pd.merge(fourth_merge_df, disability_df, on="identifier", how="left")
+    else:
+        fifth_merge_df = fourth_merge_df
+    merged_df = pd.merge(fifth_merge_df, wikidata_rest_df, on="name", how="left")
+
+    union_columns = ["degrees_x", "degrees_y", "occupation_x", "occupation_y"]
+    merged_df[union_columns] = merged_df[union_columns].astype(object).fillna("")
+    merged_df["degrees"] = merged_df.apply(
+        lambda row: ",".join(set(row["degrees_x"].split(",") + row["degrees_y"].split(","))), axis=1)
+    merged_df["occupation"] = merged_df.apply(
+        lambda row: ",".join(set(row["occupation_x"].split(",") + row["occupation_y"].split(","))), axis=1)
+    merged_df["degrees"] = merged_df["degrees"].str.strip(",").str.replace(",,", ",")
+    merged_df["occupation"] = merged_df["occupation"].str.strip(",").str.replace(",,", ",")
+    merged_df = merged_df.replace("", np.nan)
+    merged_df["degrees"] = merged_df["degrees"].apply(keep_highest_degree)
+    merged_df = merged_df.rename(columns={"degrees": "highest_degree"})
+
+    columns_to_drop = ["id", "type", "sortLabel", "officialFamilyName", "officialGivenName",
+                       "degrees_x", "degrees_y", "occupation_x", "occupation_y"]
+    merged_df = merged_df.drop(columns=[col for col in columns_to_drop if col in merged_df.columns])
+    merged_df = merged_df[~merged_df["identifier"].duplicated()]
+    return schema.enforce(merged_df)
+
+# --- Benchmark ---
+
+def synthetic_sources(rows, seed=0):
+    """start, details, scraped, Wikidata and disability frames of `rows` MEPs"""
+    rng = np.random.default_rng(seed)
+    output_df = synthetic_output(rows, seed)
+    # Dates without a year are left out: the previous merge took the day and
+    # month from Wikidata if no source had a year, the current one takes none
+    output_df.loc[output_df["born_year"].isna(), ["born_day", "born_month"]] = np.nan
+    identifiers = output_df["identifier"]
+
+    start_df = output_df[["identifier", "name", "country", "group"]].assign(
+        id="person/" + identifiers.astype(str), familyName="Mep", givenName=identifiers.astype(str))
+    details_df = output_df[["identifier", "gender"]]
+
+    # Profiles without birth place or date, which Wikidata fills
+    scraped_df = output_df[["identifier", "born_day", "born_month", "born_year", "born_place", "memberships"]].copy()
+    scraped_df.loc[rng.random(rows) < 0.2, "born_place"] = None
+    scraped_df.loc[rng.random(rows) < 0.2, ["born_day", "born_month", "born_year"]] = np.nan
+    scraped_df["degrees"] = rng.choice(["university", "phd", "secondary,university", None], rows)
+    scraped_df["occupation"] = rng.choice(["politician", "lawyer", "teacher,politician", None], rows)
+    scraped_df = schema.enforce(scraped_df)
+
+    # Wikidata entries for 90% of the MEPs, 5% of them with a second row
+    covered = output_df.sample(frac=0.9, random_state=seed)
+    wikidata_df = pd.DataFrame({
+        "name": covered["name"].str.upper(),
+        "ep_id": covered["identifier"],
+        "born_place": "Wiki " + covered["born_place"],
+        "relatives": rng.choice(["Father", "Mother,Relative", None], len(covered)),
+        "degrees": rng.choice(["university", "phd,university", "secondary", None], len(covered)),
+        "educated_at": rng.choice(["KU Leuven", "Sorbonne,Bocconi", None], len(covered)),
+        "occupation": rng.choice(["politician,economist", "journalist", "lawyer"], len(covered)),
+        "born_day": covered["born_day"], "born_month": covered["born_month"], "born_year": covered["born_year"],
+    })
+    wikidata_df = pd.concat([wikidata_df, wikidata_df.sample(frac=0.05, random_state=seed).assign(born_day=1)])
+    wikidata_df = schema.enforce(wikidata_df)
+
+    disability_df = pd.DataFrame({"identifier": identifiers.sample(frac=0.02, random_state=seed), "disability": True})
+    return start_df, details_df, scraped_df, wikidata_df, disability_df
+
+def quietly(function):
+    """function without its progress output"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function()
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sources = synthetic_sources(args.rows)
+    print(f"Benchmarking {args.rows} MEPs, {len(sources[3])} Wikidata rows")
+    chained_time = best_time(quietly(lambda: chained_merge(*sources)), args.repeat)
+    print(f"  chained pd.merge    {chained_time * 1000:8.1f} ms")
+    coalesced_time = best_time(quietly(lambda: merger.merge(*sources)), args.repeat)
+    print(f"  coalescing merge    {coalesced_time * 1000:8.1f} ms   ({chained_time / coalesced_time:.1f}x)")
+
+    expected = quietly(lambda: chained_merge(*sources))().reset_index(drop=True)
+    result = quietly(lambda: merger.merge(*sources))().reset_index(drop=True)
+    as_sets = lambda values: values.map(lambda value: frozenset(value.split(",")), na_action="ignore")
+    expected["occupation"], result["occupation"] = as_sets(expected["occupation"]), as_sets(result["occupation"])
+    pd.testing.assert_frame_equal(expected, result[expected.columns], check_dtype=False)
+    print("✓ Identical datasets")
+    print(f"  born_place from: {merger.provenance_of(result, 'born_place').value_counts(dropna=False).to_dict()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: Blocked Name Index vs All-Pairs Scoring
+
+Builds synthetic MEP names as the Parliament database spells them (family
+names in capitals, several terms' worth of MEPs) and the Wikidata labels of
+the same people with typical variations: accents left out, cedillas
+written as commas below, a second family name or given name left out,
+hyphens. Matches them with exact lowercase names (as merger.py did
+before), with namematch.NameIndex, and by scoring every pair of names (for
+the first --pairs names, as it is quadratic), and reports the time and the
+share of correct matches of each.
+
+Usage:
+    python benchmarks/bench_namematch.py [--meps 3000] [--pairs 300]
+"""
+
+import argparse
+import random
+import sys
+import time
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+
+import namematch
+
+GIVEN = ["Maria", "Ana", "Jan", "Petra", "Ioan", "Dragoș", "Ştefan", "Zoë", "Łukasz", "José", "Eva", "Rareș",
+         "Élise", "Jørgen", "Nikos", "Iratxe", "Lina", "Tomasz", "Adina", "Loránt", "Chiara", "Søren", "Kristiina"]
+SYLLABLES = ["ba", "če", "dru", "fo", "ga", "hă", "ja", "ko", "lu", "mi", "no", "pe", "ra", "să", "ta", "vi",
+             "ze", "ło", "ți", "şe", "ró", "ná", "kö", "ster", "man", "wicz", "es", "sen", "ou"]
+COMMAS_BELOW = str.maketrans("ȘșȚț", "ŞşŢţ")
+PLAIN = str.maketrans("čăłțşóáöșŞȘéëŁ", "caltsoaosSSeeL")
+
+def family_name(rng):
+    """A made-up family name of two to four syllables"""
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+def synthetic_names(count, seed=0):
+    """
+    EP names, their family names, the Wikidata labels of the same MEPs (in
+    another order) and the position of each MEP's label
+    """
+    rng = random.Random(seed)
+    ep_names, family_names, labels = [], [], []
+    seen = set()
+    while len(ep_names) < count:
+        given = rng.sample(GIVEN, rng.choice([1, 1, 2]))
+        family = [family_name(rng) for _ in range(rng.choice([1, 1, 2]))]
+        ep_name = f"{'-'.join(given)} {' '.join(part.upper() for part in family)}".translate(COMMAS_BELOW)
+        if namematch.normalise(ep_name) in seen:
+            continue
+        seen.add(namematch.normalise(ep_name))
+        label_given = given[:1] if len(given) > 1 and rng.random() < 0.3 else given
+        label_family = family[:1] if len(family) > 1 and rng.random() < 0.3 else family
+        label = f"{' '.join(label_given)} {' '.join(label_family)}"
+        if rng.random() < 0.2:
+            label = label.translate(PLAIN)
+        ep_names.append(ep_name)
+        family_names.append(" ".join(family).translate(COMMAS_BELOW))
+        labels.append(label)
+    order = list(range(count))
+    rng.shuffle(order)
+    return ep_names, family_names, [labels[i] for i in order], np.argsort(order)
+
+def exact_match(ep_names, labels):
+    """Lowercase name lookup"""
+    positions = {label.lower().strip(): position for position, label in enumerate(labels)}
+    return np.array([positions.get(name.lower().strip(), -1) for name in ep_names])
+
+def all_pairs(ep_names, labels, limit):
+    """The best-scoring label of each of the first `limit` names, scoring every label"""
+    label_tokens = [namematch.tokens(label) for label in labels]
+    positions = []
+    for name in ep_names[:limit]:
+        parts = namematch.tokens(name)
+        scores = [namematch.score(parts, other, namematch.MIN_SCORE) for other in label_tokens]
+        best = int(np.argmax(scores))
+        positions.append(best if scores[best] >= namematch.MIN_SCORE else -1)
+    return np.array(positions)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meps", type=int, default=3000)
+    parser.add_argument("--pairs", type=int, default=300, help="names scored against all labels")
+    args = parser.parse_args()
+
+    ep_names, family_names, labels, truth = synthetic_names(args.meps)
+    print(f"Matching {args.meps} names ({'rapidfuzz' if namematch.Indel else 'difflib'} similarity)")
+
+    start = time.perf_counter()
+    exact = exact_match(ep_names, labels)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = namematch.NameIndex(labels).match(ep_names, family_names=family_names)
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    paired = all_pairs(ep_names, labels, args.pairs)
+    pairs_time = (time.perf_counter() - start) * args.meps / args.pairs
+
+    for label, positions, elapsed in [("exact names", exact, exact_time), ("name index", indexed, index_time),
+                                      ("all pairs", paired, pairs_time)]:
+        correct = (positions == truth[:len(positions)]).mean()
+        print(f"  {label:<12} {elapsed * 1000:9.1f} ms   {correct:6.1%} matched correctly")
+    print(f"  (all pairs: {args.pairs} names scored, time extrapolated to {args.meps})")
+    wrong = ((indexed >= 0) & (indexed != truth)).sum()
+    print(f"✓ {wrong} wrong matches from the name index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: Sequential vs Parallel Pipeline Stages
+
+Runs the whole pipeline (script.build_stages) in memory against local
+stand-ins for the EP API, the EP open-data service, the profile pages and
+Wikidata, each with an artificial latency. The stages are run once one after
+the other (one worker) and once with querying, scraper and getwiki in
+parallel, all requests paced by the per-host budgets in throttle.py.
+Checks that both runs give the same output and prints both timelines.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--meps 100] [--latency 0.05]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import pandas as pd
+
+import getwiki
+import http_client
+import journal
+import pipeline
+import querying
+import scraper
+import start
+import bench_querying
+import bench_scraper
+import bench_wikidata_split
+from script import build_stages
+
+API_FIELDS = {"name": "label", "country": "api:country-of-representation", "group": "api:political-group"}
+
+def make_api_handler(meps_df, latency):
+    """Stand-in for the EP API's list of current MEPs"""
+    records = [{API_FIELDS.get(column, column): value for column, value in record.items() if isinstance(value, str)}
+               for record in meps_df.to_dict("records")]
+    body = json.dumps({"data": records}).encode("utf-8")
+
+    class APIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/ld+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return APIHandler
+
+def serve(handler):
+    """Start a stand-in server and return its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meps", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="server delay per request (s)")
+    parser.add_argument("--row-cost", type=float, default=0.02, help="Wikidata time per result row (s)")
+    args = parser.parse_args()
+
+    data_dir = path.join(dir, "..", "data")
+    meps_df = pd.read_csv(path.join(data_dir, "start.csv"), sep=";", dtype=str).head(args.meps)
+    details_df = pd.read_csv(path.join(data_dir, "details.csv"), sep=";", dtype=str).dropna()
+    genders = dict(zip(details_df["identifier"], details_df["gender"]))
+
+    start.CURRENT_MEPS_URL = serve(make_api_handler(meps_df, args.latency)) + "/show-current"
+    # A third of the MEPs are missing from the SPARQL store and looked up one by one
+    sparql_missing = set(meps_df["identifier"].iloc[::3])
+    ep_url = serve(bench_querying.make_handler(genders, sparql_missing, args.latency))
+    querying.PERSON_URL = ep_url + "/person/{identifier}"
+    querying.SPARQL_URL = ep_url + "/sparql-endpoint"
+    scraper.PROFILE_URL = (serve(bench_scraper.make_handler(args.latency))
+                           + "/meps/en/{identifier}/{given_name}_{family_name}")
+    wikidata_meps = bench_wikidata_split.synthetic_meps(args.meps)
+    getwiki.WIKIDATA_URL = serve(bench_wikidata_split.make_handler(wikidata_meps, args.row_cost)) + "/sparql"
+    http_client.configure(cache=False)   # measure the network path, not the response cache
+    journal.JOURNAL_DIR = tempfile.mkdtemp()
+
+    print(f"Benchmarking the pipeline for {args.meps} MEPs, {args.latency * 1000:.0f} ms latency per request")
+    stages = build_stages()
+    runs = {}
+    for label, workers in [("Sequential", 1), ("Parallel", None)]:
+        print(f"\n{'='*60}\n{label} run\n{'='*60}")
+        datasets, timings = pipeline.run(stages, save=False, workers=workers)
+        runs[label] = datasets["output"], timings
+
+    print(f"\n{'='*60}")
+    for label, (output_df, timings) in runs.items():
+        print(f"{label}:")
+        pipeline.print_timings(stages, timings)
+
+    (sequential_df, sequential_timings), (parallel_df, parallel_timings) = runs.values()
+    assert sequential_df.equals(parallel_df), "Outputs differ"
+
+    def wall_time(timings):
+        return max(end for start, end in timings.values()) - min(start for start, end in timings.values())
+
+    longest = max(end - start for start, end in parallel_timings.values())
+    print(f"✓ Identical output, {wall_time(sequential_timings):.1f} s -> {wall_time(parallel_timings):.1f} s "
+          f"(longest stage {longest:.1f} s)")
+    http_client.print_connection_stats()
+
+if __name__ == "__main__":
+    main()
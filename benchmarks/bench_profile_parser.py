@@ -0,0 +1,76 @@
+"""
+Parity Check and Benchmark: Profile Parser Backends
+
+For every saved profile page in benchmarks/fixtures/, checks that each
+installed parser backend extracts exactly the same fields as the bs4
+reference implementation (both the raw fields and the final scraper
+record), then times the backends against each other.
+
+Usage:
+    python benchmarks/bench_profile_parser.py [--repeat 200]
+"""
+
+import argparse
+import glob
+import sys
+import timeit
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import profile_parser
+import scraper
+
+def load_fixtures(kind):
+    """Saved pages of one kind ("home" or "cv"), keyed by file name"""
+    fixtures = {}
+    for fixture_path in sorted(glob.glob(path.join(dir, "fixtures", f"profile_{kind}*.html"))):
+        with open(fixture_path, "r", encoding="utf-8", newline="") as fixture_file:
+            fixtures[path.basename(fixture_path)] = fixture_file.read()
+    return fixtures
+
+def check_parity(backend, home_pages, cv_pages):
+    """Compare a backend against the bs4 reference on every fixture"""
+    reference = profile_parser.get_backend("bs4")
+    candidate = profile_parser.get_backend(backend)
+    for name, html in home_pages.items():
+        assert candidate.home(html) == reference.home(html), f"{backend}: {name} fields differ"
+        assert scraper.parse_home(html, {}, backend) == scraper.parse_home(html, {}, "bs4"), \
+            f"{backend}: {name} record differs"
+    for name, html in cv_pages.items():
+        assert candidate.cv(html) == reference.cv(html), f"{backend}: {name} fields differ"
+        assert scraper.parse_cv(html, {}, backend) == scraper.parse_cv(html, {}, "bs4"), \
+            f"{backend}: {name} record differs"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    home_pages = load_fixtures("home")
+    cv_pages = load_fixtures("cv")
+    backends = profile_parser.available_backends()
+    print(f"Backends installed: {', '.join(backends)}")
+    print(f"Fixtures: {len(home_pages)} home pages, {len(cv_pages)} CV pages")
+
+    for backend in backends[1:]:
+        check_parity(backend, home_pages, cv_pages)
+        print(f"✓ {backend} output identical to bs4")
+
+    def parse_all(backend):
+        for html in home_pages.values():
+            scraper.parse_home(html, {}, backend)
+        for html in cv_pages.values():
+            scraper.parse_cv(html, {}, backend)
+
+    pages = len(home_pages) + len(cv_pages)
+    timings = {}
+    for backend in backends:
+        timings[backend] = timeit.timeit(lambda: parse_all(backend), number=args.repeat) / (args.repeat * pages)
+    for backend in backends:
+        print(f"  {backend:10s} {timings[backend] * 1e6:8.1f} µs per page   "
+              f"({timings['bs4'] / timings[backend]:.1f}x vs bs4)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: Per-Person vs Bulk SPARQL Gender Lookup
+
+Runs a local stand-in for the EP open-data service that answers both
+/person/{id} JSON-LD requests and SPARQL VALUES queries, using the genders
+in data/details.csv. The SPARQL stand-in expands the query's prefixes and
+only answers triple patterns whose predicate is exactly GENDER_PREDICATE,
+the IRI the /person/{id} documents' JSON-LD context maps hasGender to, so a
+query with the wrong predicate finds nothing, as it would on the real
+endpoint. A few MEPs are left out of the SPARQL store so the per-person
+fallback is exercised. Checks that both modes produce the same details.csv
+column, and that a query with another predicate returns no rows and is
+reported.
+
+Usage:
+    python benchmarks/bench_querying.py [--meps 120] [--latency 0.05]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from urllib.parse import parse_qs, urlsplit
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import pandas as pd
+
+import http_client
+import querying
+from journal import Journal
+
+GENDER_IRI = "http://publications.europa.eu/resource/authority/human-sex/{gender}"
+GENDER_PREDICATE = "http://www.w3.org/ns/person#hasGender"
+
+def query_predicates(query):
+    """Full IRIs of the predicates linking ?mep to ?gender in a SPARQL query"""
+    prefixes = dict(re.findall(r"PREFIX\s+(\w*):\s*<([^>]*)>", query, re.IGNORECASE))
+    predicates = set()
+    for predicate in re.findall(r"\?mep\s+(\S+)\s+\?gender", query):
+        if predicate.startswith("<") and predicate.endswith(">"):
+            predicates.add(predicate[1:-1])
+        elif ":" in predicate and predicate.split(":", 1)[0] in prefixes:
+            prefix, local_name = predicate.split(":", 1)
+            predicates.add(prefixes[prefix] + local_name)
+    return predicates
+
+def make_handler(genders, sparql_missing, latency):
+    """Stand-in for the /person/{id} documents and the SPARQL endpoint"""
+    class EPHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, document):
+            body = json.dumps(document).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(latency)
+            url = urlsplit(self.path)
+            if url.path.startswith("/person/"):
+                identifier = url.path.split("/")[-1]
+                self.send_json({"@context": {"hasGender": {"@id": GENDER_PREDICATE, "@type": "@id"}}, "@graph": [
+                    {"@id": f"person/{identifier}", "@type": "Person",
+                     "hasGender": GENDER_IRI.format(gender=genders[identifier])},
+                    {"@id": f"person/{identifier}/membership", "@type": "Membership"},
+                ]})
+            elif url.path == "/sparql-endpoint":
+                query = parse_qs(url.query)["query"][0]
+                bindings = []
+                matched = GENDER_PREDICATE in query_predicates(query)
+                for iri, identifier in re.findall(r"<(http://data\.europarl\.europa\.eu/person/(\d+))>", query):
+                    if matched and identifier in genders and identifier not in sparql_missing:
+                        bindings.append({
+                            "mep": {"type": "uri", "value": iri},
+                            "gender": {"type": "uri", "value": GENDER_IRI.format(gender=genders[identifier])},
+                        })
+                self.send_json({"head": {"vars": ["mep", "gender"]}, "results": {"bindings": bindings}})
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return EPHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meps", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.05, help="server delay per request (s)")
+    args = parser.parse_args()
+
+    details_df = pd.read_csv(path.join(dir, "..", "data", "details.csv"), sep=";").dropna().head(args.meps)
+    genders = dict(zip(details_df["identifier"].astype(str), details_df["gender"]))
+    identifiers = details_df["identifier"].tolist()
+    sparql_missing = set(list(genders)[::25])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(genders, sparql_missing, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    querying.PERSON_URL = base + "/person/{identifier}"
+    querying.SPARQL_URL = base + "/sparql-endpoint"
+    http_client.configure(cache=False)
+
+    print(f"Benchmarking {len(identifiers)} MEPs ({len(sparql_missing)} missing from SPARQL), "
+          f"{args.latency * 1000:.0f} ms latency per request")
+
+    results = {}
+    for mode, use_bulk in [("Per-person", False), ("Bulk SPARQL", True)]:
+        journal = Journal(mode.replace(" ", "_"), directory=tempfile.mkdtemp())
+        start = time.perf_counter()
+        results[mode] = querying.collect_genders(identifiers, journal, use_bulk=use_bulk)
+        print(f"  {mode:12s}: {time.perf_counter() - start:8.2f} s")
+
+    # A query with any other predicate matches nothing, and the run says so
+    correct_query = querying.GENDER_QUERY
+    querying.GENDER_QUERY = correct_query.replace("http://www.w3.org/ns/person#", "http://www.w3.org/ns/people#")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        fallback = querying.collect_genders(identifiers[:10], Journal("wrong", directory=tempfile.mkdtemp()))
+    querying.GENDER_QUERY = correct_query
+    assert "returned gender for 0/10 MEPs" in output.getvalue(), "The stand-in answered the wrong predicate"
+    assert "Warning: the bulk gender query found only 0 of 10 MEPs" in output.getvalue(), "No warning"
+    assert fallback == results["Per-person"][:10], "Fallback genders differ"
+    print("✓ A query with another predicate finds nothing and is reported")
+
+    server.shutdown()
+
+    assert results["Per-person"] == results["Bulk SPARQL"], "Genders differ"
+    assert results["Per-person"] == details_df["gender"].tolist(), "Genders differ from details.csv"
+    print("✓ Identical output")
+    http_client.print_connection_stats()
+
+if __name__ == "__main__":
+    main()
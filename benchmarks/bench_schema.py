@@ -0,0 +1,74 @@
+"""
+Benchmark: Schema Dtypes vs Inferred Dtypes
+
+Takes a synthetic output dataset (see bench_storage.py) as read_csv infers
+it and as schema.enforce types it, and compares memory use and the kinds of
+operations the analysis notebooks run: per-country and per-group gender
+shares and median birth years, and a merge of two terms on identifier.
+Checks that both give the same results.
+
+Usage:
+    python benchmarks/bench_schema.py [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import io
+import sys
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import pandas as pd
+
+import schema
+from bench_storage import best_time, synthetic_output
+
+def group_stats(df):
+    """Women's share and median birth year per country and group"""
+    women = df["gender"] == "FEMALE"
+    by_country = women.groupby(df["country"], observed=True).mean()
+    by_group = df.groupby(["group", "gender"], observed=True)["born_year"].median()
+    return by_country, by_group
+
+def returned(current_df, former_df):
+    """MEPs of the current term who also sat in the former one, per group"""
+    merged = current_df[["identifier", "group"]].merge(former_df[["identifier"]], on="identifier")
+    return merged.groupby("group", observed=True).size()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # As the notebooks get it: through a CSV file, with inferred dtypes
+    text = io.StringIO()
+    synthetic_output(args.rows).to_csv(text, sep=";", index=False)
+    inferred = pd.read_csv(io.StringIO(text.getvalue()), sep=";")
+    former = inferred.sample(frac=0.6, random_state=1)
+    frames = {
+        "inferred": (inferred, former),
+        "schema": (schema.enforce(inferred), schema.enforce(former)),
+    }
+
+    print(f"Benchmarking {args.rows} rows")
+    results = {}
+    for label, (df, former_df) in frames.items():
+        memory = df.memory_usage(deep=True).sum()
+        stats_time = best_time(lambda: group_stats(df), args.repeat)
+        merge_time = best_time(lambda: returned(df, former_df), args.repeat)
+        results[label] = group_stats(df), returned(df, former_df)
+        print(f"  {label:<9} memory {memory / 1e6:6.1f} MB   group stats {stats_time * 1000:7.1f} ms   "
+              f"merge terms {merge_time * 1000:7.1f} ms")
+
+    (by_country, by_group), returns = results["inferred"]
+    (typed_country, typed_group), typed_returns = results["schema"]
+    pd.testing.assert_series_equal(by_country, typed_country, check_index_type=False, check_categorical=False)
+    pd.testing.assert_series_equal(by_group, typed_group, check_index_type=False, check_categorical=False,
+                                   check_dtype=False)
+    pd.testing.assert_series_equal(returns, typed_returns, check_index_type=False, check_categorical=False)
+    print("✓ Identical results")
+
+if __name__ == "__main__":
+    main()
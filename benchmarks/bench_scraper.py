@@ -0,0 +1,98 @@
+"""
+Benchmark: Sequential vs Concurrent Profile Scraping
+
+Serves the saved profile HTML from a local stand-in HTTP server (with an
+artificial per-request latency) and compares the original one-by-one loop
+against the rate-limited asyncio engine in scraper.py.
+
+Usage:
+    python benchmarks/bench_scraper.py [--profiles 60] [--latency 0.08]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import http_client
+import scraper
+import throttle
+
+FIXTURES = {
+    "home": open(path.join(dir, "fixtures", "profile_home.html"), "rb").read(),
+    "cv": open(path.join(dir, "fixtures", "profile_cv.html"), "rb").read(),
+}
+
+def make_handler(latency):
+    """Build a request handler that serves the fixtures after a delay"""
+    class ProfileHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real server
+
+        def do_GET(self):
+            time.sleep(latency)
+            page = FIXTURES.get(self.path.rsplit("/", 1)[-1])
+            if page is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ProfileHandler
+
+def run_sequential(mep_urls, sleep):
+    """The original scraper.main loop"""
+    dict_of_dicts = {}
+    for identifier, url in mep_urls:
+        dict_of_dicts[identifier] = scraper.scrape_mep(url)
+        time.sleep(sleep)
+    return dict_of_dicts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.08, help="server delay per request (s)")
+    parser.add_argument("--sleep", type=float, default=0.5, help="delay of the original loop (s)")
+    parser.add_argument("--rate", type=float, default=throttle.HOST_BUDGETS["www.europarl.europa.eu"][0],
+                        help="token-bucket rate (req/s)")
+    args = parser.parse_args()
+    http_client.configure(cache=False)   # measure the network path, not the response cache
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/meps/en"
+    throttle.set_budget(base, args.rate, scraper.MAX_IN_FLIGHT)
+    mep_urls = [[str(i), f"{base}/{i}/Lena_Dupont"] for i in range(args.profiles)]
+
+    print(f"Benchmarking {args.profiles} profiles, {args.latency * 1000:.0f} ms latency per request")
+
+    start = time.perf_counter()
+    sequential = run_sequential(mep_urls, args.sleep)
+    sequential_time = time.perf_counter() - start
+    print(f"  Sequential (sleep {args.sleep}s): {sequential_time:8.2f} s")
+
+    start = time.perf_counter()
+    concurrent = scraper.scrape_all(mep_urls)
+    concurrent_time = time.perf_counter() - start
+    print(f"  Concurrent ({scraper.MAX_IN_FLIGHT} in flight, {args.rate:g} req/s): "
+          f"{concurrent_time:8.2f} s")
+
+    server.shutdown()
+
+    assert list(sequential) == list(concurrent), "Row order differs"
+    assert sequential == concurrent, "Scraped records differ"
+    print(f"✓ Identical output, {sequential_time / concurrent_time:.1f}x faster")
+    http_client.print_connection_stats()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: Streaming vs In-Memory Wikidata Results
+
+Serves a synthetic Wikidata result (see bench_getwiki.py) from a local
+stand-in SPARQL endpoint, once as SPARQL JSON and once as CSV, and compares
+loading the whole JSON document (json.loads + json_normalize +
+group_bindings) with getwiki.stream_grouped, which folds the CSV rows per
+MEP while they arrive. Reports time and peak Python memory (tracemalloc)
+and checks that both give the same frame. The streamed query is then run
+through the response cache (in a temporary directory): downloaded and
+stored, read back from disk, and revalidated (ttl=0, answered with 304),
+with the same checks.
+
+Usage:
+    python benchmarks/bench_sparql_stream.py [--bindings 100000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import pandas as pd
+
+import getwiki
+import http_cache
+import http_client
+from bench_getwiki import synthetic_bindings
+
+ETAG = '"result-1"'
+
+def encode_results(meps_df):
+    """The bindings as SPARQL JSON and as SPARQL CSV documents"""
+    variables = [column.removesuffix(".value") for column in meps_df.columns]
+    records = meps_df.to_dict("records")
+    bindings = [
+        {variable: {"type": "literal", "value": record[column]}
+         for variable, column in zip(variables, meps_df.columns) if record[column] != ""}
+        for record in records
+    ]
+    json_body = json.dumps({"head": {"vars": variables}, "results": {"bindings": bindings}}).encode("utf-8")
+
+    csv_text = io.StringIO(newline="")
+    writer = csv.writer(csv_text)
+    writer.writerow(variables)
+    writer.writerows([record[column] for column in meps_df.columns] for record in records)
+    return json_body, csv_text.getvalue().encode("utf-8")
+
+def make_handler(json_body, csv_body):
+    """Stand-in SPARQL endpoint answering with JSON or CSV"""
+    class SparqlHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            as_csv = "text/csv" in self.headers.get("Accept", "")
+            body = csv_body if as_csv else json_body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv" if as_csv else "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            for offset in range(0, len(body), 65536):
+                self.wfile.write(body[offset:offset + 65536])
+
+        def log_message(self, format, *args):
+            pass
+
+    return SparqlHandler
+
+def load_json(query):
+    """The in-memory path: whole JSON document, then group_bindings"""
+    query_result = http_client.get(getwiki.WIKIDATA_URL, params={"query": query, "format": "json"})
+    meps_df = pd.json_normalize(json.loads(query_result.content)["results"]["bindings"]).fillna("")
+    return getwiki.group_bindings(meps_df)
+
+def measure(function, *args):
+    """Run function, returning its result, wall time and peak traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bindings", type=int, default=100000)
+    args = parser.parse_args()
+
+    meps_df = synthetic_bindings(args.bindings)
+    json_body, csv_body = encode_results(meps_df)
+    print(f"Synthetic result: {len(meps_df)} bindings, {meps_df['mep.value'].nunique()} MEPs "
+          f"(JSON {len(json_body) / 1e6:.1f} MB, CSV {len(csv_body) / 1e6:.1f} MB)")
+    del meps_df
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(json_body, csv_body))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    getwiki.WIKIDATA_URL = f"http://127.0.0.1:{server.server_port}/sparql"
+    http_client.configure(cache=False)
+
+    loaded, load_time, load_peak = measure(load_json, "SELECT ...")
+    (streamed, rows), stream_time, stream_peak = measure(getwiki.stream_grouped, "SELECT ...")
+
+    # The same streamed query through the response cache
+    http_client.configure(cache=True)
+    http_cache.configure(directory=tempfile.mkdtemp())
+    cached_runs = {}
+    for label, ttl in [("downloaded", None), ("from disk", None), ("revalidated", 0)]:
+        cached_runs[label] = measure(getwiki.stream_grouped, "SELECT ...", ttl)
+    server.shutdown()
+
+    assert rows == args.bindings, "row count differs"
+    assert streamed.equals(loaded.astype(object)), "grouped frames differ"
+    for label, ((cached, cached_rows), _, _) in cached_runs.items():
+        assert cached_rows == rows and cached.equals(streamed), f"cached stream ({label}) differs"
+    print("✓ Identical grouped output")
+    print(f"  JSON in memory   {load_time:6.2f} s   peak {load_peak / 1e6:7.1f} MB")
+    print(f"  CSV streaming    {stream_time:6.2f} s   peak {stream_peak / 1e6:7.1f} MB   "
+          f"({load_peak / stream_peak:.0f}x less memory)")
+    for label, (_, cached_time, cached_peak) in cached_runs.items():
+        print(f"  cached, {label:<12}{cached_time:6.2f} s   peak {cached_peak / 1e6:7.1f} MB")
+    print(f"  Response cache: {http_cache.cache_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: CSV vs Parquet Dataset Storage
+
+Builds a synthetic output dataset (identifiers, names, country, group,
+gender, birth dates and comma-joined text columns), stores it with every
+installed storage backend and times writing, reading all columns and reading
+two columns. Checks that every backend reads back the same typed frame.
+
+Usage:
+    python benchmarks/bench_storage.py [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from os import path
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+def synthetic_output(rows, seed=0):
+    """An output.csv-like frame with missing birth dates and memberships"""
+    rng = np.random.default_rng(seed)
+    committees = np.array(["AFET", "AGRI", "BUDG", "CULT", "ECON", "EMPL", "ENVI", "FEMM", "IMCO", "ITRE",
+                           "JURI", "LIBE", "PECH", "PETI", "REGI", "TRAN", "D-ME", "D-JP", "D-US"])
+    countries = np.array(["AT", "BE", "BG", "CY", "CZ", "DE", "DK", "EE", "ES", "FI", "FR", "GR", "HR", "HU",
+                          "IE", "IT", "LT", "LU", "LV", "MT", "NL", "PL", "PT", "RO", "SE", "SI", "SK"])
+    groups = np.array(["PPE", "S&D", "PfE", "ECR", "Renew", "Verts/ALE", "The Left", "ESN", "NI"])
+    born_year = rng.integers(1940, 2000, rows).astype(float)
+    born_year[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "identifier": np.arange(100000, 100000 + rows),
+        "name": [f"mep {number}" for number in range(rows)],
+        "country": rng.choice(countries, rows),
+        "group": rng.choice(groups, rows),
+        "gender": rng.choice(["FEMALE", "MALE"], rows),
+        "memberships": [",".join(rng.choice(committees, 4, replace=False)) for _ in range(rows)],
+        "born_place": [f"Town {number}" for number in rng.integers(0, 5000, rows)],
+        "born_day": rng.integers(1, 29, rows).astype(float),
+        "born_month": rng.integers(1, 13, rows).astype(float),
+        "born_year": born_year,
+        "highest_degree": rng.choice(["phd", "university", "secondary", None], rows),
+        "occupation": rng.choice(["politician", "lawyer,politician", "teacher", "manager,media"], rows),
+    })
+
+def best_time(function, repeat):
+    """Fastest of several runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_output(args.rows)
+    data_dir = tempfile.mkdtemp()
+    print(f"Benchmarking {args.rows} rows with backends: {', '.join(storage.available_formats())}")
+    if "parquet" not in storage.available_formats():
+        print("  (install pyarrow to compare against the parquet backend)")
+
+    loaded = {}
+    for format in storage.available_formats():
+        storage.FORMAT = format
+        name = f"bench_{format}"
+        write_time = best_time(lambda: storage.save(name, df, data_dir), args.repeat)
+        read_time = best_time(lambda: storage.load(name, data_dir=data_dir), args.repeat)
+        columns_time = best_time(lambda: storage.load(name, ["identifier", "gender"], data_dir), args.repeat)
+        loaded[format] = storage.load(name, data_dir=data_dir)
+        size = path.getsize(storage.dataset_path(name, format, data_dir))
+        memory = loaded[format].memory_usage(deep=True).sum()
+        print(f"  {format:<8} write {write_time:6.3f} s   read {read_time:6.3f} s   "
+              f"read 2 columns {columns_time:6.3f} s   file {size / 1e6:5.1f} MB   in memory {memory / 1e6:5.1f} MB")
+
+    reference = loaded["csv"]
+    assert reference["born_year"].dtype == "Int16" and reference["country"].dtype == "category", \
+        "schema not applied"
+    for format, frame in loaded.items():
+        pd.testing.assert_frame_equal(frame, reference, check_categorical=False)
+    print("✓ Every backend reads back the same typed frame")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: Wikidata Mega-Query vs Parallel Per-Property Subqueries
+
+Runs a local stand-in for the Wikidata SPARQL endpoint over a synthetic set
+of MEPs. It answers both the single OPTIONAL query (with its cartesian
+product of rows) and the narrow per-property subqueries, taking time
+proportional to the rows it returns. Compares getwiki.stream_grouped on the
+mega-query with getwiki.query_split and checks that both give the same
+frame.
+
+Usage:
+    python benchmarks/bench_wikidata_split.py [--meps 720] [--row-cost 0.0001]
+"""
+
+import argparse
+import csv
+import io
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+from os import path
+from urllib.parse import parse_qs, urlsplit
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import getwiki
+import http_client
+
+ENTITY = "http://www.wikidata.org/entity/Q{}"
+
+def synthetic_meps(count, seed=0):
+    """Property values per MEP, as lists of tuples in the subquery column order"""
+    rng = random.Random(seed)
+    meps = {}
+    for number in range(count):
+        def some(maximum, make):
+            return [make(i) for i in range(rng.choice(range(maximum + 1)))]
+        meps[ENTITY.format(1000 + number)] = {
+            "mepLabel": [(f"MEP {number}",)],
+            "epid": some(1, lambda i: (str(100000 + number),)),
+            "father": some(1, lambda i: (f"Father {number}",)),
+            "mother": some(1, lambda i: (f"Mother {number}",)),
+            "birthdate": [(f"19{rng.randint(40, 99)}-0{rng.randint(1, 9)}-1{i}T00:00:00Z",)
+                          for i in range(1 if rng.random() < 0.95 else 2)],
+            "birthplace": [(ENTITY.format(rng.randint(10, 9000)), f"Town {rng.randint(0, 3000)}")],
+            "relative": some(3, lambda i: (f"Relative {number}-{i}",)),
+            "degree": some(2, lambda i: (rng.choice(["Master of Laws", "Bachelor of Arts", "doctorate"]),)),
+            "educatedat": some(3, lambda i: (f"University of Place {rng.randint(0, 400)}",)),
+            "occupation": [(occupation,) for occupation in rng.sample(
+                ["politician", "lawyer", "journalist", "economist", "teacher", "engineer", "farmer"],
+                rng.randint(1, 4))],
+        }
+    return meps
+
+def answer(meps, query):
+    """Header and rows the stand-in endpoint returns for a query"""
+    clause = re.search(r"\?mep wdt:(P\d+) \?(\w+)\.", query)
+    if "OPTIONAL" in query:
+        header = ["mep", "mepLabel"] + [column for _, columns in getwiki.PROPERTIES.values() for column in columns]
+        rows = []
+        for mep, values in meps.items():
+            options = [values[name] or [("",) * len(columns)] for name, (_, columns) in getwiki.PROPERTIES.items()]
+            for combination in product(*options):
+                rows.append([mep, values["mepLabel"][0][0]] + [value for part in combination for value in part])
+        return header, rows
+    if clause:
+        name = clause.group(2)
+        header = ["mep"] + getwiki.PROPERTIES[name][1]
+        return header, [[mep] + list(value) for mep, values in meps.items() for value in values[name]]
+    return ["mep", "mepLabel"], [[mep, values["mepLabel"][0][0]] for mep, values in meps.items()]
+
+def make_handler(meps, row_cost):
+    """Stand-in SPARQL endpoint; query time grows with the rows returned"""
+    class SparqlHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)["query"][0]
+            header, rows = answer(meps, query)
+            time.sleep(0.05 + row_cost * len(rows))
+            text = io.StringIO(newline="")
+            writer = csv.writer(text)
+            writer.writerow(header)
+            writer.writerows(rows)
+            body = text.getvalue().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SparqlHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meps", type=int, default=720)
+    parser.add_argument("--row-cost", type=float, default=0.0001, help="server time per result row (s)")
+    args = parser.parse_args()
+
+    meps = synthetic_meps(args.meps)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(meps, args.row_cost))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    getwiki.WIKIDATA_URL = f"http://127.0.0.1:{server.server_port}/sparql"
+    http_client.configure(cache=False)
+
+    start = time.perf_counter()
+    mega, mega_rows = getwiki.stream_grouped(getwiki.build_query())
+    mega_time = time.perf_counter() - start
+    print(f"  Mega-query: {mega_rows} rows in {mega_time:.2f} s")
+
+    start = time.perf_counter()
+    split, split_rows = getwiki.query_split()
+    split_time = time.perf_counter() - start
+    server.shutdown()
+
+    assert split.equals(mega), "grouped frames differ"
+    print("✓ Identical grouped output")
+    print(f"  Subqueries: {split_rows} rows in {split_time:.2f} s   ({mega_time / split_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
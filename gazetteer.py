@@ -0,0 +1,155 @@
+"""
+GeoNames Gazetteer Index
+
+Indexes data/geonames.csv (the GeoNames cities export, semicolon-separated
+with Name, ASCII Name, Alternate Names, Population and Coordinates columns)
+for birthplace lookups. Each place is filed under its name, its ASCII name
+and each of its comma-separated alternate names, normalised as in
+namematch.py ("Malmö", "MALMO" and "malmo" are all "malmo"), in an SQLite
+table keyed on the name:
+
+    gazetteer = open_index()
+    gazetteer.coordinates("Łódź")     # (51.75, 19.46667)
+
+A lookup is one B-tree search for the name, whatever the size of the
+table. Places filed under their name rank before places that only have it
+as an alternate name, and more populous places before smaller ones, so
+"Paris" is the French capital rather than Paris, Texas. The index is built
+once into data/geonames.sqlite and rebuilt when geonames.csv changes;
+opening it reads nothing until the first lookup.
+"""
+
+import sqlite3
+from os import path, remove, replace, stat
+
+import pandas as pd
+
+import namematch
+from paths import DATA_DIR
+
+GEONAMES_PATH = path.join(DATA_DIR, "geonames.csv")
+INDEX_PATH = path.join(DATA_DIR, "geonames.sqlite")
+CHUNK_SIZE = 50000  # GeoNames rows read at a time while building
+
+# Rank of a name within the places filed under it
+NAME, ALTERNATE_NAME = 0, 1
+
+# Birthplaces are looked up as given, then cut before each of these signs
+# in turn ("Saint-Denis (Réunion)" -> "Saint-Denis" -> "Saint")
+SIGNS = ["(", "/", ",", "-"]
+
+SCHEMA = """
+CREATE TABLE places (
+    key TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    population INTEGER NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL
+);
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+def source_version(geonames_path):
+    """Size and modification time of the GeoNames file, to detect changes"""
+    source = stat(geonames_path)
+    return f"{source.st_size}:{source.st_mtime_ns}"
+
+def index_rows(geonames_df, keys):
+    """(key, rank, population, latitude, longitude) rows of a GeoNames chunk"""
+    coordinates = geonames_df["Coordinates"].str.split(",", n=1, expand=True)
+    latitudes = pd.to_numeric(coordinates[0], errors="coerce")
+    longitudes = pd.to_numeric(coordinates[1], errors="coerce")
+    populations = pd.to_numeric(geonames_df["Population"], errors="coerce").fillna(0).astype(int)
+    ascii_names = geonames_df["ASCII Name"] if "ASCII Name" in geonames_df else geonames_df["Name"]
+
+    for name, ascii_name, alternate_names, population, latitude, longitude in zip(
+            geonames_df["Name"], ascii_names, geonames_df["Alternate Names"], populations, latitudes, longitudes):
+        if pd.isna(latitude) or pd.isna(longitude):
+            continue
+        names = {}
+        alternates = alternate_names.split(",") if isinstance(alternate_names, str) else []
+        for rank, raw_names in [(ALTERNATE_NAME, alternates), (NAME, [name, ascii_name])]:
+            for raw_name in raw_names:
+                if isinstance(raw_name, str):
+                    # The same names recur across places: normalise each once
+                    key = keys.get(raw_name)
+                    if key is None:
+                        key = keys[raw_name] = namematch.normalise(raw_name)
+                    if key:
+                        names[key] = rank
+        for key, rank in names.items():
+            yield key, rank, int(population), float(latitude), float(longitude)
+
+def build_index(geonames_path=GEONAMES_PATH, index_path=INDEX_PATH):
+    """Build the SQLite gazetteer of a GeoNames file, replacing any earlier one"""
+    tmp_path = index_path + ".tmp"
+    if path.exists(tmp_path):
+        remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    db.executescript(SCHEMA)
+    keys = {}
+    for chunk in pd.read_csv(geonames_path, sep=";", dtype=str, chunksize=CHUNK_SIZE,
+                             usecols=lambda column: column in
+                             {"Name", "ASCII Name", "Alternate Names", "Population", "Coordinates"}):
+        db.executemany("INSERT INTO places VALUES (?, ?, ?, ?, ?)", index_rows(chunk, keys))
+    # Covers the lookups: candidates of a key come out of the index already ranked
+    db.execute("CREATE INDEX places_key ON places (key, rank, population DESC, latitude, longitude)")
+    db.execute("INSERT INTO meta VALUES ('source', ?)", (source_version(geonames_path),))
+    db.commit()
+    db.close()
+    replace(tmp_path, index_path)
+    return index_path
+
+def is_current(geonames_path=GEONAMES_PATH, index_path=INDEX_PATH):
+    """Whether the index exists and was built from the current GeoNames file"""
+    if not path.exists(index_path):
+        return False
+    try:
+        with sqlite3.connect(f"file:{index_path}?mode=ro", uri=True) as db:
+            row = db.execute("SELECT value FROM meta WHERE name = 'source'").fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    return row is not None and row[0] == source_version(geonames_path)
+
+def lookup_keys(place):
+    """Normalised names to look a birthplace up by, the full name first"""
+    place = str(place)
+    keys = [namematch.normalise(place)]
+    for sign in SIGNS:
+        place = place.split(sign)[0]
+        keys.append(namematch.normalise(place))
+    return [key for position, key in enumerate(keys) if key and key not in keys[:position]]
+
+class Gazetteer:
+    """Read-only lookups in a gazetteer index"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.db = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+
+    def candidates(self, key, limit=None):
+        """(latitude, longitude, population) of the places filed under a normalised name, best first"""
+        query = "SELECT latitude, longitude, population FROM places WHERE key = ? ORDER BY rank, population DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return self.db.execute(query, (key,)).fetchall()
+
+    def coordinates(self, place):
+        """(latitude, longitude) of a birthplace, None if not in the gazetteer"""
+        if pd.isna(place):
+            return None
+        for key in lookup_keys(place):
+            found = self.candidates(key, limit=1)
+            if found:
+                return found[0][:2]
+        return None
+
+    def close(self):
+        self.db.close()
+
+def open_index(geonames_path=GEONAMES_PATH, index_path=INDEX_PATH):
+    """The gazetteer of a GeoNames file, (re)building its index if needed"""
+    if not is_current(geonames_path, index_path):
+        print("  Building the GeoNames gazetteer index...")
+        build_index(geonames_path, index_path)
+        print(f"  ✓ Saved to: {index_path}")
+    return Gazetteer(index_path)
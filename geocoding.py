@@ -6,38 +6,28 @@ birth regions as native, EU, or other.
 
 Requires:
 1. OpenCage API key in opencagekey.txt
-2. GeoNames database in data/geonames.csv (optional, for offline geocoding)
+2. GeoNames database in data/geonames.csv (optional, for offline geocoding;
+   indexed into data/geonames.sqlite on first use, see gazetteer.py)
 """
 
 import pandas as pd
 from os import path
 import numpy as np
-import requests
 import json
 import time
 
-dir = path.dirname(__file__)
+import gazetteer
+import http_client
+import storage
+from json_fields import get_path, has_path
+from paths import API_KEY_PATH, DATA_DIR
 
-def get_coordinates_from_geonames(place_raw, geonames_df, alt_geonames_df):
-    """Get coordinates from GeoNames database"""
-    place = str(place_raw).lower()
-    if place != "nan":
-        # Remove parentheses, slashes, dashes, commas
-        for sign in ["(", "/", "-", ","]:
-            place = place.split(sign)[0].strip()
-        
-        # Try exact match first
-        filter_df = geonames_df.loc[geonames_df["Name"] == place]
-        if len(filter_df.index) > 0:
-            return filter_df["Coordinates"].tolist()[0]
-        
-        # Try alternate names
-        elif geonames_df["Alternate Names"].str.contains(place, na=False).any():
-            alt_coordinates_df = alt_geonames_df.loc[alt_geonames_df["Alternate Names"].str.contains(place)]
-            if len(alt_coordinates_df.index) > 0:
-                return alt_coordinates_df["Coordinates"].tolist()[0]
-    
-    return np.nan
+def get_coordinates_from_geonames(place_raw, geonames):
+    """Get coordinates from the GeoNames gazetteer index"""
+    coordinates = geonames.coordinates(place_raw)
+    if coordinates is None:
+        return np.nan, np.nan
+    return coordinates
 
 def get_classification_from_coordinates(lat, lon, elected_country, api_key):
     """Classify birth region using reverse geocoding"""
@@ -48,13 +38,13 @@ def get_classification_from_coordinates(lat, lon, elected_country, api_key):
     url = f"https://api.opencagedata.com/geocode/v1/json?q={coordinates}&key={api_key}"
     
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()
-        response_dict = json.loads(response.content)
-        response_df = pd.json_normalize(response_dict["results"])
+        results = json.loads(response.content)["results"]
+        country_path = ("components", "ISO_3166-1_alpha-2")
         
-        if "components.ISO_3166-1_alpha-2" in response_df.columns:
-            born_country = response_df["components.ISO_3166-1_alpha-2"].values[0]
+        if has_path(results, country_path):
+            born_country = get_path(results[0], country_path)
             
             eu_country_codes = [
                 "AT", "BE", "BG", "CY", "CZ", "DE", "DK", "EE", "ES", "FI",
@@ -78,7 +68,7 @@ def main():
     print("Geocoding MEP birthplaces...")
     
     # Check for API key
-    api_key_path = path.join(dir, "..", "opencagekey.txt")
+    api_key_path = API_KEY_PATH
     if not path.exists(api_key_path):
         print("❌ Error: opencagekey.txt not found!")
         print("   Please create this file with your OpenCage API key")
@@ -88,31 +78,26 @@ def main():
     api_key = open(api_key_path, "r").read().strip()
     
     # Load merged data
-    data_dir = path.join(dir, "..", "data")
-    meps_df = pd.read_csv(path.join(data_dir, "merged.csv"), sep=";")
+    data_dir = DATA_DIR
+    meps_df = storage.load("merged")
     
     # Check for GeoNames database
     geonames_path = path.join(data_dir, "geonames.csv")
     if path.exists(geonames_path):
         print("  Using GeoNames database for offline geocoding...")
-        geonames_df = pd.read_csv(geonames_path, sep=";")
-        geonames_df["Name"] = geonames_df["Name"].str.lower()
-        geonames_df["Alternate Names"] = geonames_df["Alternate Names"].str.lower()
-        geonames_df = geonames_df.sort_values("Population", ascending=False)
-        alt_geonames_df = geonames_df.loc[geonames_df["Alternate Names"].notna()]
-        
-        # Geocode using GeoNames
-        uncoded_df = meps_df.loc[~meps_df["born_lat"].notna()].copy()
-        uncoded_df["coordinates"] = uncoded_df["born_place"].apply(
-            lambda x: get_coordinates_from_geonames(x, geonames_df, alt_geonames_df)
-        )
-        uncoded_df = uncoded_df.loc[uncoded_df["coordinates"].notna()]
-        uncoded_df[["born_lat", "born_lon"]] = uncoded_df["coordinates"].str.split(", ", expand=True)
-        uncoded_df = uncoded_df.drop(["coordinates"], axis=1)
-        
-        # Merge back
-        meps_df = pd.concat([meps_df, uncoded_df])
-        meps_df = meps_df[~meps_df["identifier"].duplicated(keep="last")]
+        geonames = gazetteer.open_index(geonames_path)
+        if "born_lat" not in meps_df.columns:
+            meps_df["born_lat"], meps_df["born_lon"] = np.nan, np.nan
+
+        # Geocode using GeoNames, looking each distinct birthplace up once
+        uncoded = meps_df["born_lat"].isna() & meps_df["born_place"].notna()
+        places = meps_df.loc[uncoded, "born_place"].unique()
+        coordinates_df = pd.DataFrame([get_coordinates_from_geonames(place, geonames) for place in places],
+                                      index=places, columns=["born_lat", "born_lon"], dtype=float)
+        geonames.close()
+        meps_df.loc[uncoded, ["born_lat", "born_lon"]] = coordinates_df.loc[
+            meps_df.loc[uncoded, "born_place"]].to_numpy()
+        uncoded_df = meps_df.loc[uncoded & meps_df["born_lat"].notna()]
         
         print(f"  Geocoded {len(uncoded_df)} locations using GeoNames")
     else:
@@ -141,8 +126,7 @@ def main():
     meps_df["born_region"] = classifications
 
     # Save output
-    output_path = path.join(data_dir, "output.csv")
-    meps_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+    output_path = storage.save("output", meps_df)
     
     native_count = len(meps_df[meps_df["born_region"] == "native"])
     eu_count = len(meps_df[meps_df["born_region"] == "eu"])
@@ -151,6 +135,7 @@ def main():
     print(f"✓ Successfully geocoded and classified MEPs")
     print(f"  Native: {native_count}, EU: {eu_count}, Other: {other_count}")
     print(f"✓ Saved to: {output_path}")
+    http_client.print_connection_stats()
 
 if __name__ == "__main__":
     main()
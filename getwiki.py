@@ -11,10 +11,90 @@ import pandas as pd
 import requests
 import json
 from os import path
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
 import numpy as np
 
+import http_client
+import incremental
+import namematch
+import sparql_stream
+import storage
+from keywords import KeywordClassifier
+from terms import CURRENT_TERM, TERMS
+
 dir = path.dirname(__file__)
 
+WIKIDATA_URL = "https://query.wikidata.org/bigdata/namespace/wdq/sparql"
+STREAM_RESULTS = True   # fold CSV results per MEP while downloading (False: load the whole JSON)
+SPLIT_QUERY = True      # one narrow query per property instead of the OPTIONAL mega-query
+SUBQUERY_WORKERS = 4    # Wikidata allows 5 concurrent queries per client
+
+# Wikidata entity of the term to collect (10th European Parliament, see terms.py)
+TERM = TERMS[CURRENT_TERM]["wikidata"]
+
+# Caps the queries running at once across all terms collected in parallel
+_query_slots = threading.BoundedSemaphore(SUBQUERY_WORKERS)
+
+# MEPs holding a seat (Q27169 or a subclass) during the term
+TERM_PATTERN = """  ?mep p:P39 ?position. 
+  ?position (ps:P39/(wdt:P279*)) wd:Q27169. 
+  ?position pq:P2937 ?term. 
+  FILTER(?term = wd:{term}).  """
+
+QUERY = """SELECT ?mep ?mepLabel ?epid ?fatherLabel ?motherLabel ?birthdateLabel ?birthplace ?birthplaceLabel ?relativeLabel ?degreeLabel ?educatedatLabel ?occupationLabel
+WHERE { 
+{term_pattern}
+  OPTIONAL{ ?mep wdt:P1186 ?epid. }
+  OPTIONAL{ ?mep wdt:P22 ?father. }
+  OPTIONAL{ ?mep wdt:P25 ?mother. }
+  OPTIONAL{ ?mep wdt:P569 ?birthdate. }
+  OPTIONAL{ ?mep wdt:P19 ?birthplace. }
+  OPTIONAL{ ?mep wdt:P1038 ?relative. }
+  OPTIONAL{ ?mep wdt:P512 ?degree. }
+  OPTIONAL{ ?mep wdt:P69 ?educatedat. }
+  OPTIONAL{ ?mep wdt:P106 ?occupation. }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}"""
+
+# Variable and property of each OPTIONAL clause, and the result columns
+# each subquery fills. P1186 is the MEP's European Parliament identifier,
+# which merger.py joins on
+PROPERTIES = {
+    "epid": ("P1186", ["epid"]),
+    "father": ("P22", ["fatherLabel"]),
+    "mother": ("P25", ["motherLabel"]),
+    "birthdate": ("P569", ["birthdateLabel"]),
+    "birthplace": ("P19", ["birthplace", "birthplaceLabel"]),
+    "relative": ("P1038", ["relativeLabel"]),
+    "degree": ("P512", ["degreeLabel"]),
+    "educatedat": ("P69", ["educatedatLabel"]),
+    "occupation": ("P106", ["occupationLabel"]),
+}
+
+SUBQUERY = """SELECT DISTINCT ?mep {variables}
+WHERE { 
+{term_pattern}
+{clause}  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}"""
+
+def build_query(term=TERM):
+    """The single query with one OPTIONAL clause per property"""
+    return QUERY.replace("{term_pattern}", TERM_PATTERN.replace("{term}", term))
+
+def build_subqueries(term=TERM):
+    """One narrow query per property, plus one for the MEPs and their names"""
+    term_pattern = TERM_PATTERN.replace("{term}", term)
+    subqueries = {"mep": SUBQUERY.replace("{variables}", "?mepLabel").replace("{clause}", "")}
+    for variable, (property_id, columns) in PROPERTIES.items():
+        subqueries[variable] = (SUBQUERY
+                                .replace("{variables}", " ".join(f"?{column}" for column in columns))
+                                .replace("{clause}", f"  ?mep wdt:{property_id} ?{variable}.\n"))
+    return {name: query.replace("{term_pattern}", term_pattern) for name, query in subqueries.items()}
+
 # Degree & occupation dictionaries
 degree_dict = {
     "secondary": ["secondary", "gymnasium", "vocat", "apprentice", "high school"],
@@ -42,127 +122,280 @@ occupation_dict = {
     "doctor": ["doctor", "nurse", "physician", "veterinarian", "pharmacist", "surgeon", "psychiatrist", "psychologist"],
 }
 
-def categorise(entry, category_dict):
-    """Categorize text entries based on keyword matching"""
-    if not entry:
-        return np.nan
-    new_entry = []
-    entry_list = entry.split(",")
-    for entry_part in entry_list:
-        entry_part = entry_part.lower().strip()
-        found = False
-        for category in category_dict.keys():
-            for keyword in category_dict[category]:
-                if keyword in entry_part:
-                    found = True
-                    if category not in new_entry:
-                        new_entry.append(category)
-        if not found:
-            new_entry.append(entry_part)
-    return ",".join(new_entry)
-
-def main():
+degree_classifier = KeywordClassifier(degree_dict)
+occupation_classifier = KeywordClassifier(occupation_dict)
+
+def categorise_column(entries, classifier):
+    """
+    Categorise a column of comma-joined labels: every label becomes the
+    categories it has a keyword of (each category once per entry), or stays
+    as its lowercased text if it has none; empty entries become NaN. The
+    distinct entries are exploded once, each distinct label is classified
+    once through a label -> categories table, and the entries are joined
+    back together (benchmarks/bench_categorise.py).
+    """
+    entries = pd.Series(entries)
+    entry_codes, unique_entries = pd.factorize(entries.astype(object))
+    categorised = np.full(len(unique_entries), np.nan, dtype=object)
+
+    filled = pd.Series(unique_entries, dtype=object)
+    filled = filled[filled != ""]
+    if not filled.empty:
+        labels = filled.astype(str).str.split(",").explode()
+
+        # Label -> positions in a small vocabulary of (value, is category) items
+        values, is_category, table = [], [], {}
+        for label in labels.unique():
+            label_part = label.lower().strip()
+            categories = classifier.classify(label_part)
+            # Labels without a category are kept as they are
+            items = [(category, True) for category in categories] or [(label_part, False)]
+            table[label] = list(range(len(values), len(values) + len(items)))
+            for value, flag in items:
+                values.append(value)
+                is_category.append(flag)
+        exploded = labels.map(table).explode()
+        codes = exploded.to_numpy(dtype=np.int64)
+
+        parts = pd.DataFrame({
+            "entry": exploded.index,
+            "value": np.array(values, dtype=object)[codes],
+            "is_category": np.array(is_category, dtype=bool)[codes],
+        })
+        # A category is only added once per entry (and not if the same text
+        # is already there); uncategorised labels are always kept
+        repeated = parts.duplicated(subset=["entry", "value"]) & parts["is_category"]
+        kept = parts[~repeated]
+        # Concatenating "value," strings per entry is cythonized, unlike ",".join
+        joined = (kept["value"] + ",").groupby(kept["entry"], sort=False).sum().str[:-1]
+        categorised[joined.index.to_numpy()] = joined.to_numpy()
+
+    # Missing entries have code -1, which picks the trailing NaN
+    result = np.append(categorised, np.nan)[entry_codes]
+    return pd.Series(result, index=entries.index, name=entries.name, dtype=object)
+
+# Columns identifying one MEP in the SPARQL result, and the multi-valued
+# columns whose values are collected per MEP
+GROUP_COLUMNS = [
+    "mep.value", "mepLabel.value", "epid.value", "fatherLabel.value", "motherLabel.value",
+    "birthdateLabel.value", "birthplaceLabel.value", "birthplace.value"
+]
+LIST_COLUMNS = ["relativeLabel.value", "degreeLabel.value", "educatedatLabel.value", "occupationLabel.value"]
+
+def group_bindings(meps_df):
+    """
+    Collapse the SPARQL rows to one row per MEP, joining the distinct
+    non-empty values of each multi-valued column in sorted order. All list
+    columns are stacked into one long table, so the de-duplication and the
+    joining happen in a single pass.
+    """
+    meps_df = meps_df.reindex(columns=GROUP_COLUMNS + LIST_COLUMNS, fill_value="")
+    grouping = meps_df.groupby(GROUP_COLUMNS, sort=True)
+    group_ids = grouping.ngroup().to_numpy()
+    merged_df = grouping.size().reset_index()[GROUP_COLUMNS]
+
+    long_df = pd.DataFrame({
+        "group": np.tile(group_ids, len(LIST_COLUMNS)),
+        "column": np.repeat(np.arange(len(LIST_COLUMNS)), len(meps_df)),
+        "value": np.concatenate([meps_df[column].astype(str).to_numpy(dtype=object) for column in LIST_COLUMNS]),
+    })
+    long_df = long_df[long_df["value"] != ""].drop_duplicates()
+    long_df = long_df.sort_values(["group", "column", "value"])
+    joined = (long_df["value"] + ",").groupby([long_df["group"], long_df["column"]]).sum().str[:-1]
+    joined = joined.unstack("column")
+
+    for position, column in enumerate(LIST_COLUMNS):
+        values = joined[position] if position in joined.columns else pd.Series(dtype=object)
+        merged_df[column] = values.reindex(range(len(merged_df))).fillna("").to_numpy(dtype=object)
+    return merged_df
+
+def stream_grouped(query, ttl=None):
+    """
+    Run the query with CSV results and fold the rows per MEP while they are
+    read (from the network or the response cache); gives the same frame as
+    group_bindings and the row count.
+    """
+    group_variables = [column.removesuffix(".value") for column in GROUP_COLUMNS]
+    list_variables = [column.removesuffix(".value") for column in LIST_COLUMNS]
+    accumulator = sparql_stream.GroupAccumulator(group_variables, list_variables)
+    accumulator.add_all(sparql_stream.query_csv(WIKIDATA_URL, query, ttl=ttl))
+    column_names = {variable: f"{variable}.value" for variable in group_variables + list_variables}
+    return accumulator.to_frame(column_names), accumulator.rows
+
+def run_subqueries(subqueries, workers=SUBQUERY_WORKERS, ttl=None, label=""):
+    """
+    Run the subqueries concurrently through the response cache, printing
+    the time each one took.
+    """
+    def run(name):
+        with _query_slots:
+            start = time.perf_counter()
+            bindings = list(sparql_stream.query_csv(WIKIDATA_URL, subqueries[name], ttl=ttl))
+            return name, bindings, time.perf_counter() - start
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name, bindings, elapsed in executor.map(run, subqueries):
+            print(f"    {label}{name:12s} {len(bindings):7d} rows {elapsed:7.2f} s")
+            results[name] = bindings
+    return results
+
+def join_subqueries(results):
+    """
+    Join the per-property results on the MEP QID. Single-valued columns
+    (parents, birth date and place) span one row per combination, as in the
+    OPTIONAL mega-query; the other properties are collected per MEP. Gives
+    the same frame as group_bindings.
+    """
+    group_variables = [column.removesuffix(".value") for column in GROUP_COLUMNS]
+    list_variables = [column.removesuffix(".value") for column in LIST_COLUMNS]
+
+    meps = {}
+    for binding in results["mep"]:
+        meps.setdefault(binding["mep"], {}).setdefault("mepLabel", set()).add((binding["mepLabel"],))
+    for variable, (_, columns) in PROPERTIES.items():
+        for binding in results[variable]:
+            if binding["mep"] in meps:
+                meps[binding["mep"]].setdefault(variable, set()).add(tuple(binding[column] for column in columns))
+
+    row_variables = ["mepLabel"] + [variable for variable, (_, columns) in PROPERTIES.items()
+                                    if columns[0] in group_variables]
+    list_properties = {columns[0]: variable for variable, (_, columns) in PROPERTIES.items()
+                       if columns[0] in list_variables}
+
+    accumulator = sparql_stream.GroupAccumulator(group_variables, list_variables)
+    for mep, values in meps.items():
+        list_values = {column: [value for (value,) in values.get(variable, ())]
+                       for column, variable in list_properties.items()}
+        options = [sorted(values.get(variable, ())) or [None] for variable in row_variables]
+        for combination in product(*options):
+            binding = {"mep": mep}
+            for variable, value in zip(row_variables, combination):
+                if value is not None:
+                    columns = ["mepLabel"] if variable == "mepLabel" else PROPERTIES[variable][1]
+                    binding.update(zip(columns, value))
+            accumulator.add_group(binding, list_values)
+
+    column_names = {variable: f"{variable}.value" for variable in group_variables + list_variables}
+    return accumulator.to_frame(column_names)
+
+def query_split(term=TERM, ttl=None, label=""):
+    """
+    Collect the term's data with one narrow query per property, run
+    concurrently and joined locally; returns the grouped frame and the
+    total number of rows received.
+    """
+    start = time.perf_counter()
+    results = run_subqueries(build_subqueries(term), ttl=ttl, label=label)
+    print(f"    {label}{len(results)} subqueries in {time.perf_counter() - start:.2f} s")
+    return join_subqueries(results), sum(len(bindings) for bindings in results.values())
+
+def join_columns(df, columns):
+    """Comma-join the non-empty values of several columns, row by row"""
+    joined = pd.Series("", index=df.index, dtype=object)
+    for column in columns:
+        values = df[column].fillna("").astype(str)
+        joined = joined + values.where(values == "", values + ",")
+    return joined.str[:-1]
+
+def collect(term=TERM, ttl=None, label=""):
+    """
+    Query Wikidata for one term and group the rows per MEP; returns the
+    grouped frame and the number of result rows. ttl=0 revalidates cached
+    results.
+    """
+    if SPLIT_QUERY:
+        return query_split(term, ttl=ttl, label=label)
+    if STREAM_RESULTS:
+        return stream_grouped(build_query(term), ttl=ttl)
+
+    query_result = http_client.get(
+        WIKIDATA_URL, params={"query": build_query(term), "format": "json"}, ttl=ttl
+    )
+    query_result.raise_for_status()
+    
+    # Parse results
+    meps_dict = json.loads(query_result.content)
+    meps_df = pd.json_normalize(meps_dict["results"]["bindings"])
+    meps_df = meps_df.fillna("")
+    return group_bindings(meps_df), len(meps_df)
+
+def process(merged_meps_df):
+    """Turn the grouped Wikidata rows into the wikidata.csv columns"""
+    # Rename columns
+    merged_meps_df = merged_meps_df.rename(columns={
+        "mepLabel.value": "name",
+        "epid.value": "ep_id",
+        "fatherLabel.value": "father",
+        "motherLabel.value": "mother",
+        "birthdateLabel.value": "born_date",
+        "birthplaceLabel.value": "born_place",
+        "relativeLabel.value": "relatives",
+        "degreeLabel.value": "degrees",
+        "educatedatLabel.value": "educated_at",
+        "occupationLabel.value": "occupation",
+        "birthplace.value": "birthplace_link"
+    })
+
+    # Split born_date column
+    merged_meps_df["born_day"] = merged_meps_df["born_date"].str.split("-").str.get(2).str[:2]
+    merged_meps_df["born_month"] = merged_meps_df["born_date"].str.split("-").str.get(1)
+    merged_meps_df["born_year"] = merged_meps_df["born_date"].str.split("-").str.get(0)
+    merged_meps_df = merged_meps_df.drop(columns=["mep.value", "born_date"])
+
+    # Group father, mother and relative columns
+    merged_meps_df["relatives"] = join_columns(merged_meps_df, ["father", "mother", "relatives"])
+
+    # Categorise degrees & occupations
+    merged_meps_df["degrees"] = categorise_column(merged_meps_df["degrees"], degree_classifier)
+    merged_meps_df["occupation"] = categorise_column(merged_meps_df["occupation"], occupation_classifier)
+
+    # Names too different from the Parliament database for merger.py to match
+    # (only needed for MEPs without an EP identifier on Wikidata, see namematch.py)
+    merged_meps_df["name"] = merged_meps_df["name"].replace(namematch.load_exceptions())
+    return merged_meps_df
+
+def query_wikidata(meps_df, incremental_run=False):
+    """
+    The wikidata.csv rows for the current term. In incremental mode the
+    existing wikidata.csv is kept if the MEP list is unchanged since it was
+    written, and cached results are revalidated otherwise.
+    """
+    # The Wikidata result covers the whole term, so in incremental mode it is
+    # only refreshed when the MEP list changed since it was last written
+    if incremental_run and incremental.is_unchanged("wikidata", meps_df):
+        print("✓ No new or changed MEPs - keeping existing Wikidata results")
+        return storage.load("wikidata")
+    
+    print("This may take a minute or two...")
+    
+    # Query Wikidata SPARQL endpoint and group rows for MEPs with
+    # multiple relatives, degrees, educations or occupations
+    merged_meps_df, records = collect(
+        TERM, ttl=0 if incremental_run else None  # membership changed: revalidate
+    )
+    print(f"  Retrieved data for {records} MEP records from Wikidata")
+    return process(merged_meps_df)
+
+def main(incremental_run=False):
     """Query Wikidata for MEP biographical information"""
     print("Querying Wikidata for MEP biographical data...")
-    print("This may take a minute or two...")
     
-    # SPARQL query for 10th European Parliament (2024-2029)
-    # Entity: wd:Q75984568
-    query = '''SELECT ?mep ?mepLabel ?fatherLabel ?motherLabel ?birthdateLabel ?birthplace ?birthplaceLabel ?relativeLabel ?degreeLabel ?educatedatLabel ?occupationLabel
-WHERE { 
-  ?mep p:P39 ?position. 
-  ?position (ps:P39/(wdt:P279*)) wd:Q27169. 
-  ?position pq:P2937 ?term. 
-  FILTER(?term = wd:Q75984568).  
-  OPTIONAL{ ?mep wdt:P22 ?father. }
-  OPTIONAL{ ?mep wdt:P25 ?mother. }
-  OPTIONAL{ ?mep wdt:P569 ?birthdate. }
-  OPTIONAL{ ?mep wdt:P19 ?birthplace. }
-  OPTIONAL{ ?mep wdt:P1038 ?relative. }
-  OPTIONAL{ ?mep wdt:P512 ?degree. }
-  OPTIONAL{ ?mep wdt:P69 ?educatedat. }
-  OPTIONAL{ ?mep wdt:P106 ?occupation. }
-  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
-}'''
+    start_df = storage.load("start")
+    if incremental_run and incremental.is_unchanged("wikidata", start_df):
+        print("✓ No new or changed MEPs - keeping existing Wikidata results")
+        return
     
     try:
-        # Query Wikidata SPARQL endpoint
-        wikidata_url = "https://query.wikidata.org/bigdata/namespace/wdq/sparql"
-        query_result = requests.get(wikidata_url, params={"query": query, "format": "json"})
-        query_result.raise_for_status()
-        
-        # Parse results
-        meps_dict = json.loads(query_result.content)
-        meps_df = pd.json_normalize(meps_dict["results"]["bindings"])
-        meps_df = meps_df.fillna("")
-        
-        print(f"  Retrieved data for {len(meps_df)} MEP records from Wikidata")
-        
-        # Group rows for MEPs with multiple relatives, degrees, educations or occupations
-        merged_meps_df = meps_df.groupby([
-            "mep.value", "mepLabel.value", "fatherLabel.value", "motherLabel.value", 
-            "birthdateLabel.value", "birthplaceLabel.value", "birthplace.value"
-        ]).agg({
-            "relativeLabel.value": lambda x: ",".join(list(set(x.astype(str)))),
-            "degreeLabel.value": lambda x: ",".join(list(set(x.astype(str)))),
-            "educatedatLabel.value": lambda x: ",".join(list(set(x.astype(str)))),
-            "occupationLabel.value": lambda x: ",".join(list(set(x.astype(str)))),
-        }).reset_index()
-
-        # Rename columns
-        merged_meps_df = merged_meps_df.rename(columns={
-            "mepLabel.value": "name",
-            "fatherLabel.value": "father",
-            "motherLabel.value": "mother",
-            "birthdateLabel.value": "born_date",
-            "birthplaceLabel.value": "born_place",
-            "relativeLabel.value": "relatives",
-            "degreeLabel.value": "degrees",
-            "educatedatLabel.value": "educated_at",
-            "occupationLabel.value": "occupation",
-            "birthplace.value": "birthplace_link"
-        })
-
-        # Split born_date column
-        merged_meps_df["born_day"] = merged_meps_df["born_date"].str.split("-").str.get(2).str[:2]
-        merged_meps_df["born_month"] = merged_meps_df["born_date"].str.split("-").str.get(1)
-        merged_meps_df["born_year"] = merged_meps_df["born_date"].str.split("-").str.get(0)
-        merged_meps_df = merged_meps_df.drop(columns=["mep.value", "born_date"])
-
-        # Group father, mother and relative columns
-        def join_strings(row, columns):
-            return ",".join(value for column, value in zip(merged_meps_df.columns, row) 
-                          if column in columns and pd.notna(value) and value != "")
-        
-        merged_meps_df["relatives"] = merged_meps_df.apply(
-            lambda row: join_strings(row, ["father", "mother", "relatives"]), axis=1
-        )
-
-        # Categorise degrees & occupations
-        merged_meps_df["degrees"] = merged_meps_df["degrees"].apply(lambda x: categorise(x, degree_dict))
-        merged_meps_df["occupation"] = merged_meps_df["occupation"].apply(lambda x: categorise(x, occupation_dict))
-
-        # Manual name overrides if Wikidata name not identical to Parliament database
-        # These may need updating for the 10th EP
-        merged_meps_df["name"] = merged_meps_df["name"].replace({
-            "Rosa Estaràs": "Rosa ESTARÀS FERRAGUT",
-            "Tomasz Poręba": "Tomasz Piotr PORĘBA",
-            "Carles Puigdemont": "Carles Puigdemont i Casamajó",
-            "Soraya Rodríguez": "María Soraya RODRÍGUEZ RAMOS",
-            "Petros S. Kokkalis": "Petros KOKKALIS",
-            "Graça Carvalho": "Maria da Graça CARVALHO",
-            "Diana Riba Giner": "Diana RIBA I GINER",
-            "Eva-Maria Poptcheva": "Eva Maria Poptcheva",
-            "Yannis Lagos": "Ioannis Lagos",
-            "Cristian Terheș": "Cristian TERHEŞ"
-        })
+        merged_meps_df = query_wikidata(start_df, incremental_run)
 
         # Save
-        output_path = path.join(dir, "..", "data", "wikidata.csv")
-        merged_meps_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+        output_path = storage.save("wikidata", merged_meps_df)
+        incremental.save_manifest("wikidata", start_df)
         
         print(f"✓ Successfully processed {len(merged_meps_df)} unique MEPs from Wikidata")
         print(f"✓ Saved to: {output_path}")
+        http_client.print_connection_stats()
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Error querying Wikidata: {e}")
@@ -172,4 +405,4 @@ WHERE {
         raise
 
 if __name__ == "__main__":
-    main()
+    main(incremental_run="--incremental" in sys.argv[1:])
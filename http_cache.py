@@ -0,0 +1,354 @@
+"""
+On-Disk HTTP Response Cache
+
+Caches successful GET responses between pipeline runs. Response bodies are
+stored zlib-compressed and content-addressed (by SHA-256 of the body) in
+cache/http/blobs/, and a SQLite index maps each request (URL plus request
+headers) to its blob, response headers and validators. Credentials in the
+query string (an API key=..., see CREDENTIAL_PARAMS) are left out of both the
+key and the stored URL, so they never reach the disk.
+
+Fresh entries (younger than the TTL) are served without touching the network.
+Stale entries are revalidated with a conditional GET (If-None-Match /
+If-Modified-Since), so an unchanged page costs a 304 instead of a download.
+The cache is bounded in size and evicts least recently used entries first.
+
+Streamed requests (stream=True) are cached too, without holding the body in
+memory: a cached body is decompressed from disk chunk by chunk, and a
+downloaded one is compressed to disk while the caller reads it, and only
+stored once it has been read to the end.
+"""
+
+from os import path, makedirs, remove, replace
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import paths
+
+CACHE_DIR = path.join(paths.CACHE_DIR, "http")
+DEFAULT_TTL = 24 * 60 * 60          # seconds before an entry is revalidated
+MAX_SIZE = 512 * 1024 * 1024        # compressed bytes kept on disk
+CHUNK_SIZE = 64 * 1024              # bytes read at a time from streamed bodies
+
+# Query parameters that carry credentials (compared case-insensitively)
+CREDENTIAL_PARAMS = {"key", "api_key", "apikey", "access_token", "token", "password", "secret"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_blob ON entries (blob);
+"""
+
+def redact_url(url):
+    """The URL without its credential query parameters (unchanged if it has none)"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(name, value) for name, value in query if name.lower() not in CREDENTIAL_PARAMS]
+    if len(kept) == len(query):
+        return url
+    return urlunsplit(parts._replace(query=urlencode(kept)))
+
+def request_key(url, headers=None):
+    """Cache key for a GET request: the URL (credentials left out) plus its request headers"""
+    normalised = sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())
+    return hashlib.sha256(json.dumps([redact_url(url), normalised]).encode("utf-8")).hexdigest()
+
+class _ChunkReader:
+    """File-like read() over an iterator of byte chunks, used as Response.raw"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = b""
+
+    def read(self, size=-1, **kwargs):
+        while size is None or size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size is None or size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self):
+        self.chunks.close()
+
+class ResponseCache:
+    """SQLite-indexed, content-addressed store of HTTP responses"""
+
+    def __init__(self, directory=CACHE_DIR, ttl=DEFAULT_TTL, max_size=MAX_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self.lock = threading.Lock()
+        makedirs(path.join(directory, "blobs"), exist_ok=True)
+        self.db = sqlite3.connect(path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def _blob_path(self, digest):
+        return path.join(self.directory, "blobs", digest[:2], digest + ".zz")
+
+    def _read_blob(self, digest):
+        with open(self._blob_path(digest), "rb") as blob_file:
+            return zlib.decompress(blob_file.read())
+
+    def _write_blob(self, content):
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not path.exists(blob_path):
+            makedirs(path.dirname(blob_path), exist_ok=True)
+            tmp_path = blob_path + ".tmp"
+            with open(tmp_path, "wb") as blob_file:
+                blob_file.write(zlib.compress(content))
+            replace(tmp_path, blob_path)
+        return digest, path.getsize(blob_path)
+
+    def _lookup(self, key):
+        row = self.db.execute(
+            "SELECT url, blob, headers, etag, last_modified, stored_at FROM entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, blob, headers, etag, last_modified, stored_at = row
+        if not path.exists(self._blob_path(blob)):
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.db.commit()
+            return None
+        return {"url": url, "blob": blob, "headers": json.loads(headers), "etag": etag,
+                "last_modified": last_modified, "stored_at": stored_at}
+
+    def _iter_blob(self, digest):
+        """Decompressed body of a blob, chunk by chunk"""
+        decompressor = zlib.decompressobj()
+        with open(self._blob_path(digest), "rb") as blob_file:
+            while data := blob_file.read(CHUNK_SIZE):
+                yield decompressor.decompress(data)
+        yield decompressor.flush()
+
+    def _store(self, key, url, response):
+        digest, size = self._write_blob(response.content)
+        self._index(key, url, digest, size, response.headers)
+
+    def _index(self, key, url, digest, size, headers):
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, redact_url(url), digest, size, json.dumps(dict(headers)),
+             headers.get("ETag"), headers.get("Last-Modified"), now, now)
+        )
+        self.db.commit()
+        self._evict()
+
+    def _iter_and_store(self, key, url, response):
+        """
+        Body of a streamed download, chunk by chunk, compressed into a
+        temporary blob as it is read; the blob is stored once the body has
+        been read to the end (a partly read body is discarded)
+        """
+        digest, compressor = hashlib.sha256(), zlib.compressobj()
+        makedirs(path.join(self.directory, "blobs"), exist_ok=True)
+        tmp_path = path.join(self.directory, "blobs", f"{key}.{threading.get_ident()}.download")
+        try:
+            with open(tmp_path, "wb") as tmp_file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp_file.write(compressor.compress(chunk))
+                    yield chunk
+                tmp_file.write(compressor.flush())
+            blob = digest.hexdigest()
+            blob_path = self._blob_path(blob)
+            if not path.exists(blob_path):
+                makedirs(path.dirname(blob_path), exist_ok=True)
+                replace(tmp_path, blob_path)
+            with self.lock:
+                self._index(key, url, blob, path.getsize(blob_path), response.headers)
+        finally:
+            response.close()
+            if path.exists(tmp_path):
+                remove(tmp_path)
+
+    def _touch(self, key, refreshed=False):
+        now = time.time()
+        if refreshed:
+            self.db.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+        else:
+            self.db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self.db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_size"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return
+        for key, blob, size in self.db.execute(
+            "SELECT key, blob, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            # Blobs are shared between entries with identical bodies
+            if self.db.execute("SELECT 1 FROM entries WHERE blob = ?", (blob,)).fetchone() is None:
+                try:
+                    remove(self._blob_path(blob))
+                except FileNotFoundError:
+                    pass
+            total -= size
+            if total <= self.max_size:
+                break
+        self.db.commit()
+
+    def _build_response(self, url, entry):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = self._read_blob(entry["blob"])
+        response._content_consumed = True  # iter_content() reads _content
+        response.from_cache = True
+        return response
+
+    def _build_stream(self, url, headers, chunks, from_cache):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _ChunkReader(chunks)
+        response.from_cache = from_cache
+        return response
+
+    def fetch(self, url, headers, send, ttl=None):
+        """
+        Return the response for a GET request, reading through the cache.
+
+        send(headers) performs the real request with the given headers.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        key = request_key(url, headers)
+        with self.lock:
+            entry = self._lookup(key)
+
+        if entry is not None and time.time() - entry["stored_at"] < ttl:
+            with self.lock:
+                self._touch(key)
+                self.stats["hits"] += 1
+                return self._build_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = send(request_headers)
+
+        with self.lock:
+            if entry is not None and response.status_code == 304:
+                self._touch(key, refreshed=True)
+                self.stats["revalidated"] += 1
+                return self._build_response(url, entry)
+            self.stats["misses"] += 1
+            if response.status_code == 200:
+                self._store(key, url, response)
+        response.from_cache = False
+        return response
+
+    def fetch_stream(self, url, headers, send, ttl=None):
+        """
+        fetch() for a streamed request (send(headers) must pass stream=True):
+        the body of the returned response is read from disk if it is cached,
+        and otherwise from the network while it is written to the cache.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        key = request_key(url, headers)
+        with self.lock:
+            entry = self._lookup(key)
+
+        if entry is not None and time.time() - entry["stored_at"] < ttl:
+            with self.lock:
+                self._touch(key)
+                self.stats["hits"] += 1
+            return self._build_stream(url, entry["headers"], self._iter_blob(entry["blob"]), True)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = send(request_headers)
+
+        with self.lock:
+            if entry is not None and response.status_code == 304:
+                self._touch(key, refreshed=True)
+                self.stats["revalidated"] += 1
+                response.close()
+                return self._build_stream(url, entry["headers"], self._iter_blob(entry["blob"]), True)
+            self.stats["misses"] += 1
+        if response.status_code != 200:
+            response.from_cache = False
+            return response
+        return self._build_stream(url, response.headers, self._iter_and_store(key, url, response), False)
+
+    def clear(self):
+        """Remove every entry and blob"""
+        with self.lock:
+            for (blob,) in self.db.execute("SELECT DISTINCT blob FROM entries").fetchall():
+                try:
+                    remove(self._blob_path(blob))
+                except FileNotFoundError:
+                    pass
+            self.db.execute("DELETE FROM entries")
+            self.db.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the shared response cache, opening it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(CACHE_DIR, DEFAULT_TTL, MAX_SIZE)
+        return _cache
+
+def configure(directory=None, ttl=None, max_size=None):
+    """Change the cache settings; the cache is reopened on next use"""
+    global CACHE_DIR, DEFAULT_TTL, MAX_SIZE, _cache
+    with _cache_lock:
+        if directory is not None:
+            CACHE_DIR = directory
+        if ttl is not None:
+            DEFAULT_TTL = ttl
+        if max_size is not None:
+            MAX_SIZE = max_size
+        if _cache is not None:
+            _cache.db.close()
+            _cache = None
+
+def cache_stats():
+    """Hit / revalidation / miss counts of the shared cache (if it was used)"""
+    return dict(_cache.stats) if _cache is not None else None
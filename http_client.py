@@ -0,0 +1,165 @@
+"""
+Shared HTTP Client
+
+One pooled requests session for every pipeline stage. Connections are kept
+alive per host, failed requests (429 and 5xx) are retried with exponential
+backoff, and every request gets a timeout. The client also counts requests
+and newly opened connections per host, so connection reuse can be checked
+at the end of a run.
+
+GET requests read through the on-disk response cache (http_cache.py) unless
+called with cache=False. Every request that goes over the network first
+takes a token from the host's politeness budget (throttle.py); cache hits
+do not.
+"""
+
+from collections import defaultdict
+from urllib.parse import urlsplit
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import http_cache
+from throttle import limiter_for
+
+# Default client settings
+POOL_SIZE = 16              # keep-alive connections per host
+RETRIES = 3                 # retries on connection errors, 429 and 5xx
+BACKOFF_FACTOR = 0.5        # sleeps 0.5s, 1s, 2s, ... between retries
+TIMEOUT = (10, 60)          # (connect, read) timeout in seconds
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+CACHE_ENABLED = True        # read GET requests through http_cache
+
+_stats_lock = threading.Lock()
+_requests_by_host = defaultdict(int)
+_connections_by_host = defaultdict(int)
+
+def _count_connection(host):
+    with _stats_lock:
+        _connections_by_host[host] += 1
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP connection pool that records every new TCP connection"""
+    def _new_conn(self):
+        _count_connection(self.host)
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS connection pool that records every new TCP/TLS connection"""
+    def _new_conn(self):
+        _count_connection(self.host)
+        return super()._new_conn()
+
+class PooledAdapter(HTTPAdapter):
+    """Transport adapter using the counting connection pools"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+def _count_request(response, *args, **kwargs):
+    with _stats_lock:
+        _requests_by_host[urlsplit(response.url).hostname] += 1
+
+_session = None
+_session_lock = threading.Lock()
+
+def _build_session():
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=True,
+    )
+    adapter = PooledAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_count_request)
+    return session
+
+def get_session():
+    """Return the shared session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+def configure(pool_size=None, retries=None, backoff_factor=None, timeout=None, cache=None):
+    """Change the client settings; the session is rebuilt on next use"""
+    global POOL_SIZE, RETRIES, BACKOFF_FACTOR, TIMEOUT, CACHE_ENABLED, _session
+    with _session_lock:
+        if cache is not None:
+            CACHE_ENABLED = cache
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if retries is not None:
+            RETRIES = retries
+        if backoff_factor is not None:
+            BACKOFF_FACTOR = backoff_factor
+        if timeout is not None:
+            TIMEOUT = timeout
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get(url, params=None, headers=None, cache=True, ttl=None, **kwargs):
+    """
+    GET a URL through the shared session (drop-in for requests.get).
+
+    With cache=True the response is read through the on-disk cache (also
+    with stream=True, see http_cache.py); ttl overrides the cache's default
+    freshness lifetime in seconds.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    session = get_session()
+    limiter = limiter_for(url)
+    if not (cache and CACHE_ENABLED):
+        limiter.acquire()
+        return session.get(url, params=params, headers=headers, **kwargs)
+
+    def download(request_headers):
+        limiter.acquire()
+        return session.get(full_url, headers=request_headers, **kwargs)
+
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    cache = http_cache.get_cache()
+    fetch = cache.fetch_stream if kwargs.get("stream") else cache.fetch
+    return fetch(full_url, headers, download, ttl)
+
+def connection_stats():
+    """Per-host request and connection counts since the start of the run"""
+    with _stats_lock:
+        hosts = set(_requests_by_host) | set(_connections_by_host)
+        stats = {}
+        for host in sorted(hosts):
+            requests_made = _requests_by_host[host]
+            connections = _connections_by_host[host]
+            stats[host] = {
+                "requests": requests_made,
+                "connections": connections,
+                "reused": max(requests_made - connections, 0),
+            }
+        return stats
+
+def print_connection_stats():
+    """Print a short connection reuse (and response cache) summary per host"""
+    stats = connection_stats()
+    if stats:
+        print("  Connection reuse:")
+        for host, host_stats in stats.items():
+            ratio = host_stats["reused"] / host_stats["requests"] if host_stats["requests"] else 0
+            print(f"    {host}: {host_stats['requests']} requests over "
+                  f"{host_stats['connections']} connections ({ratio:.0%} reused)")
+
+    cache_stats = http_cache.cache_stats()
+    if cache_stats:
+        print(f"  Response cache: {cache_stats['hits']} hits, "
+              f"{cache_stats['revalidated']} revalidated, {cache_stats['misses']} downloaded")
@@ -0,0 +1,87 @@
+"""
+Incremental Runs
+
+Keeps a manifest of the MEP list each stage last processed (data/manifest.json)
+so that a rerun only has to fetch MEPs that were added or whose group,
+country or sort label changed. Rows of unchanged MEPs are carried forward
+from the stage's previous output (the stored dataset of the same name); MEPs
+no longer in the MEP list are dropped.
+"""
+
+import json
+import threading
+from os import path, replace
+
+import pandas as pd
+
+import storage
+from paths import DATA_DIR
+
+MANIFEST_PATH = path.join(DATA_DIR, "manifest.json")
+KEY_COLUMNS = ["group", "country", "sortLabel"]
+
+# Stages run in parallel by pipeline.py update the manifest concurrently
+_manifest_lock = threading.Lock()
+
+def fingerprints(meps_df):
+    """Map each identifier in start.csv to a fingerprint of its key columns"""
+    columns = [column for column in KEY_COLUMNS if column in meps_df.columns]
+    values = meps_df[columns].astype(str).agg("|".join, axis=1)
+    return dict(zip(meps_df["identifier"].astype(str), values))
+
+def load_manifest():
+    """Load the manifest of the previous run (empty if there is none)"""
+    if not path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+def save_manifest(stage, meps_df):
+    """Record the MEP list a stage has just written its output for"""
+    stage_fingerprints = fingerprints(meps_df)
+    with _manifest_lock:
+        manifest = load_manifest()
+        manifest[stage] = stage_fingerprints
+        tmp_path = MANIFEST_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+        replace(tmp_path, MANIFEST_PATH)
+
+def is_unchanged(stage, meps_df):
+    """True if a stage's output was written for exactly this MEP list"""
+    return storage.exists(stage) and load_manifest().get(stage) == fingerprints(meps_df)
+
+def plan(stage, meps_df):
+    """
+    Work out what a stage has to fetch.
+
+    Returns (todo_df, previous_df): the rows of meps_df that are new or
+    changed, and the previous output rows of the unchanged MEPs (None if
+    there is no usable previous output, in which case everything is todo).
+    """
+    previous = load_manifest().get(stage)
+    if previous is None or not storage.exists(stage):
+        return meps_df, None
+
+    current = fingerprints(meps_df)
+    changed = {identifier for identifier, fingerprint in current.items()
+               if previous.get(identifier) != fingerprint}
+    todo_df = meps_df.loc[meps_df["identifier"].astype(str).isin(changed)]
+
+    # Read with the stage's schema, so carried-forward rows are written back unchanged
+    previous_df = storage.load(stage)
+    unchanged = set(current) - changed
+    previous_df = previous_df.loc[previous_df["identifier"].astype(str).isin(unchanged)]
+    return todo_df, previous_df
+
+def combine(meps_df, previous_df, new_df):
+    """Merge carried-forward and freshly fetched rows, in start.csv order"""
+    if previous_df is None:
+        return new_df
+    frames = [df for df in [previous_df, new_df] if len(df.index) > 0]
+    if not frames:
+        return new_df
+    combined_df = pd.concat(frames, ignore_index=True)
+    order = {identifier: position for position, identifier in enumerate(meps_df["identifier"].astype(str))}
+    positions = combined_df["identifier"].astype(str).map(order)
+    return combined_df.loc[positions.sort_values(kind="stable").index].reset_index(drop=True)
@@ -0,0 +1,69 @@
+"""
+Per-MEP Journal
+
+Append-only JSONL checkpoint for long-running loops. Every finished record is
+written (and fsynced) as one line as soon as it is available, so a crashed
+run can be restarted and skip the identifiers it already has. The journal is
+only removed once the records are stored elsewhere: by the caller, after
+saving the stage's dataset (or the output it went into).
+"""
+
+from os import path, makedirs, remove, fsync
+import json
+import math
+import threading
+
+import numpy as np
+
+from paths import DATA_DIR
+
+JOURNAL_DIR = path.join(DATA_DIR, "journal")
+
+def _to_json(value):
+    # NaN is not valid JSON; store it as null
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+class Journal:
+    """JSONL file of (identifier, record) pairs"""
+
+    def __init__(self, name, directory=None):
+        self.path = path.join(directory or JOURNAL_DIR, name + ".jsonl")
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Return the journaled records as {identifier: record}"""
+        records = {}
+        if not path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a run that crashed mid-write
+                    continue
+                record = {key: np.nan if value is None else value for key, value in entry["record"].items()}
+                records[entry["identifier"]] = record
+        return records
+
+    def append(self, identifier, record):
+        """Durably add one finished record"""
+        line = json.dumps({
+            "identifier": str(identifier),
+            "record": {key: _to_json(value) for key, value in record.items()},
+        }, ensure_ascii=False)
+        with self.lock:
+            makedirs(path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(line + "\n")
+                journal_file.flush()
+                fsync(journal_file.fileno())
+
+    def clear(self):
+        """Remove the journal once its records are stored in a saved dataset"""
+        if path.exists(self.path):
+            remove(self.path)
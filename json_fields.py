@@ -0,0 +1,32 @@
+"""
+JSON Field Extraction
+
+Small helpers to read a few fields out of a parsed JSON response without
+building a pandas DataFrame. The paths mirror the flattened column names
+pd.json_normalize would produce ("components.ISO_3166-1_alpha-2" becomes
+("components", "ISO_3166-1_alpha-2")).
+"""
+
+def get_path(document, keys, default=None):
+    """Follow a sequence of dict keys / list indices, or return default"""
+    value = document
+    for key in keys:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return default if value is None else value
+
+def first_value(documents, keys, default=None):
+    """First non-null value of a path across a list of documents"""
+    if isinstance(keys, str):
+        keys = (keys,)
+    for document in documents:
+        value = get_path(document, keys)
+        if value is not None:
+            return value
+    return default
+
+def has_path(documents, keys):
+    """True if any document in the list has a non-null value at the path"""
+    return first_value(documents, keys) is not None
@@ -0,0 +1,98 @@
+"""
+Keyword Classification
+
+Classifies texts by a {category: [keywords]} dictionary (like the degree and
+occupation dictionaries in scraper.py and getwiki.py): a text belongs to
+every category with a keyword contained in it.
+
+Small dictionaries (up to MAX_SUBSTRING_KEYWORDS keywords, such as the degree
+and career dictionaries) are matched with one substring search per keyword,
+stopping at a category's first match; Python's substring search is hard to
+beat at that size. Larger dictionaries are compiled into a single regular
+expression, so a text is classified in one scan whatever the number of
+keywords.
+
+For the regular expression, the keywords are merged into a prefix tree and written out as one nested
+alternation ("la(?:w(?:yer)?|urea)|..."), so the regex engine can skip
+straight to characters that may start a keyword and then follows a single
+branch. At each match position the longest keyword is reported; every
+shorter keyword that is a prefix of it matches there as well, so its
+categories are included too. The scan restarts one character after each
+match start, which makes the result exactly the same as testing
+`keyword in text` for every keyword.
+"""
+
+import re
+
+# Above this many distinct keywords the single regex scan is faster than one
+# substring search per keyword (python benchmarks/bench_keywords.py)
+MAX_SUBSTRING_KEYWORDS = 50
+
+def _trie_pattern(keywords):
+    """Regex alternation of the keywords, factored by common prefixes"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for character in keyword:
+            node = node.setdefault(character, {})
+        node[""] = {}
+
+    def branch(node):
+        children = [re.escape(character) + branch(child)
+                    for character, child in sorted(node.items()) if character]
+        if not children:
+            return ""
+        pattern = children[0] if len(children) == 1 else "(?:" + "|".join(children) + ")"
+        # Greedy optional tail: prefer the longest keyword at a position
+        return "(?:" + pattern + ")?" if "" in node else pattern
+
+    return branch(trie)
+
+class KeywordClassifier:
+    """
+    Multi-keyword matcher built once from a category dict. Dictionaries with
+    more than max_substring_keywords distinct keywords use the regex scan.
+    """
+
+    def __init__(self, category_dict, max_substring_keywords=MAX_SUBSTRING_KEYWORDS):
+        self.categories = list(category_dict.keys())
+        self.category_keywords = [(category, list(keywords)) for category, keywords in category_dict.items()]
+        order = {category: position for position, category in enumerate(self.categories)}
+
+        keyword_categories = {}
+        for category, keywords in category_dict.items():
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword, set()).add(category)
+
+        # The regex and its prefix table are only built for large dictionaries
+        self.pattern = None
+        if len(keyword_categories) > max_substring_keywords:
+            # Categories implied by a match of each keyword, including those
+            # of all keywords that are a prefix of it
+            self.matched_categories = {}
+            for keyword in keyword_categories:
+                categories = set()
+                for other, other_categories in keyword_categories.items():
+                    if keyword.startswith(other):
+                        categories |= other_categories
+                self.matched_categories[keyword] = sorted(categories, key=order.get)
+            self.pattern = re.compile(_trie_pattern(keyword_categories))
+
+    def classify(self, text):
+        """Categories (in dictionary order) with a keyword contained in text"""
+        text = text.lower()
+        if self.pattern is None:
+            found = []
+            for category, keywords in self.category_keywords:
+                for keyword in keywords:
+                    if keyword in text:
+                        found.append(category)
+                        break
+            return found
+
+        found = set()
+        match = self.pattern.search(text)
+        while match:
+            found.update(self.matched_categories[match.group()])
+            match = self.pattern.search(text, match.start() + 1)
+        return [category for category in self.categories if category in found]
@@ -0,0 +1,188 @@
+"""
+Membership Matrix
+
+Committee and delegation memberships as a sparse boolean MEP x body matrix
+instead of the comma-joined `memberships` text. The matrix has one row per
+MEP (`identifiers`) and one column per body code (`vocabulary`, sorted), and
+only stores the memberships themselves: the row and column of every set
+entry, sorted by column, so the members of each body are one contiguous
+slice (compressed sparse column form).
+
+Codes are matched exactly, so a short code no longer matches inside a longer
+one as it does with `memberships.str.contains(code)`. Per-body aggregates are
+a single pass over the set entries instead of one scan of all rows per body:
+
+    matrix = MembershipMatrix.from_output(output_df)
+    matrix.counts()                                 # members per body
+    matrix.share(output_df["gender"] == "FEMALE")   # women's share per body
+    matrix.median(ages)                             # median age per body
+    returned(matrix, former_matrix)                 # MEPs who were re-elected
+
+The pipeline stores the matrix next to the output as the "memberships"
+dataset, one (identifier, body) row per membership; load() reads it back.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+DATASET = "memberships"
+
+class MembershipMatrix:
+    """Sparse boolean MEP x body matrix"""
+
+    def __init__(self, identifiers, vocabulary, rows, columns):
+        self.identifiers = np.asarray(identifiers)
+        self.vocabulary = list(vocabulary)
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        order = np.lexsort((rows, columns))
+        self.rows = rows[order]
+        self.columns = columns[order]
+        # Members of vocabulary[j] are rows[indptr[j]:indptr[j + 1]]
+        self.indptr = np.searchsorted(self.columns, np.arange(len(self.vocabulary) + 1))
+
+    @classmethod
+    def from_codes(cls, identifiers, memberships):
+        """Matrix of comma-joined membership codes, one value per identifier"""
+        # Split every distinct string once (a categorical already lists them)
+        if isinstance(memberships, pd.Series) and memberships.dtype == "category":
+            values, texts = memberships.cat.codes.to_numpy(), memberships.cat.categories.to_numpy(dtype=object)
+        else:
+            values, texts = pd.factorize(np.asarray(memberships, dtype=object))
+        split = [text.split(",") for text in texts.tolist()]
+        sizes = np.fromiter(map(len, split), dtype=np.int64, count=len(split))
+        codes = np.fromiter(itertools.chain.from_iterable(split), dtype=object, count=sizes.sum())
+        entries = pd.DataFrame({"text": np.repeat(np.arange(len(texts)), sizes), "code": codes})
+        entries = entries.loc[entries["code"] != ""].drop_duplicates()
+        entry_columns, vocabulary = pd.factorize(entries["code"].to_numpy(), sort=True)
+        # Give every row the entries of its string (entries are sorted by text)
+        sizes = np.bincount(entries["text"], minlength=len(texts))
+        starts = np.cumsum(sizes) - sizes
+        rows = np.flatnonzero(values >= 0)
+        counts = sizes[values[rows]]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        columns = entry_columns[np.repeat(starts[values[rows]], counts) + offsets]
+        return cls(identifiers, vocabulary, np.repeat(rows, counts), columns)
+
+    @classmethod
+    def from_output(cls, df):
+        """Matrix of an output frame's memberships column"""
+        return cls.from_codes(df["identifier"].to_numpy(), df["memberships"])
+
+    @classmethod
+    def from_frame(cls, df):
+        """Matrix of an (identifier, body) frame as written by to_frame()"""
+        identifiers = pd.unique(df["identifier"])
+        body = pd.Categorical(df["body"].astype(object))
+        member = body.codes >= 0
+        rows = pd.Index(identifiers).get_indexer(df["identifier"])
+        vocabulary = body.categories.astype(str)
+        return cls(identifiers, vocabulary, rows[member], body.codes[member])
+
+    @property
+    def shape(self):
+        return len(self.identifiers), len(self.vocabulary)
+
+    def to_frame(self):
+        """
+        One (identifier, body) row per membership, in row order. MEPs without
+        memberships get a row with a missing body, so the identifiers survive.
+        """
+        empty = np.setdiff1d(np.arange(len(self.identifiers)), self.rows)
+        rows = np.concatenate([self.rows, empty])
+        columns = np.concatenate([self.columns, np.full(len(empty), -1)])
+        order = np.lexsort((columns, rows))
+        return pd.DataFrame({
+            "identifier": self.identifiers[rows[order]],
+            "body": pd.Categorical.from_codes(columns[order], categories=self.vocabulary),
+        })
+
+    def dense(self):
+        """Boolean identifiers x vocabulary array"""
+        matrix = np.zeros(self.shape, dtype=bool)
+        matrix[self.rows, self.columns] = True
+        return matrix
+
+    def members(self, code):
+        """Identifiers of the members of a body"""
+        j = self.vocabulary.index(code)
+        return self.identifiers[self.rows[self.indptr[j]:self.indptr[j + 1]]]
+
+    def align(self, df, column):
+        """Values of df[column] in the matrix's row order (df has an identifier column)"""
+        return df.set_index("identifier")[column].reindex(self.identifiers).to_numpy()
+
+    def counts(self):
+        """Number of members per body"""
+        return pd.Series(np.diff(self.indptr), index=self.vocabulary, name="members")
+
+    def sum(self, values):
+        """Sum of per-MEP values over each body's members (the matrix product M.T @ values)"""
+        weights = np.asarray(values, dtype=float)[self.rows]
+        totals = np.bincount(self.columns, weights=weights, minlength=len(self.vocabulary))
+        return pd.Series(totals, index=self.vocabulary)
+
+    def share(self, mask):
+        """Fraction of each body's members for which mask is true (missing counts as false)"""
+        mask = pd.array(mask, dtype="boolean").fillna(False).to_numpy(dtype=float)
+        return (self.sum(mask) / self.counts()).rename("share")
+
+    def median(self, values):
+        """Median of per-MEP values over each body's members, ignoring missing values"""
+        values = pd.array(values, dtype="Float64").to_numpy(dtype=float, na_value=np.nan)[self.rows]
+        known = ~np.isnan(values)
+        values, columns = values[known], self.columns[known]
+        # Sort values within each body; columns stay sorted
+        order = np.lexsort((values, columns))
+        values = values[order]
+        bodies = np.arange(len(self.vocabulary))
+        starts = np.searchsorted(columns, bodies)
+        sizes = np.searchsorted(columns, bodies, side="right") - starts
+        low = np.minimum(starts + (sizes - 1) // 2, len(values) - 1)
+        high = np.minimum(starts + sizes // 2, len(values) - 1)
+        medians = np.full(len(bodies), np.nan)
+        found = sizes > 0
+        medians[found] = (values[low[found]] + values[high[found]]) / 2
+        return pd.Series(medians, index=self.vocabulary, name="median")
+
+def returned(current, former):
+    """
+    Per body of the current matrix: how many members also sat in the former
+    term (in any body), as a share of the body's current members and of its
+    members in the former term
+    """
+    returning = np.isin(current.identifiers, former.identifiers)
+    current_counts = current.counts()
+    former_counts = former.counts().reindex(current.vocabulary)
+    returned_meps = current.sum(returning).astype(int)
+    return pd.DataFrame({
+        "returned_meps": returned_meps,
+        "current_meps": current_counts,
+        "current_return_ratio": returned_meps / current_counts,
+        "former_return_ratio": returned_meps / former_counts,
+    })
+
+def index_memberships(output_df):
+    """The memberships dataset of an output frame"""
+    return MembershipMatrix.from_output(output_df).to_frame()
+
+def load(data_dir=None):
+    """The stored membership matrix"""
+    return MembershipMatrix.from_frame(storage.load(DATASET, data_dir=data_dir))
+
+def main():
+    """Build the membership matrix of the stored output"""
+    print("Indexing committee memberships...")
+    output_df = storage.load("output", ["identifier", "memberships"])
+    memberships_df = index_memberships(output_df)
+    file_path = storage.save(DATASET, memberships_df)
+    matrix = MembershipMatrix.from_frame(memberships_df)
+    print(f"✓ {matrix.shape[0]} MEPs x {matrix.shape[1]} bodies, {len(matrix.rows)} memberships")
+    print(f"✓ Saved to: {file_path}")
+
+if __name__ == "__main__":
+    main()
@@ -2,133 +2,307 @@
 Step 5: Merge All Data Sources
 
 Merges data from all previous steps (EP API, Parliament database, scraped profiles, 
-Wikidata) into a single consolidated dataset.
+Wikidata) into a single consolidated dataset. FIELDS lists the sources of
+each field in priority order. The provenance column records which source
+supplied each field, as a bitmask (PROVENANCE_BITS); decode_provenance()
+expands it into the provenance sidecar, written with --provenance.
 """
 
 import pandas as pd
 import numpy as np
 from os import path
+import sys
 
-dir = path.dirname(__file__)
+import namematch
+import schema
+import storage
+from paths import DATA_DIR
 
-def keep_highest_degree(degree_string):
-    """Keep only the highest educational degree"""
-    degree_string = str(degree_string)
-    if degree_string != "nan":
-        degree_hierarchy = ["phd", "university", "secondary", "vocational"]
-        degree_list = degree_string.split(",")
-        for degree in degree_hierarchy:
-            if degree in degree_list:
-                return degree
-    return np.nan
+# Columns of the merged dataset, in order
+OUTPUT_COLUMNS = [
+    "identifier", "name", "familyName", "givenName", "country", "group", "gender", "memberships",
+    "born_place", "born_day", "born_month", "born_year", "disability", "relatives", "educated_at",
+    "highest_degree", "occupation",
+]
 
-def main():
+# Where each field of the merged dataset comes from: (rule, columns, sources
+# in priority order). "first" takes all columns of the field from the first
+# source that has a value in its first column (so a birth date is never put
+# together from two sources); "union" joins the distinct comma-separated
+# values of all sources, in source order.
+FIELDS = {
+    "start": ("first", ["identifier", "name", "familyName", "givenName", "country", "group"], ["start"]),
+    "gender": ("first", ["gender"], ["details"]),
+    "memberships": ("first", ["memberships"], ["scraped"]),
+    "born_place": ("first", ["born_place"], ["scraped", "wikidata"]),
+    "born_date": ("first", ["born_year", "born_month", "born_day"], ["scraped", "wikidata"]),
+    "disability": ("first", ["disability"], ["disability"]),
+    "relatives": ("first", ["relatives"], ["wikidata"]),
+    "educated_at": ("first", ["educated_at"], ["wikidata"]),
+    "degrees": ("union", ["degrees"], ["scraped", "wikidata"]),
+    "occupation": ("union", ["occupation"], ["scraped", "wikidata"]),
+}
+
+# Bit of each (field, source) pair in the provenance column, set if the
+# source supplied the field's value (the MEP list columns always come from
+# the MEP list)
+PROVENANCE_BITS = [(field, source) for field, (_, _, sources) in FIELDS.items() if field != "start"
+                   for source in sources]
+
+def match_wikidata(meps_df, wikidata_df):
+    """
+    Position of the Wikidata row of every MEP of meps_df (-1: none), and how
+    many were matched by identifier. Rows are matched on the EP identifier
+    (Wikidata's P1186, the ep_id column) through a hash index; MEPs without
+    a match fall back to matching their name (namematch.py), among the
+    Wikidata rows whose identifier matched nobody. Each key keeps its first
+    Wikidata row, so no MEP is matched twice.
+    """
+    wikidata_df = wikidata_df.reset_index(drop=True)
+    identifiers = pd.to_numeric(meps_df["identifier"], errors="coerce").astype("Int64")
+    if "ep_id" in wikidata_df.columns:
+        ep_ids = pd.to_numeric(wikidata_df["ep_id"], errors="coerce").astype("Int64")
+    else:
+        ep_ids = pd.Series(pd.NA, index=wikidata_df.index, dtype="Int64")
+
+    positions = identifier_positions(ep_ids, identifiers)
+    by_identifier = int((positions >= 0).sum())
+
+    # Then by name (see namematch.py) for the rest, among the Wikidata rows
+    # whose identifier matched nobody
+    names = wikidata_df["name"]
+    names = names[~ep_ids.isin(identifiers.dropna()).to_numpy(dtype=bool) & names.notna().to_numpy()]
+    names = names[~names.str.lower().str.strip().duplicated()]
+    unmatched = np.flatnonzero(positions < 0)
+    if len(names) and len(unmatched):
+        unmatched_df = meps_df.iloc[unmatched]
+        by_name = namematch.NameIndex(names).match(
+            unmatched_df["name"],
+            countries=unmatched_df["country"] if "country" in unmatched_df.columns else None,
+            family_names=unmatched_df["familyName"] if "familyName" in unmatched_df.columns else None,
+        )
+        positions[unmatched] = np.append(names.index.to_numpy(), -1)[by_name]
+    return positions, by_identifier
+
+def identifier_positions(keys, identifiers):
+    """
+    Position in keys of each identifier (-1: none), through a hash index on
+    the integer keys; a key that occurs twice keeps its first row
+    """
+    keys = pd.to_numeric(pd.Series(keys), errors="coerce").astype("Int64").reset_index(drop=True)
+    keyed = keys.notna() & ~keys.duplicated()
+    positions = pd.Index(keys[keyed]).get_indexer(identifiers)
+    # A missing identifier has position -1 and picks the appended -1
+    return np.append(np.flatnonzero(keyed), -1)[positions]
+
+def take(values, positions):
+    """values at positions, missing where the position is -1 (keeps the dtype)"""
+    taken = pd.api.extensions.take(pd.Series(values).array, positions, allow_fill=True)
+    return pd.Series(taken)
+
+def present(values):
+    """Whether each value is there (not missing and not an empty string)"""
+    if pd.api.types.is_string_dtype(values.dtype) or values.dtype == object:
+        return (values.notna() & (values.astype(object) != "")).to_numpy(dtype=bool)
+    return values.notna().to_numpy(dtype=bool)
+
+def coalesce_first(frames, positions, columns, sources):
+    """
+    The columns of the first source that has a value in columns[0], and the
+    source picked for each MEP (-1: none)
+    """
+    count = len(next(iter(positions.values())))
+    picked = np.full(count, -1, dtype=np.int8)
+    available = [(code, source) for code, source in enumerate(sources)
+                 if source in frames and columns[0] in frames[source].columns]
+    for code, source in available:
+        found = present(take(frames[source][columns[0]], positions[source]))
+        picked[(picked < 0) & found] = code
+
+    result = {}
+    for column in columns:
+        values = None
+        for code, source in available:
+            if column not in frames[source].columns:
+                continue
+            chosen = take(frames[source][column], np.where(picked == code, positions[source], -1))
+            values = chosen if values is None else values.fillna(chosen)
+        if values is not None:
+            result[column] = values
+    return result, picked
+
+def coalesce_union(frames, positions, column, sources):
+    """
+    The distinct comma-separated values of column over all sources, joined
+    in source order, and a bit per source that contributed a value to each
+    MEP. Every distinct combination of source values is joined only once.
+    """
+    count = len(next(iter(positions.values())))
+    codes, parts = {}, {}
+    for code, source in enumerate(sources):
+        if source in frames and column in frames[source].columns:
+            values = take(frames[source][column], positions[source]).astype(object)
+            codes[code], texts = pd.factorize(values)
+            parts[code] = [[part.strip() for part in text.split(",") if part.strip()] for text in texts]
+
+    # One code per distinct combination of values (missing: -1 -> 0)
+    key = np.zeros(count, dtype=np.int64)
+    for code in codes:
+        key = key * (len(parts[code]) + 1) + codes[code] + 1
+    combination_codes, combinations = pd.factorize(key)
+    first_rows = np.unique(combination_codes, return_index=True)[1]
+
+    joined = np.full(len(combinations), np.nan, dtype=object)
+    contributed = np.zeros(len(combinations), dtype=np.int8)
+    for combination, row in enumerate(first_rows):
+        values = {}
+        for code in codes:
+            if codes[code][row] >= 0 and parts[code][codes[code][row]]:
+                contributed[combination] |= 1 << code
+                values.update(dict.fromkeys(parts[code][codes[code][row]]))
+        if values:
+            joined[combination] = ",".join(values)
+    return pd.Series(joined[combination_codes]), contributed[combination_codes]
+
+def highest_degree(degrees):
+    """The highest of each comma-joined list of degrees (schema.DEGREE_LEVELS)"""
+    levels = {level: rank for rank, level in enumerate(schema.DEGREE_LEVELS)}
+    codes, texts = pd.factorize(degrees.astype(object))
+    ranks = [max((levels.get(degree, -1) for degree in text.split(",")), default=-1) for text in texts]
+    ranks = np.append(np.array(ranks, dtype=np.int64), -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(ranks, dtype=schema.COLUMNS["highest_degree"]))
+
+def provenance_column(picked, contributed):
+    """The provenance bitmask of every MEP (bits as PROVENANCE_BITS lists them)"""
+    count = len(next(iter(picked.values())))
+    provenance = np.zeros(count, dtype=np.int16)
+    for bit, (field, source) in enumerate(PROVENANCE_BITS):
+        code = FIELDS[field][2].index(source)
+        if field in picked:
+            supplied = picked[field] == code
+        else:
+            supplied = (contributed[field] & (1 << code)) != 0
+        provenance |= supplied.astype(np.int16) << bit
+    return pd.Series(provenance)
+
+def provenance_of(df, field):
+    """
+    The source that supplied field in each row of a merged frame ("+"-joined
+    for a union of several, missing if none)
+    """
+    masks = df["provenance"].to_numpy(dtype=np.int64)
+    bits = [(bit, source) for bit, (bit_field, source) in enumerate(PROVENANCE_BITS) if bit_field == field]
+    # The field's bits as a small code, and the label of every code
+    codes = sum(((masks >> bit) & 1) << position for position, (bit, _) in enumerate(bits))
+    labels = ["+".join(source for position, (_, source) in enumerate(bits) if code >> position & 1) or np.nan
+              for code in range(1 << len(bits))]
+    return pd.Series(np.array(labels, dtype=object)[codes], index=df.index, name=field)
+
+def decode_provenance(df):
+    """
+    The provenance sidecar of a merged frame: one (identifier, field, source)
+    row per field value and the source that supplied it
+    """
+    masks = df["provenance"].to_numpy(dtype=np.int64)
+    identifiers = df["identifier"].to_numpy()
+    rows, fields, sources = [], [], []
+    for bit, (field, source) in enumerate(PROVENANCE_BITS):
+        supplied = np.flatnonzero((masks >> bit) & 1)
+        rows.append(supplied)
+        fields.append(np.full(len(supplied), field, dtype=object))
+        sources.append(np.full(len(supplied), source, dtype=object))
+    rows = np.concatenate(rows)
+    order = np.argsort(rows, kind="stable")
+    return schema.enforce(pd.DataFrame({
+        "identifier": identifiers[rows[order]],
+        "field": np.concatenate(fields)[order],
+        "source": np.concatenate(sources)[order],
+    }))
+
+def load_disability(data_dir=None):
+    """The optional data/disability.csv, or None if there is none"""
+    disability_path = path.join(data_dir or DATA_DIR, "disability.csv")
+    if not path.exists(disability_path):
+        return None
+    return pd.read_csv(disability_path, sep=";")
+
+def merge(start_df, details_df, scraped_df, wikidata_df, disability_df=None):
+    """
+    Merge the stage outputs into the final dataset (one row per MEP of
+    start_df). Every source is indexed once by identifier, and each field is
+    taken from its sources as FIELDS lists them, in one pass over the MEPs.
+    """
+    print("  Indexing data sources...")
+    start_df = start_df[~start_df["identifier"].duplicated()].reset_index(drop=True)
+    # Names are stored lowercase
+    start_df = start_df.assign(name=start_df["name"].str.lower().str.strip())
+    # Frames handed over in memory keep the API's text identifiers, while
+    # CSV files are read back as numbers: join on the numeric value
+    identifiers = pd.to_numeric(start_df["identifier"], errors="coerce").astype("Int64")
+
+    frames = {"start": start_df, "details": details_df, "scraped": scraped_df, "wikidata": wikidata_df}
+    if disability_df is not None:
+        frames["disability"] = disability_df
+    frames = {source: df.reset_index(drop=True) for source, df in frames.items()}
+    positions = {source: identifier_positions(df["identifier"], identifiers)
+                 for source, df in frames.items() if source != "wikidata"}
+
+    print("  Matching Wikidata entries...")
+    positions["wikidata"], by_identifier = match_wikidata(start_df, frames["wikidata"])
+    print(f"  Matched {by_identifier} MEPs by EP identifier, "
+          f"{(positions['wikidata'] >= 0).sum() - by_identifier} by name")
+
+    print("  Combining fields by source priority...")
+    columns, picked, contributed = {}, {}, {}
+    for field, (rule, field_columns, sources) in FIELDS.items():
+        if rule == "first":
+            values, picked[field] = coalesce_first(frames, positions, field_columns, sources)
+            columns.update(values)
+        else:
+            values, contributed[field] = coalesce_union(frames, positions, field_columns[0], sources)
+            if field == "degrees":
+                # Only the highest degree is kept
+                columns["highest_degree"] = highest_degree(values)
+            else:
+                columns[field] = values
+    columns["provenance"] = provenance_column(picked, contributed)
+
+    merged_df = pd.DataFrame(
+        {column: columns[column] for column in OUTPUT_COLUMNS + ["provenance"] if column in columns})
+
+    # Whole-number dates and categorical enumerations (see schema.py)
+    return schema.enforce(merged_df)
+
+def main(provenance_sidecar=False):
     """Merge all data sources into final dataset"""
     print("Merging all data sources...")
     
     # Load all dataframes
-    data_dir = path.join(dir, "..", "data")
-    
     print("  Loading data files...")
-    start_df = pd.read_csv(path.join(data_dir, "start.csv"), sep=";")
-    details_df = pd.read_csv(path.join(data_dir, "details.csv"), sep=";")
-    scraped_df = pd.read_csv(path.join(data_dir, "scraped.csv"), sep=";")
-    wikidata_df = pd.read_csv(path.join(data_dir, "wikidata.csv"), sep=";")
+    start_df = storage.load("start")
+    details_df = storage.load("details")
+    scraped_df = storage.load("scraped")
+    wikidata_df = storage.load("wikidata")
     
     # Load optional disability data if it exists
-    disability_path = path.join(data_dir, "disability.csv")
-    if path.exists(disability_path):
-        disability_df = pd.read_csv(disability_path, sep=";")
-        has_disability_data = True
+    disability_df = load_disability()
+    if disability_df is not None:
         print("  Found disability.csv - including in merge")
     else:
-        has_disability_data = False
         print("  No disability.csv found - skipping")
 
-    # First merge simple ones
-    print("  Merging primary data sources...")
-    first_merge_df = pd.merge(start_df, details_df, on="identifier", how="left")
-    second_merge_df = pd.merge(first_merge_df, scraped_df, on="identifier", how="left")
-
-    # Prepare names to be merged on
-    second_merge_df["name"] = second_merge_df["name"].str.lower().str.strip()
-    wikidata_df["name"] = wikidata_df["name"].str.lower().str.strip()
-
-    # Do the complicated fill-merges for birthplace & -date
-    print("  Filling missing birth data from Wikidata...")
-    
-    # Birthplace
-    wikidata_place_df = wikidata_df[["name", "born_place"]]
-    place_missing = second_merge_df.loc[second_merge_df["born_place"].isna()]["name"].tolist()
-    place_in_df = second_merge_df.loc[second_merge_df["born_place"].notna()][["name", "born_place"]]
-    wikidata_place_df = wikidata_place_df.loc[wikidata_place_df["name"].isin(place_missing)]
-    place_filled_df = pd.concat([place_in_df, wikidata_place_df], ignore_index=True)
-
-    # Birth date
-    wikidata_date_df = wikidata_df[["name", "born_day", "born_month", "born_year"]]
-    date_missing = second_merge_df.loc[second_merge_df["born_year"].isna()]["name"].tolist()
-    date_in_df = second_merge_df.loc[second_merge_df["born_year"].notna()][["name", "born_day", "born_month", "born_year"]]
-    wikidata_date_df = wikidata_date_df.loc[wikidata_date_df["name"].isin(date_missing)]
-    date_filled_df = pd.concat([date_in_df, wikidata_date_df], ignore_index=True)
-
-    # Rest of Wikidata info
-    wikidata_rest_df = wikidata_df[["name", "relatives", "degrees", "educated_at", "occupation"]]
-    second_merge_df = second_merge_df.drop(columns=["born_day", "born_month", "born_year", "born_place"])
-
-    # Merge everything
-    print("  Merging Wikidata biographical information...")
-    third_merge_df = pd.merge(second_merge_df, place_filled_df, on="name", how="left")
-    fourth_merge_df = pd.merge(third_merge_df, date_filled_df, on="name", how="left")
-    
-    if has_disability_data:
-        fifth_merge_df = pd.merge(fourth_merge_df, disability_df, on="identifier", how="left")
-    else:
-        fifth_merge_df = fourth_merge_df
-    
-    merged_df = pd.merge(fifth_merge_df, wikidata_rest_df, on="name", how="left")
-
-    # Merge degrees and occupation columns
-    print("  Consolidating education and occupation data...")
-    merged_df = merged_df.fillna("")
-    merged_df["degrees"] = merged_df.apply(
-        lambda row: ",".join(set(row["degrees_x"].split(",") + row["degrees_y"].split(","))), 
-        axis=1
-    )
-    merged_df["occupation"] = merged_df.apply(
-        lambda row: ",".join(set(row["occupation_x"].split(",") + row["occupation_y"].split(","))), 
-        axis=1
-    )
-    
-    # Clean up merged strings
-    merged_df["degrees"] = merged_df["degrees"].str.strip(",").str.replace(",,", ",")
-    merged_df["occupation"] = merged_df["occupation"].str.strip(",").str.replace(",,", ",")
-    merged_df = merged_df.replace("", np.nan)
-
-    # Only keep the highest degree
-    merged_df["degrees"] = merged_df["degrees"].apply(keep_highest_degree)
-    merged_df = merged_df.rename(columns={"degrees": "highest_degree"})
-
-    # Drop unwanted columns
-    columns_to_drop = ["id", "type", "sortLabel", "officialFamilyName", "officialGivenName",
-                      "degrees_x", "degrees_y", "occupation_x", "occupation_y"]
-    columns_to_drop = [col for col in columns_to_drop if col in merged_df.columns]
-    merged_df = merged_df.drop(columns=columns_to_drop)
-
-    # Drop duplicate rows
-    merged_df = merged_df[~merged_df["identifier"].duplicated()]
-
-    # Convert dates to int
-    for column in ["born_day", "born_month", "born_year"]:
-        merged_df[column] = merged_df[column].fillna(0).astype(int)
-        merged_df[column] = merged_df[column].replace(0, np.nan)
+    merged_df = merge(start_df, details_df, scraped_df, wikidata_df, disability_df)
 
     # Save final output
-    output_path = path.join(data_dir, "output.csv")
-    merged_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+    output_path = storage.save("output", merged_df)
     
     print(f"✓ Successfully merged all data sources")
     print(f"✓ Final dataset contains {len(merged_df)} MEPs with {len(merged_df.columns)} attributes")
     print(f"✓ Saved to: {output_path}")
 
+    if provenance_sidecar:
+        sidecar_path = storage.save("provenance", decode_provenance(merged_df))
+        print(f"✓ Saved provenance sidecar to: {sidecar_path}")
+
 if __name__ == "__main__":
-    main()
+    main(provenance_sidecar="--provenance" in sys.argv[1:])
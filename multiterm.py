@@ -0,0 +1,122 @@
+"""
+Multi-Term Collection
+
+Collects several parliamentary terms in one run and writes a single
+term-partitioned dataset, data/output_terms.csv: the output.csv columns
+for every MEP of every term, with a leading `term` column (rows are grouped
+by term). Historical comparisons such as the follow-up analysis of
+output_former.csv vs output.csv can be made by filtering on `term`.
+
+The MEP lists and Wikidata queries of all terms run concurrently, and all
+requests share the on-disk response cache. MEPs who sat in several terms
+are queried and scraped only once. Profile pages only show an MEP's
+current status, so `memberships` is the same in every term, and
+data/disability.csv only covers the current term: the other terms have no
+`disability` values. Both are printed with the results.
+
+Usage:
+    python multiterm.py --terms 9,10
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import getwiki
+import http_client
+import merger
+import querying
+import scraper
+import start
+import storage
+from journal import Journal
+from paths import DATA_DIR
+from terms import CURRENT_TERM, TERMS, parse_terms
+
+TERM_WORKERS = 3  # terms collected at the same time
+
+# Journals of the MEPs queried and scraped so far, removed once
+# output_terms is saved
+DETAILS_JOURNAL, SCRAPED_JOURNAL = "terms_details", "terms_scraped"
+
+def collect_wikidata(term):
+    """Query and process the Wikidata data of one term"""
+    merged_meps_df, records = getwiki.collect(TERMS[term]["wikidata"], label=f"term {term}: ")
+    print(f"  Term {term}: retrieved {records} Wikidata records")
+    return getwiki.process(merged_meps_df)
+
+def collect_details(meps_df):
+    """Genders of the given MEPs (resumable through a journal)"""
+    identifiers = meps_df["identifier"].tolist()
+    return pd.DataFrame({"identifier": identifiers,
+                         "gender": querying.collect_genders(identifiers, Journal(DETAILS_JOURNAL))})
+
+def collect_profiles(meps_df):
+    """Scraped profile fields of the given MEPs (resumable through a journal)"""
+    journal = Journal(SCRAPED_JOURNAL)
+    journaled = journal.load()
+    mep_urls = scraper.build_profile_urls(meps_df)
+    remaining_urls = [[identifier, url] for identifier, url in mep_urls if identifier not in journaled]
+    scraped = scraper.scrape_all(remaining_urls, on_result=journal.append)
+    records = {identifier: journaled[identifier] if identifier in journaled else scraped[identifier]
+               for identifier, url in mep_urls}
+    scraped_df = pd.DataFrame.from_dict(records).transpose()
+    scraped_df = scraped_df.reset_index().rename(columns={"index": "identifier"})
+    scraped_df["identifier"] = scraped_df["identifier"].astype(meps_df["identifier"].dtype)
+    return scraped_df
+
+def main(terms):
+    """Collect the given terms into data/output_terms.csv; returns the path written"""
+    print(f"Collecting parliamentary terms {', '.join(str(term) for term in terms)}...")
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=TERM_WORKERS) as executor:
+        # Term lists and Wikidata queries run in the background while the
+        # MEPs of all terms are queried and scraped
+        meps_futures = {term: executor.submit(start.fetch_meps, term) for term in terms}
+        wikidata_futures = {term: executor.submit(collect_wikidata, term) for term in terms}
+
+        meps_by_term = {term: future.result() for term, future in meps_futures.items()}
+        for term, meps_df in meps_by_term.items():
+            print(f"  Term {term} ({TERMS[term]['years']}): {len(meps_df)} MEPs")
+
+        all_meps_df = pd.concat(meps_by_term.values(), ignore_index=True).drop_duplicates("identifier")
+        print(f"  {len(all_meps_df)} distinct MEPs across all terms")
+        details_df = collect_details(all_meps_df)
+        scraped_df = collect_profiles(all_meps_df)
+
+        wikidata_by_term = {term: future.result() for term, future in wikidata_futures.items()}
+
+    disability_df = merger.load_disability(DATA_DIR)
+
+    outputs = []
+    for term in terms:
+        merged_df = merger.merge(
+            meps_by_term[term], details_df, scraped_df, wikidata_by_term[term],
+            disability_df if term == CURRENT_TERM else None  # disability.csv covers the current term
+        )
+        merged_df.insert(0, "term", term)
+        outputs.append(merged_df)
+    output_df = pd.concat(outputs, ignore_index=True)
+
+    output_path = storage.save("output_terms", output_df)
+    Journal(DETAILS_JOURNAL).clear()
+    Journal(SCRAPED_JOURNAL).clear()
+
+    print(f"✓ Collected {len(output_df)} MEP-term rows in {time.perf_counter() - started:.1f} s")
+    print("  Note: memberships are each MEP's current committees and delegations in every term "
+          "(profile pages have no history)")
+    if set(terms) - {CURRENT_TERM}:
+        print(f"  Note: disability data only covers term {CURRENT_TERM}; "
+              f"it is empty for term(s) {', '.join(str(term) for term in terms if term != CURRENT_TERM)}")
+    print(f"✓ Saved to: {output_path}")
+    http_client.print_connection_stats()
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect several parliamentary terms into one dataset")
+    parser.add_argument("--terms", default=str(CURRENT_TERM),
+                        help=f"terms to collect, e.g. 9,10 or 8-10 (known: {', '.join(map(str, sorted(TERMS)))})")
+    main(parse_terms(parser.parse_args().terms))
@@ -0,0 +1,144 @@
+"""
+Name Matching
+
+Matches MEP names that are spelled differently in two sources, such as
+Wikidata labels and the names of the European Parliament database, for
+records that share no identifier. Names are normalised (NFKD with the
+combining marks dropped, so cedillas and commas below fold to the same
+letter: "TERHEŞ" and "Terheș" are both "terhes"), split into tokens and
+sorted, so the order of given and family names does not matter.
+
+A NameIndex holds the names of one source. Each name is filed under the
+first letters of each of its tokens (and under its country, if known), so
+a lookup only scores the few names sharing a family-name prefix with it
+instead of every name:
+
+    index = NameIndex(wikidata_df["name"])
+    positions = index.match(output_df["name"], family_names=output_df["familyName"])
+
+Pairs of names where one is the other with names added ("Carles
+Puigdemont" and "Carles Puigdemont i Casamajó") match; otherwise the
+similarity of the sorted names decides. Names no rule can match (a
+different transliteration, for example) go into data/name_exceptions.csv.
+"""
+
+import difflib
+import re
+import unicodedata
+from os import path
+
+import numpy as np
+import pandas as pd
+
+from paths import DATA_DIR
+
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+EXCEPTIONS_PATH = path.join(DATA_DIR, "name_exceptions.csv")
+PREFIX_LENGTH = 3   # letters of a token that file a name in a block
+MIN_SCORE = 0.9     # similarity a match needs
+
+# Letters NFKD does not decompose
+FOLDED = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "æ": "ae", "œ": "oe", "ı": "i", "ħ": "h", "þ": "th"})
+SEPARATORS = re.compile(r"[^\w]+")
+
+def normalise(name):
+    """Lowercase name without accents, cedillas or punctuation"""
+    decomposed = unicodedata.normalize("NFKD", str(name).casefold().translate(FOLDED))
+    letters = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return SEPARATORS.sub(" ", letters).strip()
+
+def tokens(name):
+    """The sorted parts of a normalised name"""
+    return sorted(normalise(name).split())
+
+def similarity(first, second, cutoff=0.0):
+    """Indel similarity of two strings, between 0 and 1 (0 if below cutoff)"""
+    if Indel is not None:
+        return Indel.normalized_similarity(first, second, score_cutoff=cutoff)
+    matcher = difflib.SequenceMatcher(None, first, second, autojunk=False)
+    # Cheap upper bounds first: lengths, then letter counts
+    if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+        return 0.0
+    ratio = matcher.ratio()
+    return ratio if ratio >= cutoff else 0.0
+
+def score(first, second, cutoff=0.0):
+    """
+    Similarity of two token lists: 1 if all parts of one name (at least two,
+    initials aside) are in the other, the similarity of the sorted names
+    otherwise
+    """
+    first_parts = {token for token in first if len(token) > 1}
+    second_parts = {token for token in second if len(token) > 1}
+    shorter, longer = sorted([first_parts, second_parts], key=len)
+    if len(shorter) >= 2 and shorter <= longer:
+        return 1.0
+    return similarity(" ".join(first), " ".join(second), cutoff)
+
+def load_exceptions(exceptions_path=EXCEPTIONS_PATH):
+    """Wikidata name -> EP name for names no rule matches ({} without the file)"""
+    if not path.exists(exceptions_path):
+        return {}
+    exceptions_df = pd.read_csv(exceptions_path, sep=";", dtype=str)
+    return dict(zip(exceptions_df["wikidata_name"], exceptions_df["ep_name"]))
+
+class NameIndex:
+    """Names of one source, blocked by country and token prefix"""
+
+    def __init__(self, names, countries=None):
+        self.tokens = [tokens(name) if pd.notna(name) else [] for name in names]
+        countries = [None] * len(self.tokens) if countries is None else list(countries)
+        self.blocks = {}
+        for position, (parts, country) in enumerate(zip(self.tokens, countries)):
+            # Under (None, prefix) for lookups without a country, and under
+            # the country (or "" if unknown) for the others
+            country = country if pd.notna(country) else ""
+            for prefix in {token[:PREFIX_LENGTH] for token in parts if len(token) > 1}:
+                self.blocks.setdefault((None, prefix), []).append(position)
+                self.blocks.setdefault((country, prefix), []).append(position)
+
+    def candidates(self, parts, country=None):
+        """Positions of the names sharing a block with a token list"""
+        countries = [None] if country is None or pd.isna(country) else [country, ""]
+        found = set()
+        for prefix in {token[:PREFIX_LENGTH] for token in parts if len(token) > 1}:
+            for block in countries:
+                found.update(self.blocks.get((block, prefix), ()))
+        return found
+
+    def match(self, names, countries=None, family_names=None, min_score=MIN_SCORE):
+        """
+        Position in the index of the match of each name (-1: none). Blocks are
+        looked up by the family name's tokens if given, by all tokens
+        otherwise. A name whose best candidates tie matches nothing, and each
+        indexed name is matched at most once, to its best-scoring name.
+        """
+        names = list(names)
+        countries = [None] * len(names) if countries is None else list(countries)
+        family_names = [None] * len(names) if family_names is None else list(family_names)
+
+        pairs = []
+        for row, (name, country, family_name) in enumerate(zip(names, countries, family_names)):
+            if pd.isna(name):
+                continue
+            parts = tokens(name)
+            block_parts = tokens(family_name) if pd.notna(family_name) else parts
+            scored = sorted(((score(parts, self.tokens[position], min_score), position)
+                             for position in self.candidates(block_parts, country)), reverse=True)
+            if not scored or scored[0][0] < min_score:
+                continue
+            if len(scored) > 1 and scored[1][0] == scored[0][0]:
+                continue
+            pairs.append((scored[0][0], row, scored[0][1]))
+
+        positions = np.full(len(names), -1, dtype=np.int64)
+        taken = set()
+        for _, row, position in sorted(pairs, key=lambda pair: -pair[0]):
+            if position not in taken:
+                positions[row] = position
+                taken.add(position)
+        return positions
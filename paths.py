@@ -0,0 +1,23 @@
+"""
+Repository Paths
+
+Where the pipeline keeps its files, all relative to the repository root
+(the directory holding script.py and data/): datasets, journals, the
+incremental-run manifest and the gazetteer index in data/, the HTTP response
+cache in cache/http/, the analysis tables in analysis/ and the OpenCage key
+in opencagekey.txt. Modules resolve their files from here rather than from
+their own directory, so they read and write the repository's data/ whether
+they sit at the root or in scripts/.
+"""
+
+from os import path
+
+dir = path.dirname(path.abspath(__file__))
+
+# Run from scripts/ (the layout of the stage scripts), the root is one level up
+ROOT_DIR = path.dirname(dir) if path.basename(dir) == "scripts" else dir
+
+DATA_DIR = path.join(ROOT_DIR, "data")
+CACHE_DIR = path.join(ROOT_DIR, "cache")
+ANALYSIS_DIR = path.join(ROOT_DIR, "analysis")
+API_KEY_PATH = path.join(ROOT_DIR, "opencagekey.txt")
@@ -0,0 +1,171 @@
+"""
+Pipeline Runner
+
+Runs the pipeline stages in one process as a dependency graph. Every stage
+declares the datasets it reads and the dataset it produces, and starts as
+soon as all of its inputs exist, so independent stages (querying, scraper
+and getwiki only need the MEP list) run at the same time. Datasets are
+handed from stage to stage as DataFrames in memory; storing them in data/
+(see storage.py) is optional per dataset.
+
+At the end a Gantt-style timeline shows when every stage ran and for how
+long, together with the critical path: the chain of stages, each waiting
+for the previous one, that determined the total run time.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import incremental
+import schema
+import storage
+from journal import Journal
+from paths import DATA_DIR
+
+GANTT_WIDTH = 50  # characters of the timeline printed at the end
+
+class Stage:
+    """
+    One pipeline step: function(*inputs) returns the output dataset.
+
+    If manifest_input is set, storing the output also records that dataset
+    (the MEP list) in the incremental-run manifest under the output's name.
+    journals names the journals (journal.py) the stage resumes from; they
+    are cleared once its output is stored, or, if it is not stored, once
+    the whole run has finished. path is the file the output was stored in
+    by the last run (None if it was not stored).
+    """
+
+    def __init__(self, name, function, inputs=(), output=None, description="", manifest_input=None,
+                 journals=()):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.output = output or name
+        self.description = description or name
+        self.manifest_input = manifest_input
+        self.journals = list(journals)
+        self.path = None
+
+def check(stages, available=()):
+    """Raise ValueError unless every input is produced by exactly one source"""
+    producers = set(available)
+    for stage in stages:
+        if stage.output in producers:
+            raise ValueError(f"Dataset '{stage.output}' is produced more than once")
+        producers.add(stage.output)
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in producers]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' needs unknown dataset(s) {missing}")
+    # Every stage must be reachable in dependency order (no cycles)
+    ready, remaining = set(available), list(stages)
+    while remaining:
+        runnable = [stage for stage in remaining if all(name in ready for name in stage.inputs)]
+        if not runnable:
+            raise ValueError(f"Stages {[stage.name for stage in remaining]} depend on each other")
+        ready.update(stage.output for stage in runnable)
+        remaining = [stage for stage in remaining if stage not in runnable]
+
+def is_saved(stage, save):
+    """Whether the run stores a stage's output (save as passed to run)"""
+    return save is True or (save is not False and stage.output in save)
+
+def clear_journals(stage):
+    """Remove a stage's journals, once its records are stored"""
+    for name in stage.journals:
+        Journal(name).clear()
+
+def _run_stage(stage, inputs, save, data_dir):
+    """Run one stage (and write its output if asked); returns (df, start, end)"""
+    start = time.perf_counter()
+    print(f"\n▶ {stage.description}")
+    # Hand the output on with the same dtypes it would have when stored
+    df = schema.enforce(stage.function(*inputs))
+    if save:
+        stage.path = output_path = storage.save(stage.output, df, data_dir)
+        if stage.manifest_input is not None:
+            incremental.save_manifest(stage.output, inputs[stage.inputs.index(stage.manifest_input)])
+        clear_journals(stage)
+        print(f"✓ {stage.name}: {len(df)} rows saved to {output_path}")
+    else:
+        print(f"✓ {stage.name}: {len(df)} rows")
+    return df, start, time.perf_counter()
+
+def run(stages, datasets=None, save=True, workers=None, data_dir=DATA_DIR):
+    """
+    Run the stages, each as soon as its inputs are ready, and return
+    (datasets, timings): every dataset by name, and (start, end) times per
+    stage. save is True (write every output), False, or a collection of the
+    dataset names to write.
+    """
+    datasets = dict(datasets or {})
+    check(stages, datasets)
+
+    pending = list(stages)
+    running = {}
+    timings = {}
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as executor:
+        while pending or running:
+            for stage in [stage for stage in pending if all(name in datasets for name in stage.inputs)]:
+                pending.remove(stage)
+                inputs = [datasets[name] for name in stage.inputs]
+                save_output = is_saved(stage, save)
+                running[executor.submit(_run_stage, stage, inputs, save_output, data_dir)] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    datasets[stage.output], start, end = future.result()
+                except Exception as e:
+                    # Stages already running are finished; no new ones start
+                    print(f"\n❌ Stage {stage.name} failed: {e}")
+                    pending.clear()
+                    raise
+                timings[stage.name] = (start, end)
+
+    # Stages whose output was not stored kept their journals until now, so
+    # that a failure in a later stage does not lose their records
+    for stage in stages:
+        if not is_saved(stage, save):
+            clear_journals(stage)
+    return datasets, timings
+
+def critical_path(stages, timings):
+    """
+    The chain of stages that determined the run time: the stage that
+    finished last, the stage it waited for (the last one to finish before
+    it started: an input, or a busy worker), and so on.
+    """
+    stage = max(stages, key=lambda stage: timings[stage.name][1])
+    chain = [stage]
+    while True:
+        start = timings[stage.name][0]
+        before = [other for other in stages if timings[other.name][1] <= start]
+        if not before:
+            break
+        stage = max(before, key=lambda other: timings[other.name][1])
+        chain.append(stage)
+    return chain[::-1]
+
+def print_timings(stages, timings, width=GANTT_WIDTH):
+    """
+    Print a Gantt chart of when each stage ran, its wall time, and the
+    critical path
+    """
+    origin = min(start for start, end in timings.values())
+    total = max(end for start, end in timings.values()) - origin
+    scale = width / total if total > 0 else 0
+    name_width = max(len(stage.name) for stage in stages)
+    print(f"  Stage timeline ({total:.1f} s):")
+    for stage in stages:
+        start, end = timings[stage.name]
+        first = min(int((start - origin) * scale), width - 1)
+        last = max(int(round((end - origin) * scale)), first + 1)
+        bar = " " * first + "█" * (last - first)
+        print(f"    {stage.name:<{name_width}}  |{bar:<{width}}| {end - start:6.1f} s")
+    chain = critical_path(stages, timings)
+    chain_time = sum(timings[stage.name][1] - timings[stage.name][0] for stage in chain)
+    print(f"  Critical path: {' → '.join(stage.name for stage in chain)} "
+          f"({chain_time:.1f} s of {total:.1f} s wall time)")
@@ -0,0 +1,214 @@
+"""
+MEP Profile Page Parsing Backends
+
+Extracts the raw fields scraper.py needs from the /home and /cv profile
+pages. Three interchangeable backends are available:
+
+- "bs4": BeautifulSoup with html.parser, the reference implementation
+- "lxml": lxml.html with precompiled CSS selectors (needs cssselect)
+- "selectolax": selectolax's Lexbor parser with CSS selectors
+
+All backends return identical results; tests/test_profile_parser.py and
+benchmarks/bench_profile_parser.py check this over the saved HTML fixtures.
+The parsers disagree on some valid markup, so every backend reads the page
+prepared the same way (_prepare):
+
+- CRLF and lone CR line breaks are read as LF, as HTML5 parsers do (pages
+  served over HTTP often use CRLF, which html.parser would keep)
+- CDATA sections are removed: html.parser keeps their contents as text,
+  lxml drops them, and Lexbor keeps them only inside SVG and MathML
+
+Text also never includes the contents of script, style and template
+elements (BeautifulSoup leaves them out of its text; lxml skips them when
+collecting text, selectolax drops them after parsing), and every membership
+badge is listed once, in document order, even inside nested status blocks.
+The fastest installed backend is used by default.
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+BIRTH_DATE = "time.sln-birth-date"
+BIRTH_PLACE = "span.sln-birth-place"
+STATUS_BADGES = "div.erpl_meps-status a.erpl_badge"
+ACTIVITIES = "div.erpl_meps-activity"
+ACTIVITY_TITLE = "h4.erpl_title-h4"
+ACTIVITY_CONTENT = "ul.pl-2"
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Elements whose contents are not page text
+SKIPPED_TAGS = ["script", "style", "template"]
+
+CDATA_SECTION = re.compile(r"<!\[CDATA\[.*?\]\]>", re.DOTALL)
+
+def _prepare(html):
+    """The page as every backend parses it: LF line breaks, no CDATA sections"""
+    html = html.replace("\r\n", "\n").replace("\r", "\n")
+    return CDATA_SECTION.sub("", html) if "<![CDATA[" in html else html
+
+def _bs4_string(text):
+    """
+    BeautifulSoup replaces whitespace-only strings by a single newline (or a
+    space if there is no newline); the other backends do the same so that
+    keyword matching on the text (e.g. " ba ") gives identical results.
+    """
+    if not text.strip(ASCII_SPACES):
+        return "\n" if "\n" in text else " "
+    return text
+
+class Bs4Backend:
+    """Reference implementation (BeautifulSoup, html.parser)"""
+    name = "bs4"
+
+    @staticmethod
+    def _parse(html):
+        return BeautifulSoup(_prepare(html), "html.parser")
+
+    @staticmethod
+    def _text(node):
+        return node.text if node is not None else None
+
+    def home(self, html):
+        """Return birth date text, birth place text and membership badges"""
+        doc = self._parse(html)
+        return {
+            "birth_date": self._text(doc.find("time", {"class": "sln-birth-date"})),
+            "birth_place": self._text(doc.find("span", {"class": "sln-birth-place"})),
+            # A CSS selection lists each badge once, also in nested status blocks
+            "badges": [self._text(badge) for badge in doc.select(STATUS_BADGES)],
+        }
+
+    def cv(self, html):
+        """Return (category title, content text) for each CV section"""
+        doc = self._parse(html)
+        activities = []
+        for activity in doc.find_all("div", {"class": "erpl_meps-activity"}):
+            category = self._text(activity.find("h4", {"class": "erpl_title-h4"}))
+            if category is None:
+                raise AttributeError("CV section without a title")
+            activities.append((category, self._text(activity.find("ul", {"class": "pl-2"}))))
+        return activities
+
+class LxmlBackend:
+    """lxml.html with CSS selectors compiled once to XPath"""
+    name = "lxml"
+
+    def __init__(self):
+        self.birth_date = CSSSelector(BIRTH_DATE)
+        self.birth_place = CSSSelector(BIRTH_PLACE)
+        self.status_badges = CSSSelector(STATUS_BADGES)
+        self.activities = CSSSelector(ACTIVITIES)
+        self.activity_title = CSSSelector(ACTIVITY_TITLE)
+        self.activity_content = CSSSelector(ACTIVITY_CONTENT)
+
+    @classmethod
+    def _strings(cls, node):
+        """Text strings under node, as itertext() without skipped elements"""
+        if node.text and isinstance(node.tag, str):
+            yield node.text
+        for child in node:
+            # Comments (a non-string tag) and skipped elements only keep the
+            # text after them; it stays a separate string, as in BeautifulSoup
+            if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+                yield from cls._strings(child)
+            if child.tail:
+                yield child.tail
+
+    @classmethod
+    def _text(cls, node):
+        return "".join(_bs4_string(text) for text in cls._strings(node))
+
+    def _first_text(self, selector, node):
+        matches = selector(node)
+        return self._text(matches[0]) if matches else None
+
+    def home(self, html):
+        doc = lxml.html.document_fromstring(_prepare(html))
+        return {
+            "birth_date": self._first_text(self.birth_date, doc),
+            "birth_place": self._first_text(self.birth_place, doc),
+            "badges": [self._text(badge) for badge in self.status_badges(doc)],
+        }
+
+    def cv(self, html):
+        doc = lxml.html.document_fromstring(_prepare(html))
+        activities = []
+        for activity in self.activities(doc):
+            category = self._first_text(self.activity_title, activity)
+            if category is None:
+                raise AttributeError("CV section without a title")
+            activities.append((category, self._first_text(self.activity_content, activity)))
+        return activities
+
+class SelectolaxBackend:
+    """selectolax (Lexbor) with CSS selectors"""
+    name = "selectolax"
+
+    @staticmethod
+    def _text(node):
+        return "".join(_bs4_string(child.text_content) for child in node.traverse(include_text=True)
+                       if child.tag == "-text" and child.text_content)
+
+    def _first_text(self, node, selector):
+        match = node.css_first(selector)
+        return self._text(match) if match is not None else None
+
+    @staticmethod
+    def _parse(html):
+        doc = LexborHTMLParser(_prepare(html))
+        doc.strip_tags(SKIPPED_TAGS)
+        return doc
+
+    def home(self, html):
+        doc = self._parse(html)
+        return {
+            "birth_date": self._first_text(doc, BIRTH_DATE),
+            "birth_place": self._first_text(doc, BIRTH_PLACE),
+            "badges": [self._text(badge) for badge in doc.css(STATUS_BADGES)],
+        }
+
+    def cv(self, html):
+        doc = self._parse(html)
+        activities = []
+        for activity in doc.css(ACTIVITIES):
+            category = self._first_text(activity, ACTIVITY_TITLE)
+            if category is None:
+                raise AttributeError("CV section without a title")
+            activities.append((category, self._first_text(activity, ACTIVITY_CONTENT)))
+        return activities
+
+def available_backends():
+    """Names of the backends whose libraries are installed"""
+    backends = ["bs4"]
+    if lxml is not None:
+        backends.append("lxml")
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+_backends = {}
+
+def get_backend(name=None):
+    """Return a backend by name (default: the fastest one installed)"""
+    if name is None:
+        name = available_backends()[-1]
+    if name not in _backends:
+        if name not in available_backends():
+            raise ValueError(f"Parser backend '{name}' is not available "
+                             f"(installed: {', '.join(available_backends())})")
+        backend_class = {"bs4": Bs4Backend, "lxml": LxmlBackend, "selectolax": SelectolaxBackend}[name]
+        _backends[name] = backend_class()
+    return _backends[name]
@@ -3,30 +3,58 @@ Step 2: Query Parliament Database
 
 Queries the European Parliament RDF database for additional MEP details,
 specifically gender information.
+
+Genders are fetched in bulk from the EP open-data SPARQL endpoint (one
+VALUES query per chunk of MEPs). Only MEPs missing from the bulk result are
+looked up one by one via their /person/{id} JSON-LD document. If the bulk
+result covers much less than the MEPs asked for (for example because the
+endpoint no longer knows the gender predicate), a warning says so, as the
+per-person fallback is far slower.
 """
 
-import requests
 import json
 import pandas as pd
 from os import path
-import time
+import sys
+
+import http_client
+import incremental
+import storage
+from journal import Journal
+from json_fields import first_value
 
 dir = path.dirname(__file__)
 
+PERSON_URL = "https://data.europarl.europa.eu/person/{identifier}"
+SPARQL_URL = "https://data.europarl.europa.eu/sparql-endpoint"
+PERSON_IRI = "http://data.europarl.europa.eu/person/{identifier}"
+JOURNAL = "details"  # journal of the per-person lookups (data/journal/)
+
+# Bulk lookup settings
+USE_BULK_QUERY = True
+BULK_CHUNK_SIZE = 100
+BULK_WARN_SHARE = 0.5   # warn if the bulk query finds fewer than this share of the MEPs
+
+GENDER_QUERY = '''PREFIX person: <http://www.w3.org/ns/person#>
+SELECT ?mep ?gender
+WHERE {{
+  VALUES ?mep {{ {values} }}
+  ?mep person:hasGender ?gender.
+}}'''
+
 def query_gender(identifier):
     """Query Parliament database for MEP gender"""
     try:
-        url = f"https://data.europarl.europa.eu/person/{identifier}"
-        response = requests.get(url, headers={"Accept": "application/ld+json"})
+        url = PERSON_URL.format(identifier=identifier)
+        response = http_client.get(url, headers={"Accept": "application/ld+json"})
         response.raise_for_status()
         
         mep_dict = json.loads(response.content)
-        mep_df = pd.json_normalize(mep_dict["@graph"])
         
-        # Extract gender from RDF data
-        if "hasGender" in mep_df.columns:
-            gender_uri = str(mep_df["hasGender"].dropna().values[0])
-            gender = gender_uri.split("/")[-1]
+        # Extract gender from RDF data (first graph node that has one)
+        gender_uri = first_value(mep_dict["@graph"], "hasGender")
+        if gender_uri is not None:
+            gender = str(gender_uri).split("/")[-1]
             return gender
         else:
             return None
@@ -35,42 +63,113 @@ def query_gender(identifier):
         print(f"  Warning: Could not fetch gender for {identifier}: {e}")
         return None
 
-def main():
-    """Query Parliament database for all MEPs"""
-    print("Querying Parliament database for MEP details...")
-    
-    # Load initial MEP list
-    input_path = path.join(dir, "..", "data", "start.csv")
-    meps_df = pd.read_csv(input_path, sep=";")
-    
-    print(f"Processing {len(meps_df)} MEPs...")
-    
-    # Get identifiers
-    mep_identifiers = meps_df["identifier"].tolist()
+def query_genders_bulk(identifiers, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Query the gender of many MEPs with one SPARQL request per chunk.
+
+    Returns {identifier (str): gender}. MEPs without a result (or in a chunk
+    whose request failed) are simply missing from the dict.
+    """
+    genders = {}
+    for start in range(0, len(identifiers), chunk_size):
+        chunk = identifiers[start:start + chunk_size]
+        values = " ".join(f"<{PERSON_IRI.format(identifier=identifier)}>" for identifier in chunk)
+        try:
+            response = http_client.get(
+                SPARQL_URL,
+                params={"query": GENDER_QUERY.format(values=values)},
+                headers={"Accept": "application/sparql-results+json"}
+            )
+            response.raise_for_status()
+            bindings = json.loads(response.content)["results"]["bindings"]
+        except Exception as e:
+            print(f"  Warning: Bulk gender query failed for {len(chunk)} MEPs: {e}")
+            continue
+
+        for binding in bindings:
+            identifier = binding["mep"]["value"].split("/")[-1]
+            genders[identifier] = binding["gender"]["value"].split("/")[-1]
+    return genders
+
+def collect_genders(mep_identifiers, journal, use_bulk=USE_BULK_QUERY):
+    """
+    Gender for each identifier: from the journal of an interrupted run, the
+    bulk SPARQL query, or (for the remaining misses) one request per MEP.
+    """
+    journaled = journal.load()
+    if journaled:
+        print(f"Resuming: {len(journaled)} MEPs already in {journal.path}")
     
-    # Create dataframe for details
-    mep_details_df = pd.DataFrame(mep_identifiers, columns=["identifier"])
+    pending = [identifier for identifier in mep_identifiers if str(identifier) not in journaled]
+    bulk_genders = {}
+    if use_bulk and pending:
+        bulk_genders = query_genders_bulk(pending)
+        print(f"  Bulk query returned gender for {len(bulk_genders)}/{len(pending)} MEPs")
+        if len(bulk_genders) < BULK_WARN_SHARE * len(pending):
+            print(f"  Warning: the bulk gender query found only {len(bulk_genders)} of {len(pending)} MEPs; "
+                  f"the others are queried one by one (check GENDER_QUERY against {SPARQL_URL})")
     
-    # Query each MEP (with progress indicator)
+    # Query each remaining MEP (with progress indicator)
     genders = []
     for i, identifier in enumerate(mep_identifiers, 1):
         if i % 50 == 0:
             print(f"  Processed {i}/{len(mep_identifiers)} MEPs...")
         
+        if str(identifier) in journaled:
+            genders.append(journaled[str(identifier)]["gender"])
+            continue
+        if str(identifier) in bulk_genders:
+            genders.append(bulk_genders[str(identifier)])
+            continue
+        
+        # Paced by the host's politeness budget in http_client
         gender = query_gender(identifier)
         genders.append(gender)
-        
-        # Small delay to avoid overwhelming the server
-        time.sleep(0.1)
+        if gender is not None:
+            journal.append(identifier, {"gender": gender})
+    
+    return genders
+
+def query_details(meps_df, incremental_run=False):
+    """
+    Details (gender) of the MEPs in meps_df. In incremental mode only MEPs
+    added or changed since the last details.csv are queried.
+    """
+    # In incremental mode, only query MEPs added or changed since the last run
+    todo_df, previous_df = meps_df, None
+    if incremental_run:
+        todo_df, previous_df = incremental.plan("details", meps_df)
+    
+    print(f"Processing {len(todo_df)} of {len(meps_df)} MEPs...")
+    
+    # Get identifiers
+    mep_identifiers = todo_df["identifier"].tolist()
+    
+    # Create dataframe for details
+    mep_details_df = pd.DataFrame(mep_identifiers, columns=["identifier"])
+    
+    # Journal of per-person lookups, so an interrupted run can resume; the
+    # caller clears it once the details are saved
+    mep_details_df["gender"] = collect_genders(mep_identifiers, Journal(JOURNAL))
+    return incremental.combine(meps_df, previous_df, mep_details_df)
+
+def main(incremental_run=False):
+    """Query Parliament database for all MEPs (or only new/changed ones)"""
+    print("Querying Parliament database for MEP details...")
+    
+    # Load initial MEP list
+    meps_df = storage.load("start")
     
-    mep_details_df["gender"] = genders
+    mep_details_df = query_details(meps_df, incremental_run)
     
     # Save results
-    output_path = path.join(dir, "..", "data", "details.csv")
-    mep_details_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+    output_path = storage.save("details", mep_details_df)
+    incremental.save_manifest("details", meps_df)
+    Journal(JOURNAL).clear()
     
     print(f"✓ Successfully queried {len(mep_details_df)} MEPs")
     print(f"✓ Saved to: {output_path}")
+    http_client.print_connection_stats()
 
 if __name__ == "__main__":
-    main()
+    main(incremental_run="--incremental" in sys.argv[1:])
@@ -0,0 +1,84 @@
+"""
+Dataset Schema
+
+The dtype of every column of output.csv (and of the same columns in the
+intermediate datasets), in one place. Stored datasets (storage.py) and the
+DataFrames handed between pipeline stages (pipeline.py) are passed through
+enforce(), so a column has the same compact dtype wherever it is read:
+
+- birth dates are nullable integers (Int8 day and month, Int16 year), so
+  missing dates no longer turn whole columns into float64
+- enumerations are categoricals: country, group, gender, born_region and
+  citizenship, and highest_degree as an ordered categorical, so degrees
+  compare and sort by level
+- memberships stays comma-joined text (nearly every MEP has a different
+  combination, so a categorical would save little); memberships.py gives
+  the sparse MEP x body matrix stored next to the output.
+
+Text columns (TEXT_COLUMNS) and columns that are not listed keep the dtype
+pandas infers.
+"""
+
+import pandas as pd
+
+DEGREE_LEVELS = ["vocational", "secondary", "university", "phd"]
+
+COLUMNS = {
+    "term": "Int8",
+    "identifier": "Int32",
+    # wikidata dataset: the EP identifier (P1186) merger.py joins on
+    "ep_id": "Int32",
+    "country": "category",
+    "group": "category",
+    "gender": "category",
+    "citizenship": "category",
+    "born_day": "Int8",
+    "born_month": "Int8",
+    "born_year": "Int16",
+    "disability": "boolean",
+    "born_lat": "Float64",
+    "born_lon": "Float64",
+    "born_region": "category",
+    "highest_degree": pd.CategoricalDtype(DEGREE_LEVELS, ordered=True),
+    # merger.py: bitmask of the sources that supplied each field, and the
+    # provenance sidecar's (identifier, field, source) rows
+    "provenance": "Int16",
+    "field": "category",
+    "source": "category",
+    # memberships dataset (memberships.py): one committee or delegation code per row
+    "body": "category",
+}
+
+# The remaining output.csv columns: free text, left as pandas' string dtype
+TEXT_COLUMNS = ["name", "familyName", "givenName", "born_place", "relatives", "educated_at", "occupation",
+                "memberships"]
+
+NUMERIC_KINDS = ("Int", "Float")
+
+def warn_dropped(column, values, numbers):
+    """Print the values of a column that are not numbers (blank text aside)"""
+    dropped = values[numbers.isna() & values.notna()]
+    dropped = dropped[dropped.astype(str).str.strip() != ""]
+    if len(dropped):
+        examples = ", ".join(repr(value) for value in dropped.unique()[:5])
+        print(f"  Warning: {len(dropped)} {column} value(s) are not numbers and were dropped: {examples}")
+
+def enforce(df):
+    """Cast the listed columns of df to their schema dtype (returns a new frame)"""
+    dtypes = {}
+    converted = {}
+    for column, dtype in COLUMNS.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        values = df[column]
+        if isinstance(dtype, str) and dtype.startswith(NUMERIC_KINDS):
+            # "09", 9 and 9.0 all become 9; text that is not a number is
+            # dropped, with a warning naming it
+            converted[column] = pd.to_numeric(values, errors="coerce")
+            warn_dropped(column, values, converted[column])
+        elif dtype == "boolean" and values.dtype == object:
+            converted[column] = values.map({True: True, False: False, "True": True, "False": False})
+        dtypes[column] = dtype
+    if converted:
+        df = df.assign(**converted)
+    return df.astype(dtypes) if dtypes else df
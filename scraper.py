@@ -5,15 +5,33 @@ Scrapes biographical information from MEP profile pages on europarl.europa.eu
 including birth dates, birthplaces, education, career history, and memberships.
 """
 
-from bs4 import BeautifulSoup
-import requests
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import numpy as np
 import pandas as pd
 from os import path
-import time
+import sys
+
+import http_client
+import incremental
+import profile_parser
+import storage
+from journal import Journal
+from keywords import KeywordClassifier
+from throttle import limiter_for
 
 dir = path.dirname(__file__)
 
+PROFILE_URL = "https://www.europarl.europa.eu/meps/en/{identifier}/{given_name}_{family_name}"
+CV_HEADERS = {"Accept-Language": "en;q=1.0"}
+JOURNAL = "scraped"  # journal of the scraped profiles (data/journal/)
+
+# Requests in flight; the rate per host is the shared budget in throttle.py
+MAX_IN_FLIGHT = 8
+
+# HTML parser backend ("bs4", "lxml" or "selectolax"; None picks the fastest installed)
+PARSER_BACKEND = None
+
 # Define dictionaries for degrees and careers
 degree_dict = {
     "secondary": ["secondary", "gymnasium", "vocat", "apprentice", "high school"],
@@ -36,135 +54,199 @@ career_dict = {
     "labourer": ["welder"]
 }
 
-def scrape_mep(url):
-    """Scrape biographical data from a single MEP profile page"""
-    mep_dict = {}
+degree_classifier = KeywordClassifier(degree_dict)
+career_classifier = KeywordClassifier(career_dict)
+
+def parse_home(html, mep_dict, backend=None):
+    """Extract birth data and memberships from a profile /home page"""
+    fields = profile_parser.get_backend(backend or PARSER_BACKEND).home(html)
 
+    # Birth date
     try:
-        # Scrape main profile page
-        response = requests.get(url + "/home")
-        response.raise_for_status()
-        html = response.text
-        doc = BeautifulSoup(html, "html.parser")
+        birthdate = fields["birth_date"].strip().split("-")
+        mep_dict["born_day"] = int(birthdate[0])
+        mep_dict["born_month"] = int(birthdate[1])
+        mep_dict["born_year"] = int(birthdate[2])
+    except:
+        mep_dict["born_day"] = np.nan
+        mep_dict["born_month"] = np.nan
+        mep_dict["born_year"] = np.nan
 
-        # Birth date
-        try:
-            birthdate = doc.find("time", {"class": "sln-birth-date"})
-            birthdate = birthdate.text.strip().split("-")
-            mep_dict["born_day"] = int(birthdate[0])
-            mep_dict["born_month"] = int(birthdate[1])
-            mep_dict["born_year"] = int(birthdate[2])
-        except:
-            mep_dict["born_day"] = np.nan
-            mep_dict["born_month"] = np.nan
-            mep_dict["born_year"] = np.nan
-
-        # Birth place
-        try:
-            birthplace = doc.find("span", {"class": "sln-birth-place"})
-            mep_dict["born_place"] = birthplace.text
-        except:
-            mep_dict["born_place"] = np.nan
-
-        # Memberships (committees, delegations, etc.)
-        mep_dict["memberships"] = np.nan
-        status_list = doc.findAll("div", {"class": "erpl_meps-status"})
-        for status in status_list:
-            badges = status.findAll("a", {"class": "erpl_badge"})
-            for badge in badges:
-                if not pd.isna(mep_dict["memberships"]):
-                    mep_dict["memberships"] += ","
-                    mep_dict["memberships"] += badge.text
+    # Birth place
+    mep_dict["born_place"] = fields["birth_place"] if fields["birth_place"] is not None else np.nan
+
+    # Memberships (committees, delegations, etc.)
+    mep_dict["memberships"] = ",".join(fields["badges"]) if fields["badges"] else np.nan
+
+    return mep_dict
+
+def parse_cv(html, mep_dict, backend=None):
+    """Extract degree and occupation categories from a profile /cv page"""
+    activity_list = profile_parser.get_backend(backend or PARSER_BACKEND).cv(html)
+
+    mep_dict["degrees"] = np.nan
+    mep_dict["occupation"] = np.nan
+
+    for category, activity_content in activity_list:
+        if category == "Education (qualifications and diplomas)":
+            for key in degree_classifier.classify(activity_content.strip()):
+                if not pd.isna(mep_dict["degrees"]):
+                    mep_dict["degrees"] += "," + key
+                else:
+                    mep_dict["degrees"] = key
+                        
+        if category == "Professional career":
+            for key in career_classifier.classify(activity_content.strip()):
+                if not pd.isna(mep_dict["occupation"]):
+                    mep_dict["occupation"] += "," + key
                 else:
-                    mep_dict["memberships"] = badge.text
-
-        # Scrape CV page
-        headers = {"Accept-Language": "en;q=1.0"}
-        response = requests.get(url + "/cv", headers=headers)
-        response.raise_for_status()
-        html = response.text
-        doc = BeautifulSoup(html, "html.parser")
-                
-        mep_dict["degrees"] = np.nan
-        mep_dict["occupation"] = np.nan
-
-        activity_list = doc.findAll("div", {"class": "erpl_meps-activity"})
-        for activity in activity_list:
-            category = activity.find("h4", {"class": "erpl_title-h4"}).text
-            activity_content = activity.find("ul", {"class": "pl-2"})
-            
-            if category == "Education (qualifications and diplomas)":
-                education_str = activity_content.text.strip().lower()
-                for key in degree_dict.keys(): 
-                    add = False
-                    for word in degree_dict[key]:
-                        if word in education_str:
-                            add = True
-                    if add:
-                        if not pd.isna(mep_dict["degrees"]):
-                            mep_dict["degrees"] += "," + key
-                        else:
-                            mep_dict["degrees"] = key
-                            
-            if category == "Professional career":
-                career_str = activity_content.text.strip().lower()
-                for key in career_dict.keys(): 
-                    add = False
-                    for word in career_dict[key]:
-                        if word in career_str:
-                            add = True
-                    if add:
-                        if not pd.isna(mep_dict["occupation"]):
-                            mep_dict["occupation"] += "," + key
-                        else:
-                            mep_dict["occupation"] = key
+                    mep_dict["occupation"] = key
+
+    return mep_dict
+
+def fetch_page(url, headers=None):
+    """Download a single page and return its HTML"""
+    response = http_client.get(url, headers=headers)
+    response.raise_for_status()
+    return response.text
+
+def scrape_mep(url):
+    """Scrape biographical data from a single MEP profile page"""
+    mep_dict = {}
 
+    try:
+        parse_home(fetch_page(url + "/home"), mep_dict)
+        parse_cv(fetch_page(url + "/cv", headers=CV_HEADERS), mep_dict)
     except Exception as e:
         print(f"    Warning: Error scraping {url}: {e}")
 
     return mep_dict
 
-def main():
-    """Scrape all MEP profile pages"""
-    print("Scraping MEP profile pages...")
-    
-    # Load initial MEP list
-    input_path = path.join(dir, "..", "data", "start.csv")
-    meps_df = pd.read_csv(input_path, sep=";")
-    
-    # Construct URLs for MEP profile pages
+async def scrape_mep_async(url, executor, semaphore, mep_dict):
+    """
+    Scrape a single MEP profile into mep_dict, fetching /home and /cv
+    concurrently. Raises on failure, leaving whatever was parsed so far.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def fetch(page, headers=None):
+        async with semaphore:
+            return await loop.run_in_executor(executor, fetch_page, url + page, headers)
+
+    home_html, cv_html = await asyncio.gather(
+        fetch("/home"), fetch("/cv", CV_HEADERS), return_exceptions=True
+    )
+
+    # Parse in the same order as scrape_mep, so a failed /home page
+    # yields an empty record just like the sequential version
+    for html, parse in [(home_html, parse_home), (cv_html, parse_cv)]:
+        if isinstance(html, Exception):
+            raise html
+        parse(html, mep_dict)
+
+    return mep_dict
+
+async def scrape_all_async(mep_urls, max_in_flight=MAX_IN_FLIGHT, on_result=None):
+    """
+    Scrape a list of (identifier, url) pairs with bounded concurrency.
+
+    on_result(identifier, mep_dict) is called as soon as a profile has been
+    scraped successfully.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    done = 0
+
+    async def scrape(identifier, url):
+        nonlocal done
+        mep_dict = {}
+        try:
+            await scrape_mep_async(url, executor, semaphore, mep_dict)
+            if on_result is not None:
+                on_result(identifier, mep_dict)
+        except Exception as e:
+            print(f"    Warning: Error scraping {url}: {e}")
+        done += 1
+        if done % 50 == 0:
+            print(f"  Processed {done}/{len(mep_urls)} profiles...")
+        return identifier, mep_dict
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        results = await asyncio.gather(*[scrape(identifier, url) for identifier, url in mep_urls])
+
+    # gather keeps the input order, so the CSV rows match start.csv
+    return dict(results)
+
+def scrape_all(mep_urls, max_in_flight=MAX_IN_FLIGHT, on_result=None):
+    """Synchronous entry point for scrape_all_async"""
+    return asyncio.run(scrape_all_async(mep_urls, max_in_flight, on_result))
+
+def build_profile_urls(meps_df, profile_url=None):
+    """Construct (identifier, url) pairs for the MEP profile pages"""
+    profile_url = profile_url or PROFILE_URL
     mep_urls = []
     for idx, row in meps_df.iterrows():
         identifier = str(row["identifier"])
-        given_name = str(row["givenName"])
-        family_name = str(row["familyName"])
-        url = f"https://www.europarl.europa.eu/meps/en/{identifier}/{given_name}_{family_name}"
+        url = profile_url.format(
+            identifier=identifier,
+            given_name=str(row["givenName"]),
+            family_name=str(row["familyName"])
+        )
         mep_urls.append([identifier, url])
-
-    print(f"Scraping {len(mep_urls)} MEP profiles...")
-    print("This may take several minutes...")
+    return mep_urls
+
+def scrape_profiles(meps_df, incremental_run=False):
+    """
+    Scraped profile fields of the MEPs in meps_df. In incremental mode only
+    MEPs added or changed since the last scraped.csv are scraped.
+    """
+    # In incremental mode, only scrape MEPs added or changed since the last run
+    todo_df, previous_df = meps_df, None
+    if incremental_run:
+        todo_df, previous_df = incremental.plan("scraped", meps_df)
+    
+    # Construct URLs for MEP profile pages
+    mep_urls = build_profile_urls(todo_df)
+
+    # Resume from the journal of an interrupted run (the caller clears it
+    # once the profiles are saved)
+    journal = Journal(JOURNAL)
+    journaled = journal.load()
+    remaining_urls = [[identifier, url] for identifier, url in mep_urls if identifier not in journaled]
+    if len(remaining_urls) < len(mep_urls):
+        print(f"Resuming: {len(mep_urls) - len(remaining_urls)} profiles already in {journal.path}")
+
+    print(f"Scraping {len(remaining_urls)} MEP profiles...")
+    print(f"Using up to {MAX_IN_FLIGHT} concurrent requests ({limiter_for(PROFILE_URL).rate:g} requests/s)...")
     
-    # Scrape each profile
+    # Scrape all profiles concurrently, rate limited per host, journaling
+    # every finished profile
+    scraped = scrape_all(remaining_urls, on_result=journal.append)
     dict_of_dicts = {}
-    for i, (identifier, url) in enumerate(mep_urls, 1):
-        if i % 50 == 0:
-            print(f"  Processed {i}/{len(mep_urls)} profiles...")
-        
-        dict_of_dicts[identifier] = scrape_mep(url)
-        
-        # Delay to be respectful to the server
-        time.sleep(0.5)
+    for identifier, url in mep_urls:
+        dict_of_dicts[identifier] = journaled[identifier] if identifier in journaled else scraped[identifier]
     
     # Convert to dataframe
     scraped_df = pd.DataFrame.from_dict(dict_of_dicts).transpose()
     scraped_df = scraped_df.reset_index().rename(columns={"index": "identifier"})
+    return incremental.combine(meps_df, previous_df, scraped_df)
+
+def main(incremental_run=False):
+    """Scrape all MEP profile pages (or only those of new/changed MEPs)"""
+    print("Scraping MEP profile pages...")
+    
+    # Load initial MEP list
+    meps_df = storage.load("start")
+    
+    scraped_df = scrape_profiles(meps_df, incremental_run)
     
     # Save results
-    output_path = path.join(dir, "..", "data", "scraped.csv")
-    scraped_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+    output_path = storage.save("scraped", scraped_df)
+    incremental.save_manifest("scraped", meps_df)
+    Journal(JOURNAL).clear()
     
     print(f"✓ Successfully scraped {len(scraped_df)} MEP profiles")
     print(f"✓ Saved to: {output_path}")
+    http_client.print_connection_stats()
 
 if __name__ == "__main__":
-    main()
+    main(incremental_run="--incremental" in sys.argv[1:])
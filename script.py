@@ -2,23 +2,50 @@
 MEP Data Collector - Main Orchestration Script
 
 This script runs the complete data collection pipeline for Members of the European Parliament.
-It sequentially executes all data collection and processing scripts.
+The stages run in one process (see pipeline.py): the MEP list is
+handed to the querying, scraping and Wikidata stages in memory, those three
+run at the same time, and their results go straight to the merge. Every
+dataset is still stored in data/ unless --no-intermediate is given, in
+which case only the output and its membership matrix are (and with
+--provenance the provenance sidecar, see merger.py). Run with
+--subprocess to run each stage module (start.py, querying.py, ...) as a
+script in its own interpreter instead, one after the other; --incremental
+and --provenance are passed on to the modules that read them.
+
+Run with --incremental to only query and scrape MEPs that were added or
+changed since the previous run; all other rows are carried forward.
+
+Run with --terms (e.g. --terms 8-10) to collect several parliamentary terms
+in one run into data/output_terms.csv instead.
 """
 
+from functools import partial
 from os import path
+import argparse
 import subprocess
 import sys
 
 dir = path.dirname(__file__)
+sys.path.append(path.join(dir, "scripts"))
 
-def run_script(script_name, description):
+def script_path(script_name):
+    """
+    The stage module build_stages would import: the one next to this
+    script, or else the one in scripts/ (the same order as sys.path)
+    """
+    for directory in [dir, path.join(dir, "scripts")]:
+        candidate = path.join(directory, f"{script_name}.py")
+        if path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"No stage script {script_name}.py next to script.py or in scripts/")
+
+def run_script(script_name, description, args=()):
     """Run a Python script and handle errors"""
     print(f"\n{'='*60}")
     print(f"{description}")
     print(f"{'='*60}")
     
-    script_path = path.join(dir, "scripts", f"{script_name}.py")
-    result = subprocess.call([sys.executable, script_path])
+    result = subprocess.call([sys.executable, script_path(script_name), *args])
     
     if result != 0:
         print(f"\n❌ Error running {script_name}.py (exit code: {result})")
@@ -29,37 +56,130 @@ def run_script(script_name, description):
     
     return result
 
-def main():
-    """Execute the complete MEP data collection pipeline"""
-    print("\n" + "="*60)
-    print("MEP DATA COLLECTION PIPELINE")
-    print("European Parliament - 10th Term (2024-2029)")
-    print("="*60)
-    
+def build_stages(incremental_run=False, provenance=False):
+    """The pipeline stages and the datasets they exchange"""
+    import getwiki
+    import memberships
+    import merger
+    import querying
+    import scraper
+    import start
+    from pipeline import Stage
+
+    stages = [
+        Stage("start", start.fetch_meps, [], "start",
+              "Step 1/6: Downloading initial MEP list from EP API"),
+        Stage("querying", partial(querying.query_details, incremental_run=incremental_run), ["start"], "details",
+              "Step 2/6: Querying Parliament database for details", manifest_input="start",
+              journals=[querying.JOURNAL]),
+        Stage("scraper", partial(scraper.scrape_profiles, incremental_run=incremental_run), ["start"], "scraped",
+              "Step 3/6: Scraping MEP profile pages", manifest_input="start",
+              journals=[scraper.JOURNAL]),
+        Stage("getwiki", partial(getwiki.query_wikidata, incremental_run=incremental_run), ["start"], "wikidata",
+              "Step 4/6: Querying Wikidata for biographical data", manifest_input="start"),
+        Stage("merger", lambda *frames: merger.merge(*frames, merger.load_disability()),
+              ["start", "details", "scraped", "wikidata"], "output",
+              "Step 5/6: Merging all data sources"),
+        Stage("memberships", memberships.index_memberships, ["output"], "memberships",
+              "Step 6/6: Indexing committee memberships"),
+    ]
+    if provenance:
+        stages.append(Stage("provenance", merger.decode_provenance, ["output"], "provenance",
+                            "Writing the provenance sidecar"))
+    return stages
+
+def run_in_process(incremental_run=False, save_intermediate=True, provenance=False):
+    """Run all stages in this process, independent stages concurrently; returns the output's path"""
+    import http_client
+    import pipeline
+
+    stages = build_stages(incremental_run, provenance)
+    datasets, timings = pipeline.run(
+        stages, save=True if save_intermediate else ["output", "memberships", "provenance"])
+    print(f"\n{'='*60}")
+    pipeline.print_timings(stages, timings)
+    http_client.print_connection_stats()
+    return next(stage.path for stage in stages if stage.output == "output")
+
+def run_subprocesses(stage_args, provenance=False):
+    """Run each stage script in its own interpreter, one after the other; returns the output's path"""
+    import storage
+
     # Step 1: Download initial list
-    run_script("start", "Step 1/5: Downloading initial MEP list from EP API")
+    run_script("start", "Step 1/6: Downloading initial MEP list from EP API")
     
     # Step 2: Query Parliament database
-    run_script("querying", "Step 2/5: Querying Parliament database for details")
+    run_script("querying", "Step 2/6: Querying Parliament database for details", stage_args)
     
     # Step 3: Scrape profiles
-    run_script("scraper", "Step 3/5: Scraping MEP profile pages")
+    run_script("scraper", "Step 3/6: Scraping MEP profile pages", stage_args)
     
     # Step 4: Query Wikidata
-    run_script("getwiki", "Step 4/5: Querying Wikidata for biographical data")
+    run_script("getwiki", "Step 4/6: Querying Wikidata for biographical data", stage_args)
     
     # Step 5: Merge all data
-    run_script("merger", "Step 5/5: Merging all data sources")
+    run_script("merger", "Step 5/6: Merging all data sources", ["--provenance"] if provenance else [])
+
+    # Step 6: Membership matrix
+    run_script("memberships", "Step 6/6: Indexing committee memberships")
+    # The file merger.py stored the output in (storage picks the same format here)
+    return storage.find("output")[0]
+
+def main():
+    """Execute the complete MEP data collection pipeline"""
+    parser = argparse.ArgumentParser(description="MEP data collection pipeline")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch MEPs that are new or changed since the last run")
+    parser.add_argument("--terms",
+                        help="collect these parliamentary terms (e.g. 9,10 or 8-10) into output_terms.csv")
+    parser.add_argument("--no-intermediate", action="store_true",
+                        help="keep the stage results in memory and only store the output")
+    parser.add_argument("--provenance", action="store_true",
+                        help="also store the provenance sidecar (the source of every field value)")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="run each stage script in its own interpreter, one after the other")
+    args = parser.parse_args()
+    stage_args = ["--incremental"] if args.incremental else []
+
+    if args.terms:
+        import multiterm
+        from terms import parse_terms
+        try:
+            terms = parse_terms(args.terms)
+        except ValueError as error:
+            parser.error(str(error))
+        print("\n" + "="*60)
+        print("MEP DATA COLLECTION PIPELINE")
+        print(f"European Parliament - Terms {args.terms}")
+        print("="*60)
+        print(f"\n{'='*60}")
+        print("Collecting all terms (MEP lists, details, profiles, Wikidata)")
+        print(f"{'='*60}")
+        output_path = multiterm.main(terms)
+        print(f"\nOutput file: {output_path}")
+        return
+
+    print("\n" + "="*60)
+    print("MEP DATA COLLECTION PIPELINE")
+    print("European Parliament - 10th Term (2024-2029)")
+    if args.incremental:
+        print("Incremental run: unchanged MEPs are carried forward")
+    print("="*60)
+    
+    if args.subprocess:
+        output_path = run_subprocesses(stage_args, args.provenance)
+    else:
+        output_path = run_in_process(args.incremental, save_intermediate=not args.no_intermediate, provenance=args.provenance)
     
-    # Optional Step 6: Geocoding (commented out by default)
+    # Optional Step 7: Geocoding (commented out by default)
     # Uncomment the following lines to enable geocoding
     # print("\nNote: Geocoding requires an OpenCage API key in opencagekey.txt")
-    # run_script("geocoding", "Step 6/6 (Optional): Geocoding birthplaces")
+    # run_script("geocoding", "Step 7/7 (Optional): Geocoding birthplaces")
     
     print("\n" + "="*60)
     print("✓ PIPELINE COMPLETED SUCCESSFULLY")
     print("="*60)
-    print(f"\nOutput file: {path.join(dir, 'data', 'output.csv')}")
+    print(f"\nOutput file: {output_path}")
     print("\nTo enable geocoding:")
     print("1. Get a free API key from https://opencagedata.com/")
     print("2. Save it to opencagekey.txt in the project root")
@@ -3,8 +3,11 @@ import json
 import pandas as pd
 import numpy as np
 from os import path
+import sys
 
 dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+from json_fields import get_path
 
 def geocode(born_place):
     born_place = str(born_place)
@@ -14,28 +17,17 @@ def geocode(born_place):
     key = open(path.join(dir, "..", "opencagekey.txt"), "r").read()
     url = "https://api.opencagedata.com/geocode/v1/json?q=" + born_place + "&key=" + key + "&proximity=50.0594725,14.1538226"
     response = requests.get(url)
-    geocoded_dict = json.loads(response.content)
-    geocoded_df = pd.json_normalize(geocoded_dict["results"])
-    if "confidence" in geocoded_df.columns:
-        geocoded_df = geocoded_df.sort_values(by = "confidence", ascending = False)
+    results = json.loads(response.content)["results"]
+    if any("confidence" in result for result in results):
+        results = sorted(results, key = lambda result: result.get("confidence", float("-inf")), reverse = True)
     # Exclude establishments named after places
-    if "components.house_number" in geocoded_df.columns:
-        geocoded_df = geocoded_df.loc[geocoded_df["components.house_number"].isna()].reset_index()
+    results = [result for result in results if get_path(result, ("components", "house_number")) is None]
     # If there are no results left, return nan
-    if len(geocoded_df.index) == 0:
+    if len(results) == 0:
         return pd.Series([np.nan, np.nan, np.nan])
-    if "components.ISO_3166-1_alpha-2" in geocoded_df.columns:
-        born_country = geocoded_df["components.ISO_3166-1_alpha-2"][0]
-    else:
-        born_country = np.nan
-    if "annotations.DMS.lat" in geocoded_df.columns:
-        born_lat = geocoded_df["annotations.DMS.lat"][0]
-    else:
-        born_lat = np.nan
-    if "annotations.DMS.lng" in geocoded_df.columns:
-        born_lng = geocoded_df["annotations.DMS.lng"][0]
-    else:
-        born_lng = np.nan
+    born_country = get_path(results[0], ("components", "ISO_3166-1_alpha-2"), np.nan)
+    born_lat = get_path(results[0], ("annotations", "DMS", "lat"), np.nan)
+    born_lng = get_path(results[0], ("annotations", "DMS", "lng"), np.nan)
     return pd.Series([born_country, born_lat, born_lng])
 
 def geoclassify(born_country, country):
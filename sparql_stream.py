@@ -0,0 +1,110 @@
+"""
+Streaming SPARQL Results
+
+Reads a SPARQL SELECT result as CSV straight from the HTTP response and
+folds the bindings into one accumulator per group (one per MEP) as they
+arrive. The OPTIONAL joins in the Wikidata query return the cartesian
+product of relatives x degrees x educations x occupations, so the number of
+binding rows grows much faster than the number of MEPs; with streaming,
+memory is bounded by the number of groups instead of the number of rows.
+"""
+
+import codecs
+import csv
+
+import pandas as pd
+
+import http_client
+
+CSV_HEADERS = {"Accept": "text/csv"}
+
+CHUNK_SIZE = 64 * 1024
+
+def _iter_lines(response):
+    """Decoded lines of a streamed response, line endings kept for csv"""
+    pending = ""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        # Only "\n" ends a line: labels may contain other line separators
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def iter_csv_bindings(response):
+    """Yield each result row of a streamed CSV SPARQL response as a dict"""
+    response.raise_for_status()
+    try:
+        yield from csv.DictReader(_iter_lines(response))
+    finally:
+        response.close()
+
+def query_csv(endpoint, query, cache=True, **kwargs):
+    """
+    Run a SELECT query and yield its bindings while they are read. The
+    response goes through the on-disk cache (unless cache=False) without
+    being held in memory: a cached result is read back from disk, and a
+    downloaded one is written to the cache while it is parsed.
+    """
+    response = http_client.get(
+        endpoint, params={"query": query}, headers=CSV_HEADERS, cache=cache, stream=True, **kwargs
+    )
+    return iter_csv_bindings(response)
+
+class GroupAccumulator:
+    """
+    Collects the distinct non-empty values of the list columns for every
+    distinct combination of the group columns.
+    """
+
+    def __init__(self, group_columns, list_columns):
+        self.group_columns = list(group_columns)
+        self.list_columns = list(list_columns)
+        self.groups = {}
+        self.rows = 0
+
+    def add(self, binding):
+        """Fold one binding (a dict of variable -> value) into its group"""
+        self.rows += 1
+        key = tuple(binding.get(column) or "" for column in self.group_columns)
+        values = self.groups.get(key)
+        if values is None:
+            values = self.groups[key] = [set() for _ in self.list_columns]
+        for column_values, column in zip(values, self.list_columns):
+            value = binding.get(column)
+            if value:
+                column_values.add(value)
+
+    def add_group(self, binding, values):
+        """
+        Merge pre-collected values into a group: binding holds the group
+        columns, values maps list columns to iterables of values.
+        """
+        key = tuple(binding.get(column) or "" for column in self.group_columns)
+        group_values = self.groups.setdefault(key, [set() for _ in self.list_columns])
+        for column_values, column in zip(group_values, self.list_columns):
+            column_values.update(value for value in values.get(column, ()) if value)
+
+    def add_all(self, bindings):
+        for binding in bindings:
+            self.add(binding)
+        return self
+
+    def to_frame(self, column_names=None):
+        """
+        One row per group, sorted by the group columns, with the values of
+        each list column sorted and comma-joined. column_names optionally
+        maps the variable names to output column names.
+        """
+        column_names = column_names or {}
+        records = []
+        for key in sorted(self.groups):
+            record = dict(zip(self.group_columns, key))
+            for column, values in zip(self.list_columns, self.groups[key]):
+                record[column] = ",".join(sorted(values))
+            records.append(record)
+        frame = pd.DataFrame(records, columns=self.group_columns + self.list_columns, dtype=object)
+        return frame.rename(columns=column_names)
@@ -8,45 +8,70 @@ Downloads basic information including names, countries, and political groups.
 import requests
 import json
 import pandas as pd
-from os import path, makedirs
+from os import path
+
+import http_client
+import storage
 
 dir = path.dirname(__file__)
 
-def main():
-    """Fetch current MEPs from European Parliament API"""
-    print("Fetching MEP list from European Parliament API...")
-    
-    try:
-        # Query the EP API for current MEPs
-        query_result = requests.get(
-            "https://data.europarl.europa.eu/api/v1/meps/show-current",
-            headers={"Accept": "application/ld+json"}
+CURRENT_MEPS_URL = "https://data.europarl.europa.eu/api/v1/meps/show-current"
+TERM_MEPS_URL = "https://data.europarl.europa.eu/api/v1/meps"
+PAGE_SIZE = 500
+
+def fetch_meps(term=None):
+    """
+    Fetch the MEP list from the EP API: the current MEPs, or everyone who
+    sat during parliamentary term `term` (a term number, e.g. 9).
+    """
+    if term is None:
+        query_result = http_client.get(
+            CURRENT_MEPS_URL,
+            headers={"Accept": "application/ld+json"},
+            cache=False  # always fetch the current membership
         )
         query_result.raise_for_status()
         
         # Parse JSON response
         meps_dict = json.loads(query_result.content)
         meps_df = pd.json_normalize(meps_dict["data"])
+    else:
+        # Term membership rarely changes, so pages are read through the cache
+        pages = []
+        while True:
+            query_result = http_client.get(
+                TERM_MEPS_URL,
+                params={"parliamentary-term": term, "offset": len(pages) * PAGE_SIZE, "limit": PAGE_SIZE},
+                headers={"Accept": "application/ld+json"}
+            )
+            query_result.raise_for_status()
+            page = json.loads(query_result.content)["data"]
+            pages.append(pd.json_normalize(page))
+            if len(page) < PAGE_SIZE:
+                break
+        meps_df = pd.concat(pages, ignore_index=True)
+    
+    # Rename columns for clarity
+    return meps_df.rename(columns={
+        "label": "name",
+        "api:country-of-representation": "country",
+        "api:political-group": "group"
+    })
+
+def main():
+    """Fetch current MEPs from European Parliament API"""
+    print("Fetching MEP list from European Parliament API...")
+    
+    try:
+        # Query the EP API for current MEPs
+        meps_df = fetch_meps()
         
-        # Rename columns for clarity
-        meps_df = meps_df.rename(columns={
-            "label": "name",
-            "api:country-of-representation": "country",
-            "api:political-group": "group"
-        })
-        
-        # Create data directory if it doesn't exist
-        data_directory = path.join(dir, "..", "data")
-        if not path.exists(data_directory):
-            makedirs(data_directory)
-            print(f"Created data directory: {data_directory}")
-        
-        # Save to CSV
-        output_path = path.join(dir, "..", "data", "start.csv")
-        meps_df.to_csv(output_path, sep=";", encoding="utf-8", index=False)
+        # Save (the data directory is created if it doesn't exist)
+        output_path = storage.save("start", meps_df)
         
         print(f"✓ Successfully downloaded {len(meps_df)} MEPs")
         print(f"✓ Saved to: {output_path}")
+        http_client.print_connection_stats()
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Error fetching data from EP API: {e}")
@@ -0,0 +1,108 @@
+"""
+Dataset Storage
+
+Reads and writes the pipeline's datasets (start, details, scraped, wikidata,
+output, ...) in data/. Two interchangeable backends are available:
+
+- "parquet": Apache Parquet through pyarrow. Columns keep their dtypes,
+  country, group and gender are dictionary-encoded, and reads decode
+  straight into typed columns instead of parsing text.
+- "csv": the semicolon-separated files the pipeline has always written.
+
+Both backends apply the same explicit schema (schema.py) on write and on
+read, so identifiers stay integers and birth dates stay whole numbers
+(`born_day` is 30, not 30.0) whichever is used. Parquet is used when pyarrow
+is installed. load() falls back to a file in the other format, so data from
+earlier runs keeps working. The datasets in EXPORTS (output, output_terms)
+are always written as CSV as well, for spreadsheets and the analysis notebooks.
+"""
+
+from os import makedirs, path
+
+import pandas as pd
+
+import schema
+from paths import DATA_DIR
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Storage backend ("parquet" or "csv"; None picks parquet if pyarrow is installed)
+FORMAT = None
+
+# Datasets that are also written as CSV, whatever the backend
+EXPORTS = {"output", "output_terms"}
+
+EXTENSIONS = {"parquet": ".parquet", "csv": ".csv"}
+
+def available_formats():
+    """Names of the backends whose libraries are installed"""
+    formats = ["csv"]
+    if pyarrow is not None:
+        formats.append("parquet")
+    return formats
+
+def get_format(format=None):
+    """The backend to use (default: FORMAT, or parquet if it is installed)"""
+    format = format or FORMAT or available_formats()[-1]
+    if format not in available_formats():
+        raise ValueError(f"Storage format '{format}' is not available "
+                         f"(installed: {', '.join(available_formats())})")
+    return format
+
+def dataset_path(name, format=None, data_dir=None):
+    """Path of a dataset's file in the given (or default) format"""
+    return path.join(data_dir or DATA_DIR, name + EXTENSIONS[get_format(format)])
+
+def _read(file_path, format, columns=None):
+    if format == "parquet":
+        return pd.read_parquet(file_path, columns=columns)
+    return pd.read_csv(file_path, sep=";", usecols=columns)
+
+def find(name, data_dir=None):
+    """
+    Path and format of a stored dataset: the file in the current format, or
+    else one in another installed format; (None, None) if there is none
+    """
+    current = get_format()
+    for format in [current] + [other for other in available_formats() if other != current]:
+        file_path = dataset_path(name, format, data_dir)
+        if path.exists(file_path):
+            return file_path, format
+    return None, None
+
+def exists(name, data_dir=None):
+    """True if the dataset has been stored in any installed format"""
+    return find(name, data_dir)[0] is not None
+
+def load(name, columns=None, data_dir=None):
+    """Read a dataset (optionally only some columns) with the schema applied"""
+    file_path, format = find(name, data_dir)
+    if file_path is None:
+        raise FileNotFoundError(f"No stored dataset '{name}' in {data_dir or DATA_DIR}")
+    return schema.enforce(_read(file_path, format, columns))
+
+def save(name, df, data_dir=None):
+    """Write a dataset with the schema applied; returns the path written"""
+    df = schema.enforce(df)
+    data_dir = data_dir or DATA_DIR
+    makedirs(data_dir, exist_ok=True)
+    format = get_format()
+    file_path = dataset_path(name, format, data_dir)
+    if format == "parquet":
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_csv(file_path, sep=";", encoding="utf-8", index=False)
+    if name in EXPORTS and format != "csv":
+        export_csv(name, df, data_dir)
+    return file_path
+
+def export_csv(name, df=None, data_dir=None):
+    """Write a dataset (by default the stored one) as data/<name>.csv"""
+    if df is None:
+        df = load(name, data_dir=data_dir)
+    csv_path = dataset_path(name, "csv", data_dir)
+    df.to_csv(csv_path, sep=";", encoding="utf-8", index=False)
+    return csv_path
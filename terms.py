@@ -0,0 +1,32 @@
+"""
+Parliamentary Terms
+
+The European Parliament terms the pipeline can collect, with the Wikidata
+entity used to find each term's MEPs. Add a term here (EP term number and
+Wikidata entity) to make it available to multiterm.py. Terms 1-7 are not
+registered yet, so asking for them is an error rather than a partial run.
+"""
+
+TERMS = {
+    8: {"wikidata": "Q18171345", "years": "2014-2019"},
+    9: {"wikidata": "Q64038205", "years": "2019-2024"},
+    10: {"wikidata": "Q75984568", "years": "2024-2029"},
+}
+
+CURRENT_TERM = 10
+
+def parse_terms(text):
+    """Term numbers from a string like "9,10" or "8-10", checked against TERMS"""
+    terms = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            terms.update(range(int(first), int(last) + 1))
+        elif part:
+            terms.add(int(part))
+    unknown = sorted(terms - set(TERMS))
+    if unknown:
+        raise ValueError(f"Parliamentary term(s) {', '.join(map(str, unknown))} not supported: "
+                         f"only terms {', '.join(map(str, sorted(TERMS)))} have a Wikidata entity in terms.TERMS")
+    return sorted(terms)
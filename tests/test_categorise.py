@@ -0,0 +1,63 @@
+"""
+Parity of getwiki.categorise_column with the previous row-wise categorise()
+
+Every entry must get the same categories, in the same order, as the keyword
+loops applied row by row (benchmarks/bench_categorise.py), including empty
+and missing entries, labels without a keyword, repeated categories and
+labels that differ only in case or spacing.
+
+Usage:
+    python -m pytest tests/
+"""
+
+import sys
+from os import path
+
+import pandas as pd
+import pytest
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+sys.path.insert(0, path.join(dir, "..", "benchmarks"))
+
+import getwiki
+from bench_categorise import categorise, synthetic_column
+
+DICTIONARIES = [
+    (getwiki.degree_dict, getwiki.degree_classifier),
+    (getwiki.occupation_dict, getwiki.occupation_classifier),
+]
+
+EDGE_CASES = [
+    "",
+    None,
+    "Master of Laws",
+    "Master of Laws,Bachelor of Arts,Doctor of Philosophy",
+    "Abitur",
+    "Abitur, abitur ,ABITUR",
+    "politician,lawyer,Politician,member of parliament",
+    "farmer,,teacher",
+    " physician , trade unionist,surgeon",
+    "licentiate,Master of Science,licentiate",
+    "Master of Laws",
+]
+
+def expected_column(entries, category_dict):
+    return pd.Series([categorise(entry, category_dict) for entry in entries], dtype=object)
+
+@pytest.mark.parametrize("category_dict, classifier", DICTIONARIES)
+def test_edge_cases_match_row_wise(category_dict, classifier):
+    result = getwiki.categorise_column(pd.Series(EDGE_CASES, dtype=object), classifier)
+    pd.testing.assert_series_equal(result, expected_column(EDGE_CASES, category_dict))
+
+@pytest.mark.parametrize("category_dict, classifier", DICTIONARIES)
+def test_synthetic_column_matches_row_wise(category_dict, classifier):
+    column = synthetic_column(category_dict, rows=3000, distinct=400)
+    result = getwiki.categorise_column(column, classifier)
+    pd.testing.assert_series_equal(result, expected_column(column, category_dict))
+
+def test_index_and_name_are_kept():
+    column = pd.Series(["lawyer", "", "Abitur"], index=[10, 20, 30], name="occupation", dtype=object)
+    result = getwiki.categorise_column(column, getwiki.occupation_classifier)
+    assert result.index.tolist() == [10, 20, 30] and result.name == "occupation"
+    assert result[10] == "lawyer" and pd.isna(result[20]) and result[30] == "abitur"
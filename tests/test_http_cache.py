@@ -0,0 +1,56 @@
+"""
+Credentials and the HTTP response cache
+
+An API key in the query string (OpenCage's key=...) must not be written to
+cache/http/, neither in the index nor in the cache key.
+
+Usage:
+    python -m pytest tests/
+"""
+
+import sqlite3
+import sys
+from os import path, walk
+
+import requests
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import http_cache
+
+SECRET = "s3cr3t-api-key"
+URL = f"https://api.opencagedata.com/geocode/v1/json?q=48.2%2C16.37&key={SECRET}&no_annotations=1"
+
+def ok_response(url):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"results": []}'
+    response.url = url
+    return response
+
+def test_redact_url_drops_only_credentials():
+    assert http_cache.redact_url(URL) == "https://api.opencagedata.com/geocode/v1/json?q=48.2%2C16.37&no_annotations=1"
+    plain = "https://query.wikidata.org/sparql?query=SELECT%20%3Fx&format=json"
+    assert http_cache.redact_url(plain) == plain
+
+def test_api_key_is_not_stored(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    response = cache.fetch(URL, None, lambda headers: ok_response(URL))
+    assert response.status_code == 200 and response.url == URL
+
+    stored_urls = [url for (url,) in sqlite3.connect(tmp_path / "index.sqlite").execute("SELECT url FROM entries")]
+    assert stored_urls == [http_cache.redact_url(URL)]
+    for root, _, files in walk(tmp_path):
+        for name in files:
+            assert SECRET not in name
+            with open(path.join(root, name), "rb") as stored_file:
+                assert SECRET.encode() not in stored_file.read()
+
+def test_other_key_reads_the_same_entry(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    cache.fetch(URL, None, lambda headers: ok_response(URL))
+    other_url = URL.replace(SECRET, "another-key")
+    response = cache.fetch(other_url, None, lambda headers: ok_response(other_url))
+    assert response.from_cache and response.url == other_url
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,79 @@
+"""
+Parity of the profile parser backends
+
+Every installed backend must extract the same fields as the bs4 reference
+from every saved page in benchmarks/fixtures/, including the pages with
+script, style and template elements and nested status blocks, and the
+pages with CRLF line breaks and CDATA sections (*_crlf.html, which
+.gitattributes keeps byte for byte).
+
+Usage:
+    python -m pytest tests/
+"""
+
+import glob
+import sys
+from os import path
+
+import pytest
+
+dir = path.dirname(__file__)
+sys.path.insert(0, path.join(dir, ".."))
+
+import profile_parser
+import scraper
+
+FIXTURES_DIR = path.join(dir, "..", "benchmarks", "fixtures")
+FAST_BACKENDS = profile_parser.available_backends()[1:]
+
+def read_fixture(name):
+    with open(path.join(FIXTURES_DIR, name), "r", encoding="utf-8", newline="") as fixture_file:
+        return fixture_file.read()
+
+def fixture_names(kind):
+    return sorted(path.basename(name) for name in glob.glob(path.join(FIXTURES_DIR, f"profile_{kind}*.html")))
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("name", fixture_names("home"))
+def test_home_matches_bs4(backend, name):
+    html = read_fixture(name)
+    assert profile_parser.get_backend(backend).home(html) == profile_parser.get_backend("bs4").home(html)
+    assert scraper.parse_home(html, {}, backend) == scraper.parse_home(html, {}, "bs4")
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("name", fixture_names("cv"))
+def test_cv_matches_bs4(backend, name):
+    html = read_fixture(name)
+    assert profile_parser.get_backend(backend).cv(html) == profile_parser.get_backend("bs4").cv(html)
+    assert scraper.parse_cv(html, {}, backend) == scraper.parse_cv(html, {}, "bs4")
+
+@pytest.mark.parametrize("backend", profile_parser.available_backends())
+def test_script_text_is_skipped(backend):
+    home = profile_parser.get_backend(backend).home(read_fixture("profile_home_script.html"))
+    assert home["birth_place"] == "Sankt\xa0Pölten \n"
+    activities = dict(profile_parser.get_backend(backend).cv(read_fixture("profile_cv_script.html")))
+    assert "injected" not in activities["Education (qualifications and diplomas)"]
+    assert "draft" not in activities["Professional career"]
+
+@pytest.mark.parametrize("backend", profile_parser.available_backends())
+def test_nested_status_badges_count_once(backend):
+    home = profile_parser.get_backend(backend).home(read_fixture("profile_home_script.html"))
+    assert home["badges"] == ["LIBE", "AGRI"]
+
+@pytest.mark.parametrize("backend", profile_parser.available_backends())
+def test_crlf_is_read_as_lf(backend):
+    home = profile_parser.get_backend(backend).home(read_fixture("profile_home_crlf.html"))
+    assert home["birth_place"] == "Nowy\nTarg\n\n"
+    assert home["badges"] == ["ITRE", "ENVI\n"]
+    activities = dict(profile_parser.get_backend(backend).cv(read_fixture("profile_cv_crlf.html")))
+    assert activities["Education (qualifications and diplomas)"] == \
+        "\n1987-1992: Economics,\nJagiellonian University\n1993:Postgraduate studies\n"
+
+@pytest.mark.parametrize("backend", profile_parser.available_backends())
+def test_cdata_is_not_text(backend):
+    home = profile_parser.get_backend(backend).home(read_fixture("profile_home_crlf.html"))
+    assert "Lesser Poland" not in home["birth_place"] and "icon" not in home["badges"][0]
+    cv_html = read_fixture("profile_cv_crlf.html")
+    activities = dict(profile_parser.get_backend(backend).cv(cv_html))
+    assert activities["Professional career"] == "\n1993-2004: Engineer\n\n"
+    assert scraper.parse_cv(cv_html, {}, backend) == {"degrees": "university,phd", "occupation": "engineer"}
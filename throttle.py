@@ -0,0 +1,93 @@
+"""
+Request Throttling
+
+Token-bucket rate limiting for the data collection scripts. A bucket refills
+at a steady rate and allows short bursts up to its capacity, which keeps the
+average request rate against a host bounded without a fixed sleep between
+requests.
+
+There is one bucket per host, shared by every stage: http_client takes a
+token before each request that goes over the network, so stages running
+at the same time stay within the host's politeness budget together.
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Default politeness budget per host (requests per second, burst size)
+DEFAULT_RATE = 8.0
+DEFAULT_BURST = 8
+
+# Budgets of the hosts the pipeline talks to (requests per second, burst size)
+HOST_BUDGETS = {
+    "data.europarl.europa.eu": (10.0, 5),   # EP API, /person documents and SPARQL endpoint
+    "www.europarl.europa.eu": (8.0, 8),     # profile pages
+    "query.wikidata.org": (5.0, 5),         # Wikidata SPARQL endpoint
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from both threads and asyncio tasks"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token and return how long the caller has to wait for it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block the current thread until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _host(url_or_host):
+    return urlsplit(url_or_host).netloc or url_or_host
+
+
+def limiter_for(url_or_host, rate=None, burst=None):
+    """
+    Return the shared token bucket for a host, creating it on first use
+    with the given rate and burst (by default the host's HOST_BUDGETS entry)
+    """
+    host = _host(url_or_host)
+    with _buckets_lock:
+        if host not in _buckets:
+            default_rate, default_burst = HOST_BUDGETS.get(host, (DEFAULT_RATE, DEFAULT_BURST))
+            _buckets[host] = TokenBucket(rate or default_rate, burst or default_burst)
+        return _buckets[host]
+
+
+def set_budget(url_or_host, rate, burst=None):
+    """Give a host a new politeness budget, replacing its bucket"""
+    host = _host(url_or_host)
+    with _buckets_lock:
+        _buckets[host] = TokenBucket(rate, burst or max(int(rate), 1))
+        return _buckets[host]